@@ -0,0 +1,169 @@
+"""
+Datathon FIAP - Passos Mágicos
+Agregados pré-calculados por ano PEDE
+
+Cada ano guarda apenas estatísticas suficientes dos indicadores: contagens,
+somas, somas de quadrados, produtos cruzados (linhas completas), somas por
+classe de risco e histogramas com bordas fixas. Qualquer combinação de anos é
+obtida somando os agregados — O(#anos), sem tocar nas linhas — e um ano novo
+é incluído calculando só o seu agregado.
+
+Os valores derivados (médias, correlação, médias por classe) reproduzem
+`mean()`, `corr()` e `groupby().mean()` do pandas sobre as linhas originais.
+
+Autor: Leandro Leme Crespo
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from risco import alvo_risco
+
+INDICADORES = ['IDA', 'IEG', 'IAA', 'IPS', 'IPV', 'IPP']
+CLASSES = ['Sem Risco', 'Com Risco']
+# Indicadores vão de 0 a 10; valores fora da faixa caem no primeiro/último bin
+BORDAS_HISTOGRAMA = np.linspace(0, 10, 31)
+
+
+@dataclass
+class Agregado:
+    """Estatísticas suficientes de um conjunto de linhas (um ano ou a soma de vários)"""
+    linhas: int
+    contagem: np.ndarray            # (k,) valores não nulos por indicador
+    soma: np.ndarray                # (k,)
+    soma_quadrados: np.ndarray      # (k,)
+    linhas_completas: int           # linhas sem nenhum indicador nulo
+    soma_completas: np.ndarray      # (k,)
+    produtos: np.ndarray            # (k, k) soma de x_i * x_j nas linhas completas
+    contagem_classe: np.ndarray     # (2, k) por classe de risco
+    soma_classe: np.ndarray         # (2, k)
+    risco: np.ndarray               # (2,) linhas Sem Risco / Com Risco
+    histogramas: np.ndarray         # (k, n_bins)
+
+    def __add__(self, outro):
+        return Agregado(*(getattr(self, c) + getattr(outro, c) for c in self.__dataclass_fields__))
+
+    def medias(self):
+        """Média de cada indicador (ignora nulos, como `Series.mean`)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.Series(self.soma / self.contagem, index=INDICADORES)
+
+    def desvios(self):
+        """Desvio padrão amostral de cada indicador"""
+        n = self.contagem
+        with np.errstate(invalid='ignore', divide='ignore'):
+            var = (self.soma_quadrados - self.soma ** 2 / n) / (n - 1)
+        return pd.Series(np.sqrt(np.maximum(var, 0)), index=INDICADORES)
+
+    def correlacao(self):
+        """Correlação de Pearson nas linhas completas (como `dropna().corr()`)"""
+        n = self.linhas_completas
+        s = self.soma_completas
+        cov = n * self.produtos - np.outer(s, s)
+        d = np.sqrt(np.diag(cov))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = cov / np.outer(d, d)
+        np.fill_diagonal(corr, 1.0)
+        return pd.DataFrame(np.clip(corr, -1, 1), index=INDICADORES, columns=INDICADORES)
+
+    def histograma(self, indicador):
+        """(bordas, contagens) do indicador nas bordas fixas BORDAS_HISTOGRAMA"""
+        return BORDAS_HISTOGRAMA, self.histogramas[INDICADORES.index(indicador)]
+
+    def medias_por_classe(self):
+        """Média dos indicadores por classe de risco (como `groupby('CLASSE_RISCO').mean()`)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            medias = pd.DataFrame(self.soma_classe / self.contagem_classe, index=CLASSES, columns=INDICADORES)
+        return medias[self.risco > 0]
+
+
+def _matriz_indicadores(df):
+    """Indicadores como float64; colunas ausentes viram NaN"""
+    X = np.full((len(df), len(INDICADORES)), np.nan)
+    for j, ind in enumerate(INDICADORES):
+        if ind in df.columns:
+            X[:, j] = pd.to_numeric(df[ind], errors='coerce').to_numpy(float)
+    return X
+
+
+def calcular(df):
+    """Agregado de um conjunto de linhas (normalmente um ano PEDE)"""
+    X = _matriz_indicadores(df)
+    validos = ~np.isnan(X)
+    X0 = np.where(validos, X, 0.0)
+
+    completas = validos.all(axis=1)
+    Xc = X[completas]
+
+    alvo = alvo_risco(df['DEFASAGEM']) if 'DEFASAGEM' in df.columns else np.full(len(df), np.nan)
+    contagem_classe = np.zeros((2, len(INDICADORES)), dtype=np.int64)
+    soma_classe = np.zeros((2, len(INDICADORES)))
+    for classe in (0, 1):
+        mascara = alvo == classe
+        contagem_classe[classe] = validos[mascara].sum(axis=0)
+        soma_classe[classe] = X0[mascara].sum(axis=0)
+
+    histogramas = np.zeros((len(INDICADORES), len(BORDAS_HISTOGRAMA) - 1), dtype=np.int64)
+    for j in range(len(INDICADORES)):
+        v = np.clip(X[validos[:, j], j], BORDAS_HISTOGRAMA[0], BORDAS_HISTOGRAMA[-1])
+        histogramas[j] = np.histogram(v, bins=BORDAS_HISTOGRAMA)[0]
+
+    return Agregado(
+        linhas=len(df),
+        contagem=validos.sum(axis=0),
+        soma=X0.sum(axis=0),
+        soma_quadrados=(X0 ** 2).sum(axis=0),
+        linhas_completas=int(completas.sum()),
+        soma_completas=Xc.sum(axis=0),
+        produtos=Xc.T @ Xc,
+        contagem_classe=contagem_classe,
+        soma_classe=soma_classe,
+        risco=np.array([(alvo == 0).sum(), (alvo == 1).sum()]),
+        histogramas=histogramas,
+    )
+
+
+class ArmazemAgregados:
+    """Agregados por ANO_PEDE; novos anos são adicionados sem recalcular os demais"""
+
+    def __init__(self):
+        self.anos = {}
+
+    @classmethod
+    def da_base(cls, df):
+        armazem = cls()
+        for ano, df_ano in df.groupby('ANO_PEDE', sort=True, observed=True):
+            armazem.adicionar(ano, df_ano)
+        return armazem
+
+    def adicionar(self, ano, df_ano):
+        """Inclui (ou substitui) o agregado de um ano"""
+        self.anos[str(ano)] = calcular(df_ano)
+
+    def acumular(self, ano, df_ano):
+        """Soma linhas novas ao agregado de um ano (atualizações incrementais)"""
+        ano = str(ano)
+        novo = calcular(df_ano)
+        self.anos[ano] = self.anos[ano] + novo if ano in self.anos else novo
+
+    def copiar(self):
+        """Cópia rasa: os agregados são imutáveis, só o dicionário de anos é novo"""
+        armazem = type(self)()
+        armazem.anos = dict(self.anos)
+        return armazem
+
+    def contagem_por_ano(self):
+        return pd.Series({ano: a.linhas for ano, a in sorted(self.anos.items())}, name='linhas')
+
+    def combinar(self, anos=None):
+        """Soma dos agregados dos anos pedidos (todos se `anos` for None)"""
+        anos = sorted(self.anos) if anos is None else [str(a) for a in anos]
+        selecionados = [self.anos[a] for a in anos if a in self.anos]
+        if not selecionados:
+            return calcular(pd.DataFrame(columns=INDICADORES + ['DEFASAGEM']))
+        total = selecionados[0]
+        for agregado in selecionados[1:]:
+            total = total + agregado
+        return total
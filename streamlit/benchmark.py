@@ -0,0 +1,286 @@
+"""
+Datathon FIAP - Passos Mágicos
+Benchmark do app e dos caminhos críticos de inferência
+
+Executa o app sem navegador (streamlit.testing AppTest) e mede:
+    - partida a frio (caches do Streamlit limpos), abrindo cada página primeiro,
+      e reexecução a quente
+    - tempo de renderização de cada página e do botão de predição
+    - pico de memória (tracemalloc, em uma passada separada) e RSS máximo
+e micro-benchmarks de carga (Arrow, esquema, pacote do modelo) e de
+codificação / monitor de deriva / normalização / predict_proba / contribuições
+em lotes de vários tamanhos. O resultado é gravado em JSON para comparar execuções.
+
+Uso:
+    python benchmark.py                           # grava benchmarks/<data>.json
+    python benchmark.py --saida base.json --repeticoes 10
+    python benchmark.py --sem-app                 # só os micro-benchmarks
+    python benchmark.py comparar base.json novo.json [--limite 1.2]
+
+Autor: Leandro Leme Crespo
+"""
+
+import argparse
+import datetime
+import json
+import pathlib
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+
+import dados
+import pontuacao
+from deriva import MonitorDeriva
+from esquema import aplicar_esquema
+from explicacao import explicador_para
+from pacote_modelo import RegistroModelos
+from risco import TabelaCodificacao
+
+APP = pathlib.Path(__file__).parent / 'app.py'
+PAGINAS = sorted(f"paginas/{p.name}" for p in (APP.parent / 'paginas').glob('*.py'))
+DIR_RESULTADOS = pathlib.Path(__file__).parent / 'benchmarks'
+TAMANHOS_LOTE = (1, 100, 1_000, 10_000)
+LIMITE_REGRESSAO = 1.2
+
+
+def _cronometrar(funcao, repeticoes):
+    """Executa `funcao` repetidas vezes. Retorna estatísticas em ms"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return {'mediana_ms': statistics.median(tempos), 'min_ms': min(tempos),
+            'max_ms': max(tempos), 'repeticoes': repeticoes}
+
+
+def _rss_max_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1e6 if sys.platform == 'darwin' else rss / 1e3
+
+
+# ==================== APP (AppTest) ====================
+
+def _novo_app():
+    from streamlit.testing.v1 import AppTest
+    return AppTest.from_file(str(APP), default_timeout=120)
+
+
+def _limpar_caches():
+    import streamlit as st
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+def _falhas(at):
+    return [str(e.value) for e in at.exception]
+
+
+def _nome_pagina(pagina):
+    return pathlib.Path(pagina).stem
+
+
+def benchmark_app(repeticoes=5):
+    """Partida a frio (por página de entrada), reexecução a quente, páginas e predição via AppTest"""
+    resultado = {}
+
+    partida = {}
+    for pagina in PAGINAS:
+        _limpar_caches()
+        at = _novo_app()
+        at.switch_page(pagina)
+        inicio = time.perf_counter()
+        at.run()
+        partida[_nome_pagina(pagina)] = (time.perf_counter() - inicio) * 1000
+        if _falhas(at):
+            raise RuntimeError(f"o app falhou na partida por {pagina}: {_falhas(at)}")
+    resultado['partida_fria_ms'] = partida
+
+    resultado['reexecucao_quente'] = _cronometrar(at.run, repeticoes)
+
+    paginas = {}
+    for pagina in PAGINAS:
+        def visitar(pagina=pagina):
+            at.switch_page(pagina).run()
+        visitar()  # primeira visita aquece os caches da página
+        paginas[_nome_pagina(pagina)] = _cronometrar(visitar, repeticoes)
+        if _falhas(at):
+            raise RuntimeError(f"a página {pagina} falhou: {_falhas(at)}")
+    resultado['paginas'] = paginas
+
+    at.switch_page('paginas/predicao.py').run()
+    botao = next((b for b in at.button if 'Realizar' in b.label), None)
+    if botao is not None:
+        resultado['predicao'] = _cronometrar(
+            lambda: next(b for b in at.button if 'Realizar' in b.label).click().run(), repeticoes)
+    return resultado
+
+
+def memoria_app():
+    """Pico de memória Python (tracemalloc) da partida a frio + visita a todas as páginas"""
+    _limpar_caches()
+    tracemalloc.start()
+    try:
+        at = _novo_app()
+        at.run()
+        _, pico_partida = tracemalloc.get_traced_memory()
+        for pagina in PAGINAS:
+            at.switch_page(pagina).run()
+        _, pico_total = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'pico_partida_mb': pico_partida / 1e6, 'pico_paginas_mb': pico_total / 1e6}
+
+
+# ==================== MICRO-BENCHMARKS ====================
+
+def _amostra(df, n):
+    """`n` linhas da base (com repetição), preservando a mistura de anos"""
+    indices = np.resize(np.arange(len(df)), n)
+    return df.iloc[indices].reset_index(drop=True)
+
+
+def micro_benchmarks(tamanhos=TAMANHOS_LOTE, repeticoes=5):
+    resultado = {
+        'carregar_base': _cronometrar(dados.carregar_base, repeticoes),
+        'carregar_pacote': _cronometrar(lambda: RegistroModelos().atual(), repeticoes),
+    }
+    base = dados.carregar_base()
+    resultado['aplicar_esquema'] = _cronometrar(lambda: aplicar_esquema(base), repeticoes)
+
+    df = aplicar_esquema(base)
+    modelo, scaler, le_dict, info = pontuacao.carregar_modelo()
+    tabela = TabelaCodificacao(le_dict)
+    explicador = explicador_para(modelo)
+    # Monitor próprio: não mistura as amostras do benchmark com as do processo
+    monitor = MonitorDeriva(info['deriva']) if info.get('deriva') else None
+
+    lotes = {}
+    for n in tamanhos:
+        amostra = _amostra(df, n)
+        X, _, _ = pontuacao.preparar_matriz(amostra, tabela, info)
+        X_scaled = scaler.transform(X)
+        lotes[str(n)] = {
+            'codificar': _cronometrar(lambda: pontuacao.preparar_matriz(amostra, tabela, info), repeticoes),
+            'escalonar': _cronometrar(lambda: scaler.transform(X), repeticoes),
+            'predict_proba': _cronometrar(lambda: modelo.predict_proba(X_scaled), repeticoes),
+            # Sem o monitor do processo: o custo da deriva é medido em codificar_com_deriva
+            'pontuar_lote': _cronometrar(
+                lambda: pontuacao.pontuar_lote(amostra, modelo, scaler, le_dict, info, tabela=tabela,
+                                               monitorar=False),
+                repeticoes),
+        }
+        if explicador is not None:
+            lotes[str(n)]['contribuicoes'] = _cronometrar(lambda: explicador.contribuicoes(X_scaled), repeticoes)
+        if monitor is not None:
+            lotes[str(n)]['codificar_com_deriva'] = _cronometrar(
+                lambda: pontuacao.preparar_matriz(amostra, tabela, info, monitor=monitor), repeticoes)
+    resultado['lotes'] = lotes
+    return resultado
+
+
+# ==================== EXECUÇÃO E COMPARAÇÃO ====================
+
+def _metadados():
+    versoes = {}
+    for modulo in ('streamlit', 'pandas', 'numpy', 'sklearn', 'pyarrow', 'plotly'):
+        try:
+            versoes[modulo] = __import__(modulo).__version__
+        except ImportError:
+            versoes[modulo] = None
+    pacote = RegistroModelos().atual()
+    return {
+        'data': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'versoes': versoes,
+        'modelo': pacote.versao if pacote else 'legado',
+    }
+
+
+def executar(repeticoes=5, app=True):
+    resultado = {'metadados': _metadados()}
+    if app:
+        resultado['app'] = benchmark_app(repeticoes)
+        resultado['memoria'] = memoria_app()
+    resultado['micro'] = micro_benchmarks(repeticoes=repeticoes)
+    resultado.setdefault('memoria', {})['rss_max_mb'] = _rss_max_mb()
+    return resultado
+
+
+def _achatar(resultado, prefixo=''):
+    """{'a': {'b': {'mediana_ms': 1}}} -> {'a.b': 1}; usa a mediana quando disponível"""
+    planos = {}
+    for chave, valor in resultado.items():
+        nome = f'{prefixo}{chave}'
+        if isinstance(valor, dict) and 'mediana_ms' in valor:
+            planos[nome] = valor['mediana_ms']
+        elif isinstance(valor, dict):
+            planos.update(_achatar(valor, nome + '.'))
+        elif isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            planos[nome] = valor
+    return planos
+
+
+def comparar(base, novo, limite=LIMITE_REGRESSAO):
+    """Lista (métrica, base, novo, razão) e as métricas que pioraram além do limite"""
+    a = _achatar({k: v for k, v in base.items() if k != 'metadados'})
+    b = _achatar({k: v for k, v in novo.items() if k != 'metadados'})
+    linhas, regressoes = [], []
+    for metrica in sorted(a.keys() & b.keys()):
+        razao = b[metrica] / a[metrica] if a[metrica] else float('inf')
+        linhas.append((metrica, a[metrica], b[metrica], razao))
+        if razao > limite and not metrica.endswith('repeticoes'):
+            regressoes.append(metrica)
+    return linhas, regressoes
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == 'comparar':
+        parser = argparse.ArgumentParser(prog='benchmark.py comparar')
+        parser.add_argument('base')
+        parser.add_argument('novo')
+        parser.add_argument('--limite', type=float, default=LIMITE_REGRESSAO)
+        args = parser.parse_args(argv[1:])
+        with open(args.base, encoding='utf-8') as f_base, open(args.novo, encoding='utf-8') as f_novo:
+            linhas, regressoes = comparar(json.load(f_base), json.load(f_novo), args.limite)
+        for metrica, a, b, razao in linhas:
+            marca = '❌' if metrica in regressoes else '  '
+            print(f"{marca} {metrica:60s} {a:12.3f} {b:12.3f}  x{razao:.2f}")
+        print(f"\n{len(regressoes)} métrica(s) acima de x{args.limite:.2f}")
+        return 1 if regressoes else 0
+
+    parser = argparse.ArgumentParser(description='Benchmark do app e da inferência')
+    parser.add_argument('--saida', help='arquivo JSON (padrão: benchmarks/<data>.json)')
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--sem-app', action='store_true', help='pula o AppTest (só micro-benchmarks)')
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings('ignore')
+    resultado = executar(args.repeticoes, app=not args.sem_app)
+
+    saida = pathlib.Path(args.saida) if args.saida else \
+        DIR_RESULTADOS / f"{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+    for metrica, valor in _achatar({k: v for k, v in resultado.items() if k != 'metadados'}).items():
+        if not metrica.endswith('repeticoes'):
+            print(f"  {metrica:60s} {valor:12.3f}")
+    print(f"✅ Resultados salvos em {saida}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
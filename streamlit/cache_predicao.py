@@ -0,0 +1,95 @@
+"""
+Datathon FIAP - Passos Mágicos
+Cache LRU de predições individuais
+
+A chave é a versão do pacote de modelo mais o vetor das 11 features
+quantizado (os sliders do app andam de 0.1 em 0.1), de modo que entradas
+iguais — ou que diferem só por ruído de ponto flutuante — reaproveitam a
+probabilidade, o nível de risco, as contribuições das features e as figuras
+Plotly já serializadas.
+A instância é compartilhada entre sessões e protegida por lock.
+
+Autor: Leandro Leme Crespo
+"""
+
+import collections
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+CAPACIDADE_PADRAO = 4096
+CASAS_DECIMAIS = 1
+
+
+@dataclass(frozen=True)
+class ResultadoPredicao:
+    probabilidade: float
+    nivel: str
+    figuras: dict       # nome -> figura Plotly serializada em JSON
+    contribuicoes: dict = None  # feature -> contribuição para o risco (log-odds)
+
+
+def quantizar(features, casas=CASAS_DECIMAIS):
+    """Vetor de features arredondado, usado tanto na chave quanto na predição"""
+    return np.round(np.asarray(features, dtype=float), casas)
+
+
+def chave_predicao(versao, features, casas=CASAS_DECIMAIS):
+    return (versao,) + tuple(quantizar(features, casas).ravel().tolist())
+
+
+class CachePredicao:
+    """LRU limitado com contadores de acertos, falhas e descartes"""
+
+    def __init__(self, capacidade=CAPACIDADE_PADRAO):
+        self.capacidade = capacidade
+        self._itens = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.descartes = 0
+
+    def obter(self, chave):
+        with self._lock:
+            valor = self._itens.get(chave)
+            if valor is None:
+                self.falhas += 1
+            else:
+                self.acertos += 1
+                self._itens.move_to_end(chave)
+            return valor
+
+    def guardar(self, chave, valor):
+        with self._lock:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+                self.descartes += 1
+
+    def obter_ou_calcular(self, chave, calcular):
+        """Retorna (valor, acerto). `calcular` roda fora do lock"""
+        valor = self.obter(chave)
+        if valor is not None:
+            return valor, True
+        valor = calcular()
+        self.guardar(chave, valor)
+        return valor, False
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+    def estatisticas(self):
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                'itens': len(self._itens),
+                'capacidade': self.capacidade,
+                'consultas': consultas,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'descartes': self.descartes,
+                'taxa_acerto': self.acertos / consultas if consultas else 0.0,
+            }
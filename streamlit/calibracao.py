@@ -0,0 +1,90 @@
+"""
+Datathon FIAP - Passos Mágicos
+Calibração da probabilidade de risco
+
+O Gradient Boosting ordena bem os alunos (AUC), mas a sua probabilidade não é
+uma frequência: "70%" não quer dizer que 70% desses alunos estão em
+defasagem, e a relação muda a cada retreinamento. O treino ajusta uma
+regressão isotônica nas predições fora do fold do Stratified K-Fold e grava,
+junto com o modelo, uma tabela compacta:
+    - `bruta` / `calibrada`: pontos da curva isotônica (interpolação linear)
+    - `limiares`: cortes dos níveis de risco (hoje 30% / 60% / 85%), aplicados
+      à probabilidade calibrada
+    - `taxas`: por nível de risco, alunos e % real com risco observados
+
+A classificação (`risco.limiares_modelo`), o gauge e a tabela de níveis da
+página de predição e a tabela "% Real com Risco" da página Sobre leem os
+limiares e as taxas do modelo ativo em vez de valores fixos no código.
+
+Autor: Leandro Leme Crespo
+"""
+
+import numpy as np
+
+from risco import LIMIARES, NIVEIS, codigos_nivel
+
+METODO = 'isotonica'
+N_FOLDS_TAXAS = 5
+SEMENTE = 42
+
+
+def faixas_niveis(limiares=LIMIARES):
+    """Texto da faixa de probabilidade de cada nível (ex.: '30% - 60%')"""
+    limites = [f'{limite:.0%}' for limite in limiares]
+    return [f'< {limites[0]}'] + [f'{a} - {b}' for a, b in zip(limites, limites[1:])] + [f'> {limites[-1]}']
+
+
+def taxas_observadas(probs, y, limiares=LIMIARES):
+    """Por nível: faixa, alunos, % real com risco e probabilidade média"""
+    probs, y = np.asarray(probs, dtype=float), np.asarray(y, dtype=float)
+    codigos = codigos_nivel(probs, limiares)
+    taxas = []
+    for i, (nivel, faixa) in enumerate(zip(NIVEIS, faixas_niveis(limiares))):
+        do_nivel = codigos == i
+        n = int(do_nivel.sum())
+        taxas.append({
+            'nivel': nivel,
+            'faixa': faixa,
+            'alunos': n,
+            'taxa_real': float(y[do_nivel].mean()) if n else None,
+            'probabilidade_media': float(probs[do_nivel].mean()) if n else None,
+        })
+    return taxas
+
+
+def ajustar(probs_brutas, y, limiares=LIMIARES):
+    """
+    Ajusta a calibração nas predições fora do fold e monta a tabela.
+
+    As taxas observadas por nível vêm de uma validação cruzada da própria
+    calibração (medidas na mesma amostra do ajuste, a isotônica as
+    reproduziria por construção). Retorna um dicionário (JSON) que vai no
+    modelo_info e no manifesto do pacote.
+    """
+    from sklearn.isotonic import IsotonicRegression
+    from sklearn.model_selection import StratifiedKFold
+
+    probs_brutas, y = np.asarray(probs_brutas, dtype=float), np.asarray(y)
+    novo = lambda: IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds='clip')
+    calibradas = np.empty(len(y))
+    for treino, teste in StratifiedKFold(N_FOLDS_TAXAS, shuffle=True, random_state=SEMENTE).split(probs_brutas, y):
+        calibradas[teste] = novo().fit(probs_brutas[treino], y[treino]).predict(probs_brutas[teste])
+
+    isotonica = novo().fit(probs_brutas, y)
+    return {
+        'metodo': METODO,
+        'bruta': [float(v) for v in isotonica.X_thresholds_],
+        'calibrada': [float(v) for v in isotonica.y_thresholds_],
+        'amostras': int(len(y)),
+        'limiares': [float(v) for v in limiares],
+        'taxas': taxas_observadas(calibradas, y, limiares),
+        'taxas_sem_calibracao': taxas_observadas(probs_brutas, y, limiares),
+    }
+
+
+def calibrar(probs, info):
+    """Probabilidade calibrada pela tabela do modelo; sem tabela (pickles antigos) devolve a original"""
+    tabela = info.get('calibracao') if info else None
+    if not tabela:
+        return probs
+    return np.interp(probs, tabela['bruta'], tabela['calibrada'])
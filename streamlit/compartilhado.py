@@ -0,0 +1,148 @@
+"""
+Datathon FIAP - Passos Mágicos
+Base tipada publicada uma vez e compartilhada entre processos (memory-map)
+
+A base harmonizada e tipada (planilha + anos ingeridos, já com `aplicar_esquema`)
+é gravada como um único Arrow IPC sem compressão. Os processos do app abrem o
+arquivo via memory-map: as colunas numéricas viram arrays NumPy somente leitura
+apontando para as páginas do arquivo, que o sistema operacional mantém uma vez
+só na memória para todos os processos. Nenhum processo relê a planilha nem
+reaplica o esquema.
+
+Só as colunas numéricas são compartilhadas sem cópia. As colunas de texto e
+as categóricas são convertidas para pandas em cada processo (cópia própria),
+e cada worker recalcula os agregados por ano a partir da base mapeada.
+
+Os NaN das colunas float são gravados como valores (sem bitmap de nulos), o
+que permite a leitura sem cópia. O app usa a publicação quando a variável
+PASSOS_BASE_COMPARTILHADA aponta para o diretório (ver `multiprocesso.py`).
+
+Cada publicação vai para um subdiretório próprio (base.arrow + manifesto.json
+com os arquivos ingeridos incluídos) e o arquivo ATUAL aponta para ela, trocado
+de forma atômica como no registro de modelos: quem anexa sempre vê a base e a
+lista de ingeridos da mesma publicação.
+
+Autor: Leandro Leme Crespo
+"""
+
+import datetime
+import json
+import os
+import pathlib
+import shutil
+
+import pandas as pd
+
+import dados
+from instrumentacao import memoria_rss
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow é opcional: sem ele cada processo carrega a sua base
+    pa = None
+    feather = None
+
+VARIAVEL = 'PASSOS_BASE_COMPARTILHADA'
+NOME_BASE = 'base.arrow'
+NOME_MANIFESTO = 'manifesto.json'
+ARQUIVO_ATUAL = 'ATUAL'
+VERSAO_FORMATO = 2
+# Publicações mantidas em disco (a atual e a anterior, que ainda pode estar sendo anexada)
+MANTER_PUBLICACOES = 2
+
+
+def diretorio_padrao(planilha=None):
+    planilha = pathlib.Path(planilha) if planilha else dados.localizar_planilha()
+    return planilha.parent / 'cache' / 'compartilhado' if planilha else None
+
+
+def _tabela(df):
+    """DataFrame tipado -> tabela Arrow; floats com NaN como valor para leitura sem cópia"""
+    colunas = []
+    for col in df.columns:
+        serie = df[col]
+        if pd.api.types.is_float_dtype(serie.dtype):
+            colunas.append(pa.array(serie.to_numpy(), from_pandas=False))
+        else:
+            colunas.append(pa.Array.from_pandas(serie))
+    return pa.Table.from_arrays(colunas, names=[str(c) for c in df.columns])
+
+
+def publicar_base(df, diretorio, incluidos=()):
+    """
+    Grava a base e o manifesto (com os SHA-256 dos arquivos ingeridos incluídos)
+    em uma nova publicação e a torna a atual.
+
+    A troca é atômica: processos que já mapearam a publicação anterior seguem
+    com o arquivo antigo até reiniciar.
+    """
+    if feather is None:
+        raise RuntimeError("pyarrow é necessário para publicar a base compartilhada")
+    diretorio = pathlib.Path(diretorio)
+    versao = datetime.datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    tmp = diretorio / f'.tmp-{versao}'
+    tmp.mkdir(parents=True)
+    feather.write_feather(_tabela(df), tmp / NOME_BASE, compression='uncompressed')
+    manifesto = {
+        'formato': VERSAO_FORMATO,
+        'versao': versao,
+        'linhas': len(df),
+        'colunas': len(df.columns),
+        'bytes': (tmp / NOME_BASE).stat().st_size,
+        'incluidos': sorted(incluidos),
+        'publicado_em': datetime.datetime.now().isoformat(timespec='seconds'),
+    }
+    with open(tmp / NOME_MANIFESTO, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, diretorio / versao)
+
+    atual = diretorio / f'.{ARQUIVO_ATUAL}.tmp'
+    atual.write_text(versao + '\n', encoding='utf-8')
+    os.replace(atual, diretorio / ARQUIVO_ATUAL)
+
+    # Publicações antigas (no POSIX, quem já as mapeou mantém as páginas) e arquivos do formato 1
+    for nome in (NOME_BASE, NOME_MANIFESTO):
+        (diretorio / nome).unlink(missing_ok=True)
+    versoes = sorted(p for p in diretorio.iterdir() if p.is_dir() and not p.name.startswith('.'))
+    for antiga in versoes[:-MANTER_PUBLICACOES]:
+        shutil.rmtree(antiga, ignore_errors=True)
+    return manifesto
+
+
+def anexar(diretorio):
+    """(df, sha256 incluídos) da publicação atual via memory-map, ou None se não houver"""
+    if feather is None:
+        return None
+    diretorio = pathlib.Path(diretorio)
+    try:
+        publicacao = diretorio / (diretorio / ARQUIVO_ATUAL).read_text(encoding='utf-8').strip()
+        with open(publicacao / NOME_MANIFESTO, encoding='utf-8') as f:
+            manifesto = json.load(f)
+        if manifesto.get('formato') != VERSAO_FORMATO:
+            return None
+        tabela = feather.read_table(publicacao / NOME_BASE, memory_map=True)
+    except (OSError, ValueError):
+        return None
+    df = tabela.to_pandas(split_blocks=True, self_destruct=False)
+    return df, set(manifesto['incluidos'])
+
+
+def anexar_do_ambiente():
+    diretorio = os.environ.get(VARIAVEL)
+    return anexar(diretorio) if diretorio else None
+
+
+def memoria_processo():
+    """RSS, PSS (parte proporcional das páginas compartilhadas) e memória compartilhada, em MB"""
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            campos = {linha.split(':')[0]: int(linha.split()[1]) for linha in f if linha.endswith('kB\n')}
+        return {
+            'rss_mb': campos['Rss'] / 1024,
+            'pss_mb': campos['Pss'] / 1024,
+            'compartilhada_mb': (campos['Shared_Clean'] + campos['Shared_Dirty']) / 1024,
+        }
+    except (OSError, KeyError, ValueError):
+        rss = memoria_rss()
+        return {'rss_mb': rss / 2**20 if rss else None, 'pss_mb': None, 'compartilhada_mb': None}
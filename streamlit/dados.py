@@ -0,0 +1,176 @@
+"""
+Datathon FIAP - Passos Mágicos
+Cache colunar (Arrow) da base PEDE
+
+A planilha XLSX é lida com openpyxl apenas quando o arquivo muda. Cada aba
+(ano PEDE) é normalizada e gravada como um arquivo Arrow IPC sem compressão,
+acompanhado de um manifesto com o hash SHA-256 da planilha de origem. Nas
+inicializações seguintes os arquivos são abertos via memory-map.
+
+Autor: Leandro Leme Crespo
+"""
+
+import hashlib
+import json
+import os
+import pathlib
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow é opcional: sem ele a planilha é lida diretamente
+    pa = None
+    feather = None
+
+NOME_PLANILHA = 'BASE_DE_DADOS_PEDE_2024_DATATHON.xlsx'
+NOME_MANIFESTO = 'manifesto.json'
+VERSAO_FORMATO = 1
+
+
+def localizar_planilha():
+    """Retorna o caminho da planilha PEDE ou None se não encontrada"""
+    paths = [
+        pathlib.Path('data') / NOME_PLANILHA,
+        pathlib.Path('..') / 'data' / NOME_PLANILHA,
+        pathlib.Path(__file__).parent / NOME_PLANILHA,
+        pathlib.Path(__file__).parent.parent / 'data' / NOME_PLANILHA,
+    ]
+    for path in paths:
+        if path.exists():
+            return path
+    return None
+
+
+def hash_arquivo(caminho, tamanho_bloco=1 << 20):
+    """Calcula o SHA-256 de um arquivo lendo em blocos"""
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def normalizar_aba(df_year, sheet):
+    """Normaliza uma aba da planilha (nomes de colunas, ano e tipos compatíveis com Arrow)"""
+    df_year.columns = [str(c).upper() for c in df_year.columns]
+    if 'DEFAS' in df_year.columns:
+        df_year = df_year.rename(columns={'DEFAS': 'DEFASAGEM'})
+    df_year['ANO_PEDE'] = sheet.replace('PEDE', '')
+
+    # Colunas com tipos mistos (ex.: números e textos na mesma coluna) viram texto
+    for col in df_year.columns:
+        if df_year[col].dtype == object:
+            df_year[col] = df_year[col].astype('string')
+    return df_year
+
+
+def harmonizar_colunas(df):
+    """Padroniza as variantes de nomes de colunas entre os anos (ex.: "Matem" vs "Mat")"""
+    rename = {}
+    for c in df.columns:
+        cl = str(c).strip().upper()
+        if cl in ('IDADE 22', 'IDADE'): rename[c] = 'IDADE'
+        elif cl in ('MATEM', 'MAT'): rename[c] = 'MAT'
+        elif cl in ('PORTUG', 'POR'): rename[c] = 'POR'
+        elif cl in ('DEFAS', 'DEFASAGEM'): rename[c] = 'DEFASAGEM'
+        elif 'GÊNERO' in cl: rename[c] = 'GÊNERO'
+        elif 'INSTITUIÇÃO' in cl: rename[c] = 'INSTITUIÇÃO DE ENSINO'
+        elif cl == 'ANO INGRESSO': rename[c] = 'ANO INGRESSO'
+        elif cl != c: rename[c] = cl
+    df = df.rename(columns=rename)
+
+    # Em bases já concatenadas, variantes de anos diferentes viram colunas repetidas:
+    # mantém o primeiro valor preenchido de cada linha
+    if df.columns.has_duplicates:
+        colunas = {}
+        for nome in df.columns.unique():
+            bloco = df.loc[:, df.columns == nome]
+            colunas[nome] = bloco.iloc[:, 0] if bloco.shape[1] == 1 else bloco.bfill(axis=1).iloc[:, 0]
+        df = pd.DataFrame(colunas, index=df.index)
+    return df
+
+
+def ler_planilha(caminho):
+    """Lê e normaliza todas as abas da planilha. Retorna {aba: DataFrame}"""
+    xlsx = pd.ExcelFile(caminho)
+    return {
+        sheet: normalizar_aba(pd.read_excel(xlsx, sheet_name=sheet), sheet)
+        for sheet in xlsx.sheet_names
+    }
+
+
+def _ler_manifesto(dir_cache):
+    try:
+        with open(dir_cache / NOME_MANIFESTO, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _cache_valido(dir_cache, manifesto, sha256):
+    if not manifesto or manifesto.get('formato') != VERSAO_FORMATO:
+        return False
+    if manifesto.get('sha256') != sha256:
+        return False
+    return all((dir_cache / aba['arquivo']).exists() for aba in manifesto.get('abas', []))
+
+
+def construir_cache(caminho, dir_cache, sha256):
+    """Converte a planilha em um arquivo Arrow por ano e grava o manifesto"""
+    dir_cache.mkdir(parents=True, exist_ok=True)
+    abas = []
+    for sheet, df_year in ler_planilha(caminho).items():
+        arquivo = f'{sheet}.arrow'
+        tmp = dir_cache / (arquivo + '.tmp')
+        feather.write_feather(df_year, tmp, compression='uncompressed')
+        os.replace(tmp, dir_cache / arquivo)
+        abas.append({'aba': sheet, 'ano': sheet.replace('PEDE', ''),
+                     'arquivo': arquivo, 'linhas': len(df_year)})
+
+    manifesto = {
+        'formato': VERSAO_FORMATO,
+        'origem': pathlib.Path(caminho).name,
+        'sha256': sha256,
+        'abas': abas,
+    }
+    # Grava o manifesto por último: um cache incompleto nunca é considerado válido
+    tmp = dir_cache / (NOME_MANIFESTO + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, dir_cache / NOME_MANIFESTO)
+    return manifesto
+
+
+def ler_ano(dir_cache, arquivo):
+    """Lê um ano do cache via memory-map"""
+    return feather.read_table(dir_cache / arquivo, memory_map=True).to_pandas()
+
+
+def carregar_base(caminho=None, dir_cache=None):
+    """
+    Carrega a base PEDE concatenada, usando o cache colunar quando possível.
+
+    O cache fica em `<pasta da planilha>/cache` e é reconstruído apenas quando
+    o hash da planilha muda. Sem pyarrow, ou se a pasta não for gravável,
+    a planilha é lida diretamente.
+    """
+    caminho = pathlib.Path(caminho) if caminho else localizar_planilha()
+    if caminho is None:
+        return None
+
+    if pa is None:
+        return pd.concat(ler_planilha(caminho).values(), ignore_index=True)
+
+    dir_cache = pathlib.Path(dir_cache) if dir_cache else caminho.parent / 'cache'
+    sha256 = hash_arquivo(caminho)
+    manifesto = _ler_manifesto(dir_cache)
+    if not _cache_valido(dir_cache, manifesto, sha256):
+        try:
+            manifesto = construir_cache(caminho, dir_cache, sha256)
+        except OSError:
+            return pd.concat(ler_planilha(caminho).values(), ignore_index=True)
+
+    return pd.concat([ler_ano(dir_cache, aba['arquivo']) for aba in manifesto['abas']],
+                     ignore_index=True)
@@ -0,0 +1,250 @@
+"""
+Datathon FIAP - Passos Mágicos
+Monitor de deriva dos dados (data drift)
+
+O modelo foi treinado com os alunos de 2022-2024; novas coortes podem chegar
+com outra distribuição (notas mais altas, outra faixa de idade, instituições
+de ensino que o encoder nunca viu). O treino grava, junto com o modelo, um
+esboço compacto da distribuição de referência:
+    - features numéricas: os percentis 1..99 (cortes) e a proporção de alunos
+      de treino entre cada par de cortes
+    - features categóricas: a frequência de cada categoria
+
+Cada lote pontuado (página de predição, tarefas em segundo plano e serviço
+HTTP) soma as suas contagens nas mesmas faixas — um `searchsorted` por
+feature, sem guardar os alunos. A qualquer momento saem, por feature:
+    - PSI (Population Stability Index), em 10 faixas de mesma massa no treino
+    - KS: maior distância entre as distribuições acumuladas (features numéricas)
+    - as categorias novas e quantos alunos as trouxeram
+
+Categorias novas não derrubam mais a pontuação: o aluno é pontuado com a
+categoria substituta (ver `substitutos`) e a ocorrência entra na deriva.
+
+Autor: Leandro Leme Crespo
+"""
+
+import collections
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from instrumentacao import METRICAS
+
+QUANTIS = np.linspace(0.01, 0.99, 99)
+FAIXAS_PSI = 10
+# Proporção mínima por faixa no PSI (faixas vazias teriam log(0))
+EPSILON = 1e-4
+# PSI: < 0.10 estável, 0.10 - 0.25 moderada, > 0.25 significativa (convenção de risco de crédito)
+LIMIARES_PSI = (0.10, 0.25)
+# Coeficiente do valor crítico do KS para duas amostras a 5%
+COEFICIENTE_KS = 1.358
+MINIMO_AMOSTRAS = 100
+CATEGORIA_PADRAO = 'Desconhecido'
+NOVAS = 'Categorias novas'
+
+
+def criar_referencia(df, numericas, categoricas):
+    """Esboço da distribuição de treino (JSON; vai no modelo_info e no manifesto do pacote)"""
+    referencia = {'amostras': int(len(df)), 'numericas': {}, 'categoricas': {}}
+    for col in numericas:
+        x = pd.to_numeric(df[col], errors='coerce').dropna().to_numpy(float)
+        cortes = np.unique(np.quantile(x, QUANTIS))
+        contagens = np.bincount(np.searchsorted(cortes, x, side='right'), minlength=len(cortes) + 1)
+        referencia['numericas'][col] = {
+            'cortes': [float(v) for v in cortes],
+            'proporcoes': [float(v) for v in contagens / len(x)],
+        }
+    for col in categoricas:
+        frequencias = df[col].astype(object).fillna(CATEGORIA_PADRAO).astype(str).value_counts(normalize=True)
+        referencia['categoricas'][col] = {str(k): float(v) for k, v in frequencias.items()}
+    return referencia
+
+
+def substitutos(info, tabela):
+    """
+    Código usado no lugar de uma categoria que o encoder não conhece, por
+    coluna: 'Desconhecido' quando o encoder a conhece; senão a categoria mais
+    frequente no treino. Sem referência e sem 'Desconhecido', a coluna fica
+    de fora (o aluno não é pontuado, como antes).
+    """
+    referencia = (info or {}).get('deriva') or {}
+    codigos = {}
+    for col in (info or {}).get('features_categoricas', []):
+        codigo = tabela.codigo(col, CATEGORIA_PADRAO)
+        frequencias = referencia.get('categoricas', {}).get(col)
+        if codigo < 0 and frequencias:
+            codigo = tabela.codigo(col, max(frequencias, key=frequencias.get))
+        if codigo >= 0:
+            codigos[col] = codigo
+    return codigos
+
+
+def psi(referencia, atual):
+    """PSI entre duas distribuições (proporções nas mesmas faixas)"""
+    referencia = np.maximum(np.asarray(referencia, dtype=float), EPSILON)
+    atual = np.maximum(np.asarray(atual, dtype=float), EPSILON)
+    return float(np.sum((atual - referencia) * np.log(atual / referencia)))
+
+
+def situacao(valor_psi, amostras):
+    if amostras < MINIMO_AMOSTRAS:
+        return 'Amostra pequena'
+    if valor_psi < LIMIARES_PSI[0]:
+        return 'Estável'
+    return 'Moderada' if valor_psi < LIMIARES_PSI[1] else 'Significativa'
+
+
+class MonitorDeriva:
+    """Contagens acumuladas dos lotes pontuados nas faixas da referência (thread-safe)"""
+
+    def __init__(self, referencia, versao=None):
+        self.referencia, self.versao = referencia, versao
+        self.numericas = list(referencia['numericas'])
+        self.categoricas = list(referencia['categoricas'])
+        self._cortes = [np.asarray(referencia['numericas'][c]['cortes']) for c in self.numericas]
+        self._proporcoes = [np.asarray(referencia['numericas'][c]['proporcoes']) for c in self.numericas]
+        # Faixa do PSI de cada faixa fina: 10 grupos de mesma massa no treino
+        self._grupos = [np.minimum((np.cumsum(p) - p) * FAIXAS_PSI + 1e-9, FAIXAS_PSI - 1).astype(int)
+                        for p in self._proporcoes]
+        self.lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self.lock:
+            self.contagens = [np.zeros(len(p), dtype=np.int64) for p in self._proporcoes]
+            self.categorias = {col: collections.Counter() for col in self.categoricas}
+            self.linhas, self.lotes, self.desde = 0, 0, time.time()
+
+    def observar(self, numericas, categorias):
+        """
+        Soma um lote: `numericas` (n, k) na ordem de `self.numericas` (NaN é
+        ignorado) e `categorias` {coluna: valores}.
+        """
+        numericas = np.asarray(numericas, dtype=float).reshape(-1, len(self.numericas))
+        contagens = []
+        for j, cortes in enumerate(self._cortes):
+            x = numericas[:, j]
+            x = x[~np.isnan(x)]
+            contagens.append(np.bincount(np.searchsorted(cortes, x, side='right'), minlength=len(cortes) + 1))
+        frequencias = {col: pd.Series(valores, dtype=object).value_counts().to_dict()
+                       for col, valores in categorias.items() if col in self.categorias}
+        with self.lock:
+            for total, c in zip(self.contagens, contagens):
+                total += c
+            for col, f in frequencias.items():
+                self.categorias[col].update(f)
+            self.linhas += len(numericas)
+            self.lotes += 1
+
+    def _copia(self):
+        with self.lock:
+            return ([c.copy() for c in self.contagens], {col: collections.Counter(c) for col, c in self.categorias.items()},
+                    self.linhas, self.lotes)
+
+    def _comparar_numerica(self, j, contagem):
+        referencia, grupos = self._proporcoes[j], self._grupos[j]
+        n = int(contagem.sum())
+        atual = contagem / n if n else np.zeros(len(contagem))
+        valor_psi = psi(np.bincount(grupos, referencia, FAIXAS_PSI), np.bincount(grupos, atual, FAIXAS_PSI))
+        ks = float(np.abs(np.cumsum(referencia) - np.cumsum(atual)).max()) if n else 0.0
+        m = self.referencia['amostras']
+        critico = COEFICIENTE_KS * np.sqrt((n + m) / (n * m)) if n else np.nan
+        return n, valor_psi, ks, critico
+
+    def _comparar_categorica(self, col, contagem):
+        frequencias = self.referencia['categoricas'][col]
+        n = sum(contagem.values())
+        conhecidas = [contagem.get(k, 0) / n if n else 0.0 for k in frequencias]
+        novas = sum(v for k, v in contagem.items() if k not in frequencias) / n if n else 0.0
+        return n, psi(list(frequencias.values()) + [0.0], conhecidas + [novas])
+
+    def estatisticas(self):
+        """PSI, KS e situação de cada feature desde o início (ou o último `reiniciar`)"""
+        contagens, categorias, _, _ = self._copia()
+        linhas = []
+        for j, col in enumerate(self.numericas):
+            n, valor_psi, ks, critico = self._comparar_numerica(j, contagens[j])
+            linhas.append({'Feature': col, 'Tipo': 'numérica', 'Amostras': n, 'PSI': valor_psi, 'KS': ks,
+                           'KS crítico': critico, 'Situação': situacao(valor_psi, n)})
+        for col in self.categoricas:
+            n, valor_psi = self._comparar_categorica(col, categorias[col])
+            linhas.append({'Feature': col, 'Tipo': 'categórica', 'Amostras': n, 'PSI': valor_psi, 'KS': np.nan,
+                           'KS crítico': np.nan, 'Situação': situacao(valor_psi, n)})
+        return pd.DataFrame(linhas, columns=['Feature', 'Tipo', 'Amostras', 'PSI', 'KS', 'KS crítico', 'Situação'])
+
+    def categorias_novas(self):
+        """Valores que o treino não viu, com o número de alunos de cada um"""
+        _, categorias, _, _ = self._copia()
+        linhas = [{'Feature': col, 'Valor': valor, 'Alunos': n}
+                  for col, contagem in categorias.items() for valor, n in contagem.most_common()
+                  if valor not in self.referencia['categoricas'][col]]
+        return pd.DataFrame(linhas, columns=['Feature', 'Valor', 'Alunos'])
+
+    def distribuicao(self, feature):
+        """Proporção de treino e atual por faixa do PSI (numéricas) ou categoria"""
+        contagens, categorias, _, _ = self._copia()
+        if feature in self.categoricas:
+            frequencias = self.referencia['categoricas'][feature]
+            contagem = categorias[feature]
+            n = sum(contagem.values()) or 1
+            novas = sum(v for k, v in contagem.items() if k not in frequencias)
+            return pd.DataFrame({'Faixa': list(frequencias) + [NOVAS],
+                                 'Treino': list(frequencias.values()) + [0.0],
+                                 'Atual': [contagem.get(k, 0) / n for k in frequencias] + [novas / n]})
+        j = self.numericas.index(feature)
+        cortes, grupos = self._cortes[j], self._grupos[j]
+        n = int(contagens[j].sum()) or 1
+        faixas = []
+        for g in np.unique(grupos):
+            bins = np.flatnonzero(grupos == g)
+            de = f'{cortes[bins[0] - 1]:g}' if bins[0] > 0 else '-∞'
+            ate = f'{cortes[bins[-1]]:g}' if bins[-1] < len(cortes) else '+∞'
+            faixas.append({'Faixa': f'[{de}, {ate})', 'Treino': float(self._proporcoes[j][bins].sum()),
+                           'Atual': float(contagens[j][bins].sum() / n)})
+        return pd.DataFrame(faixas)
+
+    def resumo(self):
+        _, _, linhas, lotes = self._copia()
+        return {'versao': self.versao, 'linhas': linhas, 'lotes': lotes, 'desde': self.desde}
+
+    def metricas(self):
+        """Séries para o coletor do Prometheus"""
+        versao = self.versao or 'legado'
+        series = [('passos_deriva_linhas', self.resumo()['linhas'], {'versao': versao})]
+        for _, r in self.estatisticas().iterrows():
+            series.append(('passos_deriva_psi', r['PSI'], {'feature': r['Feature'], 'versao': versao}))
+            if r['Tipo'] == 'numérica':
+                series.append(('passos_deriva_ks', r['KS'], {'feature': r['Feature'], 'versao': versao}))
+        novas = self.categorias_novas()
+        for col in self.categoricas:
+            series.append(('passos_deriva_categorias_novas', int(novas.loc[novas['Feature'] == col, 'Alunos'].sum()),
+                           {'feature': col, 'versao': versao}))
+        return series
+
+
+# Um monitor por versão do modelo, compartilhado pelo processo (páginas, tarefas e serviço)
+_MONITORES = {}
+_LOCK = threading.Lock()
+
+
+def monitor_para(info):
+    """Monitor da versão do modelo de `info`; None se o modelo não tem referência (pickles antigos)"""
+    referencia = (info or {}).get('deriva')
+    if not referencia:
+        return None
+    versao = info.get('versao', 'legado')
+    with _LOCK:
+        if versao not in _MONITORES:
+            _MONITORES[versao] = MonitorDeriva(referencia, versao)
+        return _MONITORES[versao]
+
+
+def _coletar():
+    with _LOCK:
+        monitores = list(_MONITORES.values())
+    return [serie for monitor in monitores for serie in monitor.metricas()]
+
+
+METRICAS.registrar_coletor('deriva', _coletar)
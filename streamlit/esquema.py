@@ -0,0 +1,56 @@
+"""
+Datathon FIAP - Passos Mágicos
+Esquema tipado da base PEDE concatenada
+
+Aplicado uma única vez na carga: padroniza as variantes de nomes de colunas
+entre os anos (ex.: "Idade 22", "Matem", "Portug", "Defas"), converte os
+indicadores para float32 e as colunas de baixa cardinalidade usadas nos
+filtros e no modelo para `category`. As features numéricas do modelo ficam
+em float64: vários valores (ex.: IDA = 6.666666667) não são representáveis em
+float32 e o arredondamento mudaria a probabilidade prevista. As páginas
+recebem colunas já numéricas e não precisam converter (nem alterar) o
+DataFrame compartilhado.
+
+Autor: Leandro Leme Crespo
+"""
+
+import pandas as pd
+
+from dados import harmonizar_colunas
+
+# Indicadores e notas (0-10) que não entram no modelo
+COLUNAS_FLOAT32 = ['INDE 22', 'INDE 23', 'INDE 2023', 'INDE 2024', 'IAN', 'IPP', 'ING', 'INGLÊS',
+                   'DEFASAGEM']
+# Features numéricas do modelo: mesma precisão usada no treino
+COLUNAS_FLOAT64 = ['IDA', 'IEG', 'IAA', 'IPS', 'IPV', 'MAT', 'POR', 'IDADE', 'ANO INGRESSO']
+COLUNAS_CATEGORICAS = ['GÊNERO', 'INSTITUIÇÃO DE ENSINO']
+# Demais colunas de texto viram `category` quando repetem muito (pedras, fases, avaliadores...)
+LIMITE_CARDINALIDADE = 0.5
+
+
+def aplicar_esquema(df):
+    """Retorna uma nova base harmonizada e tipada (o DataFrame de entrada não é alterado)"""
+    df = harmonizar_colunas(df)
+    colunas = {}
+    for col in COLUNAS_FLOAT32:
+        if col in df.columns:
+            colunas[col] = pd.to_numeric(df[col], errors='coerce').astype('float32')
+    for col in COLUNAS_FLOAT64:
+        if col in df.columns:
+            colunas[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+    for col in COLUNAS_CATEGORICAS:
+        if col in df.columns:
+            colunas[col] = df[col].astype('category')
+    for col in df.columns:
+        if col in colunas or col == 'ANO_PEDE' or pd.api.types.is_numeric_dtype(df[col]):
+            continue
+        # Tipos mistos entre anos (ex.: FASE 1 e "1A", datas e textos) viram texto
+        serie = df[col].astype('string') if df[col].dtype == object else df[col]
+        if serie.nunique() <= LIMITE_CARDINALIDADE * len(df):
+            colunas[col] = serie.astype('category')
+        elif serie is not df[col]:
+            colunas[col] = serie
+    if 'ANO_PEDE' in df.columns:
+        anos = df['ANO_PEDE'].astype(str)
+        colunas['ANO_PEDE'] = pd.Categorical(anos, categories=sorted(anos.unique()), ordered=True)
+    return df.assign(**colunas)
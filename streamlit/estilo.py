@@ -0,0 +1,76 @@
+"""
+Datathon FIAP - Passos Mágicos
+CSS customizado do app
+
+O bloco base (cabeçalhos) vale para todas as páginas; os cartões de nível de
+risco só são injetados pela página de predição.
+
+Autor: Leandro Leme Crespo
+"""
+
+import streamlit as st
+
+CSS_BASE = """
+    .main-header {
+        font-size: 2.5rem;
+        font-weight: bold;
+        color: #1E3A8A;
+        text-align: center;
+        margin-bottom: 1rem;
+    }
+    .sub-header {
+        font-size: 1.2rem;
+        color: #64748B;
+        text-align: center;
+        margin-bottom: 2rem;
+    }
+    .metric-card {
+        background-color: #F8FAFC;
+        border-radius: 10px;
+        padding: 1rem;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+    }
+"""
+
+CSS_RISCO = """
+    .risk-high {
+        background-color: #991B1B;
+        border-left: 4px solid #EF4444;
+        padding: 1rem;
+        border-radius: 5px;
+        color: #ffffff;
+    }
+    .risk-high h2 { color: #FCA5A5; margin-bottom: 10px; }
+    .risk-high p { color: #ffffff; }
+    .risk-moderate {
+        background-color: #92400E;
+        border-left: 4px solid #F59E0B;
+        padding: 1rem;
+        border-radius: 5px;
+        color: #ffffff;
+    }
+    .risk-moderate h2 { color: #FCD34D; margin-bottom: 10px; }
+    .risk-moderate p { color: #ffffff; }
+    .risk-attention {
+        background-color: #854D0E;
+        border-left: 4px solid #FBBF24;
+        padding: 1rem;
+        border-radius: 5px;
+        color: #ffffff;
+    }
+    .risk-attention h2 { color: #FDE68A; margin-bottom: 10px; }
+    .risk-attention p { color: #ffffff; }
+    .risk-low {
+        background-color: #166534;
+        border-left: 4px solid #22C55E;
+        padding: 1rem;
+        border-radius: 5px;
+        color: #ffffff;
+    }
+    .risk-low h2 { color: #86EFAC; margin-bottom: 10px; }
+    .risk-low p { color: #ffffff; }
+"""
+
+
+def aplicar(*blocos):
+    st.markdown(f"<style>{''.join(blocos)}</style>", unsafe_allow_html=True)
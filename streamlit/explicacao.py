@@ -0,0 +1,99 @@
+"""
+Datathon FIAP - Passos Mágicos
+Explicações locais das predições (contribuições por caminho nas árvores)
+
+Para cada árvore, o valor esperado de um nó é a média das folhas abaixo dele
+ponderada pelas amostras de treino (cobertura). Ao descer da raiz até a folha,
+a variação do valor esperado em cada divisão é atribuída à feature usada na
+divisão (método de Saabas, aproximação rápida do TreeSHAP). Assim:
+
+    log-odds do aluno = base + soma das contribuições das 11 features
+
+A travessia usa o mesmo layout de árvores completas do `modelo_compacto` e é
+vetorizada sobre (alunos x árvores): milhares de alunos em milissegundos.
+
+Autor: Leandro Leme Crespo
+"""
+
+import numpy as np
+
+from modelo_compacto import TAMANHO_BLOCO, ModeloCompacto, exportar_modelo
+
+N_FATORES = 3
+
+
+def _valores_esperados(folha, cobertura):
+    """Valor esperado de cada nó (ordem de heap, internos + folhas): array (n_arvores, 2^(p+1) - 1)"""
+    n_arvores, n_folhas = folha.shape
+    valores = [np.asarray(folha, dtype=float)]
+    pesos = [np.asarray(cobertura, dtype=float)]
+    while valores[-1].shape[1] > 1:
+        v, w = valores[-1], pesos[-1]
+        w_pai = w[:, 0::2] + w[:, 1::2]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            v_pai = np.where(w_pai > 0, (v[:, 0::2] * w[:, 0::2] + v[:, 1::2] * w[:, 1::2]) / w_pai, 0.0)
+        valores.append(v_pai)
+        pesos.append(w_pai)
+    # Da raiz para as folhas, nível a nível = ordem de heap
+    return np.concatenate(valores[::-1], axis=1)
+
+
+class Explicador:
+    """Contribuições por feature (em log-odds) para um `ModeloCompacto` com cobertura"""
+
+    def __init__(self, modelo):
+        if modelo.cobertura is None:
+            raise ValueError("o modelo não tem a cobertura das folhas (recrie o pacote)")
+        self.modelo = modelo
+        self.esperado = _valores_esperados(modelo.folha, modelo.cobertura).ravel()
+        self.n_nos = len(self.esperado) // modelo.n_arvores
+        self._base_nos = np.arange(modelo.n_arvores) * self.n_nos
+        self.base = modelo.valor_inicial + modelo.taxa_aprendizado * self.esperado[self._base_nos].sum()
+
+    def contribuicoes(self, X):
+        """Array (n_alunos, n_features) com a contribuição de cada feature; X já normalizado"""
+        m = self.modelo
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        n, n_features = X.shape
+        contrib = np.zeros((n, n_features))
+        for i in range(0, n, TAMANHO_BLOCO):
+            bloco = X[i:i + TAMANHO_BLOCO]
+            valores = bloco.ravel()
+            linhas = np.arange(len(bloco))[:, None]
+            no = np.zeros((len(bloco), m.n_arvores), dtype=np.int64)
+            acumulado = np.zeros(len(bloco) * n_features)
+            for _ in range(m.profundidade):
+                global_ = m._base + no
+                feature = np.take(m.feature, global_)
+                x = np.take(valores, linhas * n_features + feature)
+                filho = 2 * no + 1 + (x > np.take(m.limiar, global_))
+                delta = (np.take(self.esperado, self._base_nos + filho)
+                         - np.take(self.esperado, self._base_nos + no))
+                acumulado += np.bincount((linhas * n_features + feature).ravel(), weights=delta.ravel(),
+                                         minlength=len(acumulado))
+                no = filho
+            contrib[i:i + TAMANHO_BLOCO] = m.taxa_aprendizado * acumulado.reshape(len(bloco), n_features)
+        return contrib
+
+
+def explicador_para(modelo):
+    """
+    Explicador para um ModeloCompacto (pacote) ou um GradientBoostingClassifier
+    (pickle legado); None para pacotes sem a cobertura das folhas (anteriores às
+    explicações, ainda ativáveis pelo registro): quem chama omite as contribuições.
+    """
+    if not isinstance(modelo, ModeloCompacto):
+        arrays = exportar_modelo(modelo)
+        modelo = ModeloCompacto(arrays['feature'], arrays['limiar'], arrays['folha'],
+                                arrays['valor_inicial'], arrays['taxa_aprendizado'],
+                                cobertura=arrays['cobertura'])
+    if modelo.cobertura is None:
+        return None
+    return Explicador(modelo)
+
+
+def principais_fatores(contrib, nomes, n=N_FATORES):
+    """Texto com as `n` features de maior contribuição absoluta de cada aluno"""
+    contrib = np.atleast_2d(contrib)
+    ordem = np.argsort(-np.abs(contrib), axis=1)[:, :n]
+    return ['; '.join(f"{nomes[j]} ({c[j]:+.2f})" for j in linha) for c, linha in zip(contrib, ordem)]
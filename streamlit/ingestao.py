@@ -0,0 +1,484 @@
+"""
+Datathon FIAP - Passos Mágicos
+Ingestão incremental de novos anos / atualizações da base PEDE
+
+Novos arquivos (XLSX com abas "PEDE<ano>" ou CSV com a coluna ANO_PEDE ou o
+ano no nome, ex.: PEDE2025.csv) são colocados em `data/novos/` (ou no
+diretório de PASSOS_DIR_NOVOS). Cada arquivo é:
+    1. validado contra o esquema harmonizado (colunas do modelo, números 0-10)
+    2. gravado no cache colunar como um Arrow por ano (`cache/novos/`)
+    3. registrado no livro `cache/ingestao.json` pelo SHA-256
+e é somado à base e aos agregados em memória sem reler a planilha nem os
+arquivos já ingeridos. Um aluno tem uma linha por ano: uma atualização do meio
+do ano substitui as linhas dos mesmos (RA, ano) e acrescenta as demais, e só o
+agregado desse ano é recalculado. A base em memória é uma lista de partes (a
+planilha e um trecho por ano ingerido); acrescentar não copia as partes que
+não mudaram e a base inteira só é montada quando alguma página usa as linhas.
+Arquivos rejeitados ficam no livro com o motivo e só são reavaliados se o
+conteúdo mudar.
+
+Com vários processos (ver `multiprocesso.py`), o livro é protegido por uma
+trava de arquivo: um processo ingere e os demais incorporam o que já está no
+livro, sem reprocessar.
+
+Uso:
+    python ingestao.py            # ingere os arquivos pendentes e mostra o resumo
+
+Autor: Leandro Leme Crespo
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import pathlib
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from functools import cached_property
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: um processo por máquina
+    fcntl = None
+
+import dados
+from agregados import ArmazemAgregados
+from esquema import COLUNAS_CATEGORICAS, COLUNAS_FLOAT64, aplicar_esquema
+
+VARIAVEL_DIR = 'PASSOS_DIR_NOVOS'
+NOME_LIVRO = 'ingestao.json'
+NOME_TRAVA = 'ingestao.lock'
+VERSAO_FORMATO = 1
+EXTENSOES = ('.xlsx', '.csv')
+# Intervalo mínimo entre duas verificações do diretório (s)
+INTERVALO_VERIFICACAO = 5.0
+
+COLUNAS_OBRIGATORIAS = ['RA'] + COLUNAS_FLOAT64 + COLUNAS_CATEGORICAS
+# Indicadores e notas que precisam estar entre 0 e 10 (a base tem arredondamentos como 10.002)
+COLUNAS_NOTA = ['IDA', 'IEG', 'IAA', 'IPS', 'IPV', 'MAT', 'POR']
+TOLERANCIA_NOTA = 0.05
+_ANO = re.compile(r'(20\d{2})')
+
+
+class ErroValidacao(ValueError):
+    """Arquivo fora do esquema harmonizado"""
+
+
+# ==================== LEITURA E VALIDAÇÃO ====================
+
+def _ano_do_nome(nome):
+    encontrado = _ANO.search(nome)
+    return encontrado.group(1) if encontrado else None
+
+
+def ler_novo(caminho):
+    """Lê um arquivo novo e retorna {ano: DataFrame normalizado (como uma aba da planilha)}"""
+    caminho = pathlib.Path(caminho)
+    if caminho.suffix.lower() == '.csv':
+        df = pd.read_csv(caminho)
+        df.columns = [str(c).upper() for c in df.columns]
+        if 'ANO_PEDE' in df.columns:
+            anos = df['ANO_PEDE'].astype(str).str.extract(_ANO, expand=False)
+            if anos.isna().any():
+                raise ErroValidacao("ANO_PEDE deve conter o ano com 4 dígitos em todas as linhas")
+            return {ano: dados.normalizar_aba(df[anos == ano].drop(columns='ANO_PEDE'), f'PEDE{ano}')
+                    for ano in sorted(anos.unique())}
+        ano = _ano_do_nome(caminho.stem)
+        if ano is None:
+            raise ErroValidacao("CSV sem a coluna ANO_PEDE e sem o ano no nome do arquivo")
+        return {ano: dados.normalizar_aba(df, f'PEDE{ano}')}
+
+    abas = {}
+    xlsx = pd.ExcelFile(caminho)
+    for aba in xlsx.sheet_names:
+        ano = _ano_do_nome(aba) or (_ano_do_nome(caminho.stem) if len(xlsx.sheet_names) == 1 else None)
+        if ano is None:
+            raise ErroValidacao(f"aba {aba!r}: nome sem o ano (esperado PEDE<ano>)")
+        df = dados.normalizar_aba(pd.read_excel(xlsx, sheet_name=aba), f'PEDE{ano}')
+        abas[ano] = pd.concat([abas[ano], df], ignore_index=True) if ano in abas else df
+    return abas
+
+
+def validar(df, ano):
+    """Confere um ano já normalizado contra o esquema harmonizado; levanta ErroValidacao"""
+    if df.empty:
+        raise ErroValidacao(f"{ano}: nenhuma linha")
+    df = dados.harmonizar_colunas(df)
+    faltantes = [c for c in COLUNAS_OBRIGATORIAS if c not in df.columns]
+    if faltantes:
+        raise ErroValidacao(f"{ano}: colunas ausentes: {', '.join(faltantes)}")
+    for col in COLUNAS_FLOAT64:
+        preenchidos = df[col].notna()
+        numeros = pd.to_numeric(df[col], errors='coerce')
+        invalidos = int((preenchidos & numeros.isna()).sum())
+        if invalidos:
+            raise ErroValidacao(f"{ano}: {invalidos} valor(es) não numérico(s) em {col}")
+        if col in COLUNAS_NOTA:
+            fora = int(((numeros < -TOLERANCIA_NOTA) | (numeros > 10 + TOLERANCIA_NOTA)).sum())
+            if fora:
+                raise ErroValidacao(f"{ano}: {fora} valor(es) de {col} fora do intervalo 0-10")
+    if df['RA'].isna().any():
+        raise ErroValidacao(f"{ano}: RA não pode ser vazio")
+
+
+# ==================== ESQUEMA DA BASE EM MEMÓRIA ====================
+
+CHAVE = ['RA', 'ANO_PEDE']
+
+
+def _chaves(df):
+    return pd.MultiIndex.from_arrays([df[c].astype(str).to_numpy() for c in CHAVE])
+
+
+def sem_repetidos(df):
+    """Uma linha por (RA, ano): a última que chegou prevalece"""
+    repetidas = _chaves(df).duplicated(keep='last')
+    return df[~repetidas].reset_index(drop=True) if repetidas.any() else df
+
+
+def conformar(novo, referencia):
+    """
+    Aplica ao trecho novo (já com `aplicar_esquema`) os tipos da base de
+    referência, acrescentando as categorias que ela não tem (ver `juntar`).
+    """
+    novo = novo.reindex(columns=list(referencia.columns) + [c for c in novo.columns if c not in referencia.columns])
+    ajustes = {}
+    for col in referencia.columns:
+        tipo = referencia[col].dtype
+        if isinstance(tipo, pd.CategoricalDtype):
+            valores = pd.Index(novo[col].dropna().astype(str).unique())
+            categorias = list(tipo.categories) + valores.difference(tipo.categories, sort=False).tolist()
+            if tipo.ordered:
+                categorias = sorted(categorias)
+            ajustes[col] = pd.Categorical(novo[col].astype('string'), categories=categorias, ordered=tipo.ordered)
+        elif pd.api.types.is_numeric_dtype(tipo):
+            ajustes[col] = pd.to_numeric(novo[col], errors='coerce').astype(tipo)
+        elif novo[col].dtype != tipo:
+            ajustes[col] = novo[col].astype(tipo)
+    return novo.assign(**ajustes)
+
+
+def juntar(partes):
+    """Concatena as partes da base unindo as categorias de cada coluna (sem virar `object`)"""
+    if len(partes) == 1:
+        return partes[0]
+    colunas = list(dict.fromkeys(c for parte in partes for c in parte.columns))
+    tipos = {}
+    for col in colunas:
+        dtypes = [parte[col].dtype for parte in partes if col in parte.columns]
+        if all(isinstance(t, pd.CategoricalDtype) for t in dtypes):
+            categorias = list(dict.fromkeys(c for t in dtypes for c in t.categories))
+            tipos[col] = pd.CategoricalDtype(sorted(categorias) if dtypes[0].ordered else categorias,
+                                             ordered=dtypes[0].ordered)
+    alinhadas = []
+    for parte in partes:
+        ajustes = {col: parte[col].astype(tipo) if col in parte.columns
+                   else pd.Categorical([None] * len(parte), dtype=tipo) for col, tipo in tipos.items()}
+        alinhadas.append(parte.reindex(columns=colunas).assign(**ajustes))
+    return pd.concat(alinhadas, ignore_index=True)
+
+
+# ==================== ARMAZÉM DE ARQUIVOS INGERIDOS ====================
+
+class Ingestor:
+    """Diretório observado + livro de arquivos ingeridos / rejeitados"""
+
+    def __init__(self, dir_novos, dir_cache):
+        self.dir_novos = pathlib.Path(dir_novos)
+        self.dir_cache = pathlib.Path(dir_cache)
+        self.livro = self._ler_livro()
+
+    @classmethod
+    def padrao(cls, planilha=None):
+        planilha = pathlib.Path(planilha) if planilha else dados.localizar_planilha()
+        if planilha is None:
+            return None
+        dir_novos = os.environ.get(VARIAVEL_DIR) or planilha.parent / 'novos'
+        return cls(dir_novos, planilha.parent / 'cache')
+
+    def _ler_livro(self):
+        try:
+            with open(self.dir_cache / NOME_LIVRO, encoding='utf-8') as f:
+                livro = json.load(f)
+            if livro.get('formato') == VERSAO_FORMATO:
+                return livro
+        except (OSError, ValueError):
+            pass
+        return {'formato': VERSAO_FORMATO, 'arquivos': [], 'rejeitados': []}
+
+    def _gravar_livro(self):
+        self.dir_cache.mkdir(parents=True, exist_ok=True)
+        tmp = self.dir_cache / (NOME_LIVRO + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.livro, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.dir_cache / NOME_LIVRO)
+
+    @contextlib.contextmanager
+    def _trava(self):
+        """Exclusão mútua entre processos ao ingerir (o livro é relido dentro da trava)"""
+        self.dir_cache.mkdir(parents=True, exist_ok=True)
+        with open(self.dir_cache / NOME_TRAVA, 'w') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                self.livro = self._ler_livro()
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def assinatura(self):
+        """(nome, tamanho, mtime) dos arquivos observados: muda quando algo chega ou é alterado"""
+        try:
+            entradas = [e for e in os.scandir(self.dir_novos)
+                        if e.is_file() and e.name.lower().endswith(EXTENSOES) and not e.name.startswith(('.', '~$'))]
+        except OSError:
+            return ()
+        return tuple(sorted((e.name, e.stat().st_size, e.stat().st_mtime_ns) for e in entradas))
+
+    def pendentes(self):
+        """Arquivos do diretório cujo conteúdo (SHA-256) ainda não foi ingerido nem rejeitado"""
+        conhecidos = {a['sha256'] for a in self.livro['arquivos'] + self.livro['rejeitados']}
+        pendentes = []
+        for nome, _, _ in self.assinatura():
+            caminho = self.dir_novos / nome
+            sha256 = dados.hash_arquivo(caminho)
+            if sha256 not in conhecidos:
+                pendentes.append((caminho, sha256))
+        return pendentes
+
+    def ingerir(self, caminho, sha256):
+        """Valida e grava um arquivo. Retorna {ano: DataFrame} ou levanta ErroValidacao"""
+        try:
+            anos = ler_novo(caminho)
+            for ano, df in anos.items():
+                validar(df, ano)
+        except ErroValidacao as e:
+            self._registrar_rejeitado(caminho, sha256, str(e))
+            raise
+        except Exception as e:
+            self._registrar_rejeitado(caminho, sha256, f"arquivo ilegível: {e}")
+            raise ErroValidacao(f"arquivo ilegível: {e}") from e
+
+        entradas = []
+        for ano, df in anos.items():
+            arquivo = None
+            if dados.feather is not None:
+                arquivo = f"{caminho.stem}-{sha256[:12]}-{ano}.arrow"
+                destino = self.dir_cache / 'novos' / arquivo
+                destino.parent.mkdir(parents=True, exist_ok=True)
+                tmp = destino.with_name(destino.name + '.tmp')
+                dados.feather.write_feather(df, tmp, compression='uncompressed')
+                os.replace(tmp, destino)
+            entradas.append({'ano': ano, 'arquivo': arquivo, 'linhas': len(df)})
+        self.livro['arquivos'].append({
+            'origem': caminho.name, 'sha256': sha256, 'anos': entradas,
+            'ingerido_em': datetime.datetime.now().isoformat(timespec='seconds'),
+        })
+        self._gravar_livro()
+        return anos
+
+    def _registrar_rejeitado(self, caminho, sha256, erro):
+        self.livro['rejeitados'].append({'origem': caminho.name, 'sha256': sha256, 'erro': erro})
+        self._gravar_livro()
+
+    def processar_pendentes(self):
+        """Ingere os pendentes. Retorna ([(sha256, ano, DataFrame)], [(arquivo, erro)])"""
+        novos, erros = [], []
+        with self._trava():
+            for caminho, sha256 in self.pendentes():
+                try:
+                    novos.extend((sha256, ano, df) for ano, df in self.ingerir(caminho, sha256).items())
+                except ErroValidacao as e:
+                    erros.append((caminho.name, str(e)))
+        return novos, erros
+
+    def carregar_ingeridos(self, excluir=()):
+        """Anos já ingeridos (exceto os arquivos em `excluir`), na ordem de chegada: [(sha256, ano, DataFrame)]"""
+        partes = []
+        for registro in self.livro['arquivos']:
+            if registro['sha256'] in excluir:
+                continue
+            for entrada in registro['anos']:
+                arrow = entrada['arquivo'] and self.dir_cache / 'novos' / entrada['arquivo']
+                if arrow and arrow.exists():
+                    df = dados.ler_ano(self.dir_cache / 'novos', entrada['arquivo'])
+                else:
+                    # Sem pyarrow (ou cache apagado): relê o arquivo de origem, se ainda existir
+                    origem = self.dir_novos / registro['origem']
+                    df = ler_novo(origem).get(entrada['ano']) if origem.exists() else None
+                if df is not None:
+                    partes.append((registro['sha256'], entrada['ano'], df))
+        return partes
+
+
+# ==================== BASE EM MEMÓRIA COM ACRÉSCIMOS ====================
+
+@dataclass(frozen=True, eq=False)
+class Estado:
+    """
+    Foto da base: as partes (planilha e trechos ingeridos, uma linha por RA e
+    ano) e os agregados por ano. `df` junta as partes na primeira vez que é
+    usado, uma vez por versão; `colunas` não precisa juntá-las.
+    """
+    versao: int
+    partes: tuple
+    agregados: ArmazemAgregados
+
+    @cached_property
+    def df(self):
+        return juntar(self.partes)
+
+    @property
+    def colunas(self):
+        return list(dict.fromkeys(c for parte in self.partes for c in parte.columns))
+
+
+class BaseIncremental:
+    """
+    Base tipada + agregados compartilhados entre sessões.
+
+    `atualizar()` é chamada a cada execução do script: no máximo a cada
+    INTERVALO_VERIFICACAO segundos confere a assinatura do diretório e, se algo
+    chegou, processa só os arquivos novos. O estado é trocado de uma vez, então
+    quem já leu `estado` continua com uma foto consistente.
+    """
+
+    def __init__(self, df, ingestor=None, incorporados=(), intervalo=INTERVALO_VERIFICACAO):
+        self.ingestor = ingestor
+        self.intervalo = intervalo
+        self.estado = Estado(0, (df,), ArmazemAgregados.da_base(df))
+        # SHA-256 dos arquivos ingeridos que já fazem parte de `estado`
+        self.incorporados = set(incorporados)
+        self.erros = []
+        self._lock = threading.Lock()
+        self._assinatura = ingestor.assinatura() if ingestor else ()
+        self._verificado = time.monotonic()
+
+    @classmethod
+    def carregar(cls, planilha=None, publicada=None, **kwargs):
+        """
+        Planilha (cache colunar) + arquivos já ingeridos + pendentes. None sem planilha.
+
+        `publicada` = (df, sha256 incluídos) de uma base já tipada e publicada por
+        `multiprocesso.py`: só o que foi ingerido depois da publicação é processado.
+        """
+        ingestor = Ingestor.padrao(planilha)
+        if publicada is not None:
+            df, incluidos = publicada
+            base = cls(df, ingestor, incluidos, **kwargs)
+            if ingestor is not None:
+                with base._lock:
+                    base._incorporar()
+            return base
+
+        historico = dados.carregar_base(planilha)
+        if historico is None:
+            return None
+        if ingestor is None:
+            return cls(aplicar_esquema(historico), None, **kwargs)
+        ingestor.processar_pendentes()
+        ingeridos = ingestor.carregar_ingeridos()
+        partes = [historico] + [df for _, _, df in ingeridos]
+        return cls(sem_repetidos(aplicar_esquema(pd.concat(partes, ignore_index=True))), ingestor,
+                   {sha256 for sha256, _, _ in ingeridos}, **kwargs)
+
+    @property
+    def rejeitados(self):
+        return self.ingestor.livro['rejeitados'] if self.ingestor else []
+
+    def atualizar(self, forcar=False):
+        """Incorpora arquivos novos do diretório observado. Retorna o estado atual"""
+        if self.ingestor is None:
+            return self.estado
+        agora = time.monotonic()
+        if not forcar and agora - self._verificado < self.intervalo:
+            return self.estado
+        # Outra sessão já está verificando: segue com o estado atual
+        if not self._lock.acquire(blocking=False):
+            return self.estado
+        try:
+            self._verificado = agora
+            assinatura = self.ingestor.assinatura()
+            if assinatura == self._assinatura:
+                return self.estado
+            self._assinatura = assinatura
+            return self._incorporar()
+        finally:
+            self._lock.release()
+
+    def _incorporar(self):
+        """Ingere os pendentes e acrescenta tudo do livro que ainda não está na base (chamar com o lock)"""
+        novos, erros = self.ingestor.processar_pendentes()
+        self.erros.extend(erros)
+        # Arquivos ingeridos por outro processo entram lidos do cache colunar
+        novos += self.ingestor.carregar_ingeridos(excluir=self.incorporados | {sha256 for sha256, _, _ in novos})
+        if novos:
+            self.estado = self._acrescentar(novos)
+            self.incorporados |= {sha256 for sha256, _, _ in novos}
+        return self.estado
+
+    def _acrescentar(self, novos):
+        """
+        Tipa só as linhas novas e as acrescenta como um trecho por ano. Linhas de
+        (RA, ano) que já estavam na base saem das partes que as tinham e o agregado
+        desses anos é recalculado; os demais anos só somam as linhas novas.
+        """
+        estado = self.estado
+        trecho = sem_repetidos(aplicar_esquema(pd.concat([df for _, _, df in novos], ignore_index=True)))
+        trecho = conformar(trecho, estado.partes[0])
+        chaves = _chaves(trecho)
+        anos_novos = set(trecho['ANO_PEDE'].astype(str).unique())
+
+        partes, substituidos = [], set()
+        for parte in estado.partes:
+            anos = parte['ANO_PEDE'].astype(str)
+            if not anos_novos.intersection(anos.unique()):
+                partes.append(parte)
+                continue
+            repetidas = _chaves(parte).isin(chaves)
+            if repetidas.any():
+                substituidos.update(anos[repetidas].unique())
+                parte = parte[~repetidas].reset_index(drop=True)
+            if len(parte):
+                partes.append(parte)
+
+        agregados = estado.agregados.copiar()
+        for ano, df_ano in trecho.groupby('ANO_PEDE', sort=True, observed=True):
+            df_ano = df_ano.reset_index(drop=True)
+            if str(ano) in substituidos:
+                anteriores = [p[p['ANO_PEDE'].astype(str) == str(ano)] for p in partes]
+                agregados.adicionar(ano, juntar([p for p in anteriores if len(p)] + [df_ano]))
+            else:
+                agregados.acumular(ano, df_ano)
+            partes.append(df_ano)
+        return Estado(estado.versao + 1, tuple(partes), agregados)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Ingestão incremental de novos anos PEDE')
+    parser.add_argument('--planilha', help='planilha PEDE (padrão: localizada automaticamente)')
+    args = parser.parse_args(argv)
+
+    ingestor = Ingestor.padrao(args.planilha)
+    if ingestor is None:
+        print("❌ Planilha PEDE não encontrada")
+        return 1
+    novos, erros = ingestor.processar_pendentes()
+    for _, ano, df in novos:
+        print(f"✅ {ano}: {len(df):,} linhas ingeridas")
+    for arquivo, erro in erros:
+        print(f"❌ {arquivo}: {erro}")
+    if not novos and not erros:
+        print(f"Nenhum arquivo pendente em {ingestor.dir_novos}")
+    return 1 if erros else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
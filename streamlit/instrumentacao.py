@@ -0,0 +1,248 @@
+"""
+Datathon FIAP - Passos Mágicos
+Instrumentação: spans de tempo, contadores de cache, linhas processadas e memória
+
+Registro em memória, thread-safe e barato o bastante para ficar sempre
+ligado (um lock e algumas somas por evento). As métricas são expostas no
+formato texto do Prometheus:
+    - pelo serviço HTTP em GET /metrics
+    - pelo app, gravadas periodicamente em arquivo quando
+      PASSOS_METRICAS_ARQUIVO está definida (ex.: coletor textfile do
+      node_exporter); intervalo em PASSOS_METRICAS_INTERVALO (s, padrão 15)
+
+Autor: Leandro Leme Crespo
+"""
+
+import collections
+import contextlib
+import functools
+import os
+import pathlib
+import threading
+import time
+
+VARIAVEL_ARQUIVO = 'PASSOS_METRICAS_ARQUIVO'
+VARIAVEL_INTERVALO = 'PASSOS_METRICAS_INTERVALO'
+INTERVALO_PADRAO = 15.0
+# Limites dos buckets dos histogramas de duração (segundos)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+DESCRICOES = {
+    'passos_span_segundos': 'Duração de trechos instrumentados',
+    'passos_http_segundos': 'Latência das requisições do serviço de predição',
+    'passos_cache_consultas_total': 'Chamadas a funções com cache',
+    'passos_cache_falhas_total': 'Chamadas que precisaram recalcular (cache miss)',
+    'passos_linhas_processadas_total': 'Linhas (alunos) processadas',
+    'passos_memoria_rss_bytes': 'Memória residente do processo',
+    'passos_tarefas': 'Tarefas de pontuação em segundo plano por estado',
+    'passos_deriva_linhas': 'Alunos pontuados comparados com a distribuição de treino',
+    'passos_deriva_psi': 'PSI de cada feature em relação ao treino',
+    'passos_deriva_ks': 'Estatística KS de cada feature numérica em relação ao treino',
+    'passos_deriva_categorias_novas': 'Alunos com categorias não vistas no treino',
+}
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _rotulos(rotulos, extra=None):
+    itens = list(rotulos) + ([extra] if extra else [])
+    if not itens:
+        return ''
+    return '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in itens) + '}'
+
+
+def _numero(valor):
+    valor = float(valor)
+    return str(int(valor)) if valor.is_integer() else repr(valor)
+
+
+def memoria_rss():
+    """Memória residente atual em bytes (Linux); máximo do processo nos demais sistemas"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        try:
+            import resource
+        except ImportError:
+            return None
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Metricas:
+    """Contadores, medidores e histogramas identificados por nome + rótulos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contadores = collections.defaultdict(float)
+        self._medidores = {}
+        self._histogramas = {}
+        self._coletores = []
+
+    @staticmethod
+    def _chave(nome, rotulos):
+        return nome, tuple(sorted(rotulos.items()))
+
+    def incrementar(self, nome, valor=1, **rotulos):
+        chave = self._chave(nome, rotulos)
+        with self._lock:
+            self._contadores[chave] += valor
+
+    def definir(self, nome, valor, **rotulos):
+        chave = self._chave(nome, rotulos)
+        with self._lock:
+            self._medidores[chave] = valor
+
+    def observar(self, nome, segundos, **rotulos):
+        chave = self._chave(nome, rotulos)
+        with self._lock:
+            hist = self._histogramas.get(chave)
+            if hist is None:
+                hist = self._histogramas[chave] = [[0] * len(BUCKETS), 0, 0.0]
+            for i, limite in enumerate(BUCKETS):
+                if segundos <= limite:
+                    hist[0][i] += 1
+                    break
+            hist[1] += 1
+            hist[2] += segundos
+
+    @contextlib.contextmanager
+    def span(self, nome, **rotulos):
+        """Mede a duração de um trecho: `with METRICAS.span('modelo'): ...`"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar('passos_span_segundos', time.perf_counter() - inicio, span=nome, **rotulos)
+
+    def registrar_coletor(self, nome, funcao):
+        """`funcao()` -> [(métrica, valor, {rótulos})], chamada a cada exportação (substitui pelo nome)"""
+        with self._lock:
+            self._coletores = [(n, f) for n, f in self._coletores if n != nome] + [(nome, funcao)]
+
+    def resumo(self):
+        """Cópia das séries: (contadores, medidores, histogramas)"""
+        with self._lock:
+            contadores = dict(self._contadores)
+            medidores = dict(self._medidores)
+            histogramas = {k: (list(h[0]), h[1], h[2]) for k, h in self._histogramas.items()}
+            coletores = list(self._coletores)
+        rss = memoria_rss()
+        if rss is not None:
+            medidores[('passos_memoria_rss_bytes', ())] = rss
+        for _, coletor in coletores:
+            try:
+                for nome, valor, rotulos in coletor():
+                    medidores[self._chave(nome, rotulos)] = valor
+            except Exception:
+                # Um coletor com defeito não pode derrubar a exportação
+                continue
+        return contadores, medidores, histogramas
+
+    def texto_prometheus(self):
+        contadores, medidores, histogramas = self.resumo()
+        linhas = []
+        tipos = {}
+
+        def cabecalho(nome, tipo):
+            if nome not in tipos:
+                tipos[nome] = tipo
+                if nome in DESCRICOES:
+                    linhas.append(f'# HELP {nome} {DESCRICOES[nome]}')
+                linhas.append(f'# TYPE {nome} {tipo}')
+
+        for (nome, rotulos), valor in sorted(contadores.items()):
+            cabecalho(nome, 'counter')
+            linhas.append(f'{nome}{_rotulos(rotulos)} {_numero(valor)}')
+        for (nome, rotulos), valor in sorted(medidores.items()):
+            cabecalho(nome, 'gauge')
+            linhas.append(f'{nome}{_rotulos(rotulos)} {_numero(valor)}')
+        for (nome, rotulos), (buckets, contagem, soma) in sorted(histogramas.items()):
+            cabecalho(nome, 'histogram')
+            acumulado = 0
+            for limite, n in zip(BUCKETS, buckets):
+                acumulado += n
+                linhas.append(f'{nome}_bucket{_rotulos(rotulos, ("le", f"{limite:g}"))} {acumulado}')
+            linhas.append(f'{nome}_bucket{_rotulos(rotulos, ("le", "+Inf"))} {contagem}')
+            linhas.append(f'{nome}_sum{_rotulos(rotulos)} {soma:.6f}')
+            linhas.append(f'{nome}_count{_rotulos(rotulos)} {contagem}')
+        return '\n'.join(linhas) + '\n'
+
+    def gravar(self, caminho):
+        """Grava o texto Prometheus de forma atômica (leitores nunca veem arquivo pela metade)"""
+        caminho = pathlib.Path(caminho)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        tmp = caminho.with_name(caminho.name + '.tmp')
+        tmp.write_text(self.texto_prometheus(), encoding='utf-8')
+        os.replace(tmp, caminho)
+
+
+METRICAS = Metricas()
+
+
+def cache_instrumentado(nome, decorador):
+    """
+    Aplica um decorador de cache (ex.: st.cache_resource) contando consultas e falhas.
+
+    O corpo da função só roda em uma falha; ele é medido como o span `nome`.
+    """
+    def aplicar(funcao):
+        @functools.wraps(funcao)
+        def calcular(*args, **kwargs):
+            METRICAS.incrementar('passos_cache_falhas_total', cache=nome)
+            with METRICAS.span(nome):
+                return funcao(*args, **kwargs)
+
+        em_cache = decorador(calcular)
+
+        @functools.wraps(funcao)
+        def consultar(*args, **kwargs):
+            METRICAS.incrementar('passos_cache_consultas_total', cache=nome)
+            return em_cache(*args, **kwargs)
+
+        if hasattr(em_cache, 'clear'):
+            consultar.clear = em_cache.clear
+        return consultar
+    return aplicar
+
+
+class Exportador(threading.Thread):
+    """Thread que grava as métricas em arquivo a cada `intervalo` segundos"""
+
+    def __init__(self, caminho, intervalo=INTERVALO_PADRAO, metricas=METRICAS):
+        super().__init__(name='exportador-metricas', daemon=True)
+        self.caminho = caminho
+        self.intervalo = intervalo
+        self.metricas = metricas
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.metricas.gravar(self.caminho)
+            except OSError:
+                continue
+
+    def parar(self):
+        self._parar.set()
+        self.metricas.gravar(self.caminho)
+
+
+_exportador = None
+_lock_exportador = threading.Lock()
+
+
+def iniciar_exportador():
+    """Inicia (uma vez por processo) o exportador em arquivo, se PASSOS_METRICAS_ARQUIVO estiver definida"""
+    global _exportador
+    caminho = os.environ.get(VARIAVEL_ARQUIVO)
+    if not caminho:
+        return None
+    with _lock_exportador:
+        if _exportador is None:
+            intervalo = float(os.environ.get(VARIAVEL_INTERVALO, INTERVALO_PADRAO))
+            _exportador = Exportador(caminho, intervalo)
+            _exportador.start()
+    return _exportador
@@ -0,0 +1,263 @@
+"""
+Datathon FIAP - Passos Mágicos
+Lista de alunos em risco (SQLite indexado)
+
+A base inteira é pontuada uma vez por (conteúdo da base, versão do modelo) e
+gravada em um arquivo SQLite ao lado do cache colunar, uma linha por aluno e
+ano: RA, nome, fase, turma, instituição, indicadores, probabilidade, nível de
+risco e os 3 fatores principais. Índices por ano, instituição e nível (com a
+probabilidade em seguida) atendem os filtros e a ordenação da página.
+
+Filtro, ordenação e paginação rodam no SQLite e a página recebe só as linhas
+que mostra. A paginação é por chave: a próxima página continua da última
+linha exibida (`(probabilidade, id) < (?, ?)`), sem OFFSET, então a página 40
+custa o mesmo que a primeira. O total de alunos do filtro é uma contagem
+separada, que a página guarda em cache.
+
+Uso pela linha de comando:
+    python lista_risco.py [ano] [nível]   # (re)constrói a lista e imprime a primeira página
+
+Autor: Leandro Leme Crespo
+"""
+
+import contextlib
+import datetime
+import hashlib
+import os
+import pathlib
+import sqlite3
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+import dados
+from agregados import INDICADORES
+from pontuacao import pontuar_lote
+from risco import NIVEIS
+
+NOME_BANCO = 'lista_risco.sqlite'
+# Muda quando as colunas ou os índices mudam (força a reconstrução)
+FORMATO = '1'
+TAMANHO_PAGINA = 50
+# Colunas de ordenação (nunca nulas, para a paginação por chave)
+ORDENACOES = ('probabilidade', 'ra')
+
+# Coluna no SQLite -> coluna da base (na ordem exibida)
+COLUNAS = {
+    'ra': 'RA', 'nome': 'NOME', 'ano': 'ANO_PEDE', 'fase': 'FASE', 'turma': 'TURMA',
+    'instituicao': 'INSTITUIÇÃO DE ENSINO', 'idade': 'IDADE',
+    **{c.lower(): c for c in INDICADORES}, 'ian': 'IAN', 'mat': 'MAT', 'por': 'POR', 'defasagem': 'DEFASAGEM',
+    'probabilidade': 'PROBABILIDADE_RISCO', 'nivel': 'NIVEL_RISCO', 'fatores': 'FATORES_PRINCIPAIS',
+}
+TEXTO = ('ra', 'nome', 'fase', 'turma', 'instituicao', 'nivel', 'fatores')
+
+ESQUEMA = f"""
+CREATE TABLE alunos (
+    id INTEGER PRIMARY KEY,
+    {', '.join(f"{c} {'TEXT' if c in TEXTO else 'INTEGER' if c == 'ano' else 'REAL'}" for c in COLUNAS)}
+);
+CREATE TABLE metadados (chave TEXT PRIMARY KEY, valor TEXT)
+"""
+INDICES = """
+CREATE INDEX alunos_ano ON alunos (ano, probabilidade, id);
+CREATE INDEX alunos_instituicao ON alunos (instituicao, probabilidade, id);
+CREATE INDEX alunos_nivel ON alunos (nivel, probabilidade, id);
+CREATE INDEX alunos_probabilidade ON alunos (probabilidade, id);
+CREATE INDEX alunos_ra ON alunos (ra, id);
+ANALYZE
+"""
+
+
+def assinatura_base(df):
+    """
+    SHA-256 do conteúdo da base (colunas e valores). O arquivo da lista
+    sobrevive ao processo, então a chave não pode ser a versão em memória da
+    `BaseIncremental`, que recomeça do zero a cada início do app.
+    """
+    h = hashlib.sha256(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    h.update('\x1f'.join(map(str, df.columns)).encode('utf-8'))
+    return h.hexdigest()
+
+
+@dataclass(frozen=True)
+class Filtros:
+    ano: int = None
+    instituicoes: tuple = ()
+    niveis: tuple = ()
+    probabilidade_minima: float = 0.0
+    ra: str = ''    # prefixo do RA
+
+    def sql(self):
+        """Cláusula WHERE (sem a palavra) e parâmetros"""
+        condicoes, parametros = ['probabilidade >= ?'], [float(self.probabilidade_minima)]
+        if self.ano is not None:
+            condicoes.append('ano = ?')
+            parametros.append(int(self.ano))
+        for coluna, valores in [('instituicao', self.instituicoes), ('nivel', self.niveis)]:
+            if valores:
+                condicoes.append(f"{coluna} IN ({', '.join('?' * len(valores))})")
+                parametros.extend(valores)
+        if self.ra:
+            # Intervalo em vez de LIKE: usa o índice alunos_ra
+            condicoes.append('ra >= ? AND ra < ?')
+            parametros.extend([self.ra, self.ra + '\U0010ffff'])
+        return ' AND '.join(condicoes), parametros
+
+
+@dataclass(frozen=True)
+class Pagina:
+    linhas: pd.DataFrame
+    proxima: tuple          # cursor da página seguinte (None na última)
+
+
+class ListaRisco:
+    """Arquivo SQLite com a base pontuada; cada consulta abre uma conexão somente leitura"""
+
+    def __init__(self, banco):
+        self.banco = pathlib.Path(banco)
+
+    @classmethod
+    def padrao(cls, planilha=None):
+        """Lista em data/cache (ao lado do cache colunar da base)"""
+        planilha = pathlib.Path(planilha) if planilha else dados.localizar_planilha()
+        raiz = planilha.parent if planilha else pathlib.Path(__file__).parent
+        return cls(raiz / 'cache' / NOME_BANCO)
+
+    @contextlib.contextmanager
+    def _conexao(self):
+        con = sqlite3.connect(f'file:{self.banco}?mode=ro', uri=True)
+        try:
+            yield con
+        finally:
+            con.close()
+
+    def metadados(self):
+        """{chave: valor} da lista gravada; {} se ainda não existe"""
+        if not self.banco.exists():
+            return {}
+        try:
+            with self._conexao() as con:
+                return dict(con.execute('SELECT chave, valor FROM metadados'))
+        except sqlite3.DatabaseError:
+            return {}
+
+    def atualizar(self, df, modelo, scaler, le_dict, info, explicador=None, assinatura=None):
+        """
+        Reconstrói a lista se a base ou o modelo mudaram. Retorna True se reconstruiu.
+        `assinatura` = `assinatura_base(df)`, quando já calculada.
+        """
+        assinatura = assinatura or assinatura_base(df)
+        versao_modelo = str(info.get('versao', 'legado'))
+        atual = self.metadados()
+        if (atual.get('formato'), atual.get('assinatura_base'), atual.get('versao_modelo')) == \
+                (FORMATO, assinatura, versao_modelo):
+            return False
+
+        resultado, estatisticas = pontuar_lote(df, modelo, scaler, le_dict, info, explicador=explicador,
+                                               monitorar=False)
+        resultado = resultado[resultado['PROBABILIDADE_RISCO'].notna()]
+        if 'NOME ANONIMIZADO' in resultado.columns:
+            # A partir de 2023 o nome vem na coluna NOME ANONIMIZADO
+            nome = resultado['NOME'].astype(object) if 'NOME' in resultado.columns else None
+            anonimizado = resultado['NOME ANONIMIZADO'].astype(object)
+            resultado = resultado.assign(NOME=anonimizado if nome is None else nome.where(nome.notna(), anonimizado))
+        tabela = pd.DataFrame(index=resultado.index)
+        for coluna, origem in COLUNAS.items():
+            valores = resultado[origem] if origem in resultado.columns else pd.Series(np.nan, index=resultado.index)
+            if coluna in TEXTO:
+                tabela[coluna] = valores.astype(object).where(valores.notna(), None).map(
+                    lambda v: None if v is None else str(v))
+            else:
+                tabela[coluna] = pd.to_numeric(valores.astype(object), errors='coerce').astype(float)
+        linhas = list(tabela.astype(object).where(tabela.notna(), None).itertuples(index=False, name=None))
+
+        # Grava em um arquivo temporário e troca de uma vez: quem está lendo não vê a lista pela metade
+        self.banco.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.banco.with_name(f'.{self.banco.name}.{os.getpid()}.tmp')
+        tmp.unlink(missing_ok=True)
+        con = sqlite3.connect(tmp)
+        try:
+            con.executescript(ESQUEMA)
+            with con:
+                con.executemany(f"INSERT INTO alunos ({', '.join(COLUNAS)}) VALUES ({', '.join('?' * len(COLUNAS))})",
+                                linhas)
+                con.executemany('INSERT INTO metadados VALUES (?, ?)', [
+                    ('formato', FORMATO), ('assinatura_base', assinatura), ('versao_modelo', versao_modelo),
+                    ('linhas_base', str(estatisticas['linhas'])), ('linhas', str(len(linhas))),
+                    ('criada_em', datetime.datetime.now().isoformat(timespec='seconds')),
+                ])
+            con.executescript(INDICES)
+        finally:
+            con.close()
+        os.replace(tmp, self.banco)
+        return True
+
+    def opcoes(self):
+        """Anos e instituições presentes (para os filtros)"""
+        with self._conexao() as con:
+            anos = [int(a) for (a,) in con.execute('SELECT DISTINCT ano FROM alunos ORDER BY ano')]
+            instituicoes = [i for (i,) in con.execute(
+                'SELECT DISTINCT instituicao FROM alunos WHERE instituicao IS NOT NULL ORDER BY instituicao')]
+        return anos, instituicoes
+
+    def contar_por_nivel(self, filtros):
+        """Alunos do filtro por nível de risco, na ordem dos níveis"""
+        where, parametros = filtros.sql()
+        with self._conexao() as con:
+            contagem = dict(con.execute(f'SELECT nivel, COUNT(*) FROM alunos WHERE {where} GROUP BY nivel',
+                                        parametros))
+        return {nivel: contagem.get(nivel, 0) for nivel in NIVEIS}
+
+    def pagina(self, filtros, ordem='probabilidade', decrescente=True, tamanho=TAMANHO_PAGINA, apos=None):
+        """
+        Até `tamanho` alunos do filtro, na ordem pedida, a partir do cursor
+        `apos` (o `proxima` da página anterior; None para a primeira).
+        """
+        if ordem not in ORDENACOES:
+            raise ValueError(f"ordenação inválida: {ordem}")
+        where, parametros = filtros.sql()
+        sentido, comparacao = ('DESC', '<') if decrescente else ('ASC', '>')
+        if apos is not None:
+            where += f' AND ({ordem}, id) {comparacao} (?, ?)'
+            parametros = parametros + list(apos)
+        consulta = (f"SELECT id, {', '.join(COLUNAS)} FROM alunos WHERE {where} "
+                    f"ORDER BY {ordem} {sentido}, id {sentido} LIMIT ?")
+        with self._conexao() as con:
+            registros = con.execute(consulta, parametros + [tamanho + 1]).fetchall()
+
+        linhas = pd.DataFrame(registros[:tamanho], columns=['id'] + list(COLUNAS))
+        proxima = None
+        if len(registros) > tamanho:
+            ultimo = registros[tamanho - 1]
+            proxima = (ultimo[1 + list(COLUNAS).index(ordem)], ultimo[0])
+        linhas = linhas.drop(columns='id').rename(columns=COLUNAS)
+        linhas['ANO_PEDE'] = linhas['ANO_PEDE'].astype(int)
+        return Pagina(linhas, proxima)
+
+
+def main(argv):
+    from pontuacao import carregar_modelo
+    from explicacao import explicador_para
+    from ingestao import BaseIncremental
+
+    base = BaseIncremental.carregar()
+    if base is None:
+        print('❌ Planilha PEDE não encontrada')
+        return 1
+    estado = base.atualizar()
+    modelo, scaler, le_dict, info = carregar_modelo()
+    lista = ListaRisco.padrao()
+    if lista.atualizar(estado.df, modelo, scaler, le_dict, info, explicador_para(modelo)):
+        print(f"✅ Lista reconstruída: {lista.metadados()['linhas']} alunos pontuados em {lista.banco}")
+    filtros = Filtros(ano=int(argv[1]) if len(argv) > 1 else None, niveis=tuple(argv[2:3]))
+    print(lista.contar_por_nivel(filtros))
+    with pd.option_context('display.width', 200, 'display.max_columns', 10):
+        print(lista.pagina(filtros, tamanho=20).linhas[['RA', 'NOME', 'ANO_PEDE', 'INSTITUIÇÃO DE ENSINO',
+                                                        'PROBABILIDADE_RISCO', 'NIVEL_RISCO']])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,260 @@
+"""
+Datathon FIAP - Passos Mágicos
+Inferência compacta do Gradient Boosting em NumPy puro
+
+O ensemble treinado e o StandardScaler são exportados para arrays NumPy
+(features e limiares dos nós, valores das folhas, média e escala). Cada árvore
+é completada até uma árvore binária cheia de profundidade `max_depth`, de modo
+que a travessia vira aritmética de índices vetorizada sobre (alunos x árvores),
+sem importar scikit-learn no momento de servir.
+
+Os arrays são persistidos no pacote versionado (ver `pacote_modelo.py`).
+
+Uso pela linha de comando:
+    python modelo_compacto.py verificar    # compara o pacote ativo com o modelo pickle (requer sklearn)
+    python modelo_compacto.py benchmark    # latência por tamanho de lote (1, 100, 10k)
+
+A paridade nos alunos da base também roda em `pytest tests/test_modelo_compacto.py`.
+
+Autor: Leandro Leme Crespo
+"""
+
+import sys
+import time
+
+import numpy as np
+
+TOLERANCIA_PARIDADE = 1e-12
+TAMANHO_BLOCO = 1024
+
+
+def _completar_arvore(arvore, profundidade):
+    """Converte uma árvore sklearn para o layout de árvore binária cheia (ordem de heap)"""
+    n_internos = 2 ** profundidade - 1
+    feature = np.zeros(n_internos, dtype=np.int64)
+    limiar = np.full(n_internos, np.inf)
+    folha = np.zeros(2 ** profundidade)
+    cobertura = np.zeros(2 ** profundidade)
+
+    def preencher(no, pos, nivel, alcancavel=True):
+        if nivel == profundidade:
+            folha[pos - n_internos] = arvore.value[no, 0, 0]
+            # Amostras de treino que chegam à folha (só a cópia alcançável de uma folha completada)
+            cobertura[pos - n_internos] = arvore.weighted_n_node_samples[no] if alcancavel else 0.0
+            return
+        filho_esq, filho_dir = arvore.children_left[no], arvore.children_right[no]
+        if filho_esq == -1:
+            # Folha antes da profundidade máxima: limiar infinito sempre desce à esquerda
+            preencher(no, 2 * pos + 1, nivel + 1, alcancavel)
+            preencher(no, 2 * pos + 2, nivel + 1, False)
+        else:
+            feature[pos] = arvore.feature[no]
+            limiar[pos] = arvore.threshold[no]
+            preencher(filho_esq, 2 * pos + 1, nivel + 1, alcancavel)
+            preencher(filho_dir, 2 * pos + 2, nivel + 1, alcancavel)
+
+    preencher(0, 0, 0)
+    return feature, limiar, folha, cobertura
+
+
+def exportar_modelo(modelo, scaler=None):
+    """Achata o GradientBoostingClassifier (binário) e o StandardScaler em arrays NumPy"""
+    arvores = [est[0].tree_ for est in modelo.estimators_]
+    profundidade = max(a.max_depth for a in arvores)
+    nos = [_completar_arvore(a, profundidade) for a in arvores]
+
+    # Valor inicial (log-odds da classe positiva), calculado como no sklearn
+    from scipy.special import logit
+    eps = np.finfo(np.float32).eps
+    prior = np.clip(modelo.init_.predict_proba(np.zeros((1, modelo.n_features_in_)))[0, 1], eps, 1 - eps)
+    arrays = {
+        'feature': np.stack([n[0] for n in nos]),
+        'limiar': np.stack([n[1] for n in nos]),
+        'folha': np.stack([n[2] for n in nos]),
+        'cobertura': np.stack([n[3] for n in nos]),
+        'valor_inicial': np.array(logit(prior)),
+        'taxa_aprendizado': np.array(modelo.learning_rate),
+    }
+    if scaler is not None:
+        arrays['media'] = np.asarray(scaler.mean_, dtype=float)
+        arrays['escala'] = np.asarray(scaler.scale_, dtype=float)
+    return arrays
+
+
+class EscalonadorCompacto:
+    """Equivalente ao StandardScaler.transform"""
+
+    def __init__(self, media, escala):
+        self.mean_ = media
+        self.scale_ = escala
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=float) - self.mean_) / self.scale_
+
+
+class CodificadorCompacto:
+    """Equivalente ao LabelEncoder.transform (classes ordenadas)"""
+
+    def __init__(self, classes):
+        self.classes_ = classes
+
+    def transform(self, valores):
+        valores = np.asarray(valores).astype(str)
+        codigos = np.searchsorted(self.classes_, valores)
+        codigos = np.minimum(codigos, len(self.classes_) - 1)
+        if not np.all(self.classes_[codigos] == valores):
+            raise ValueError(f"y contains previously unseen labels: {valores[self.classes_[codigos] != valores]}")
+        return codigos
+
+
+class ModeloCompacto:
+    """Avaliador vetorizado do ensemble; `predict_proba` recebe X já normalizado"""
+
+    def __init__(self, feature, limiar, folha, valor_inicial, taxa_aprendizado, cobertura=None):
+        self.n_arvores, n_internos = feature.shape
+        self.profundidade = int(np.log2(n_internos + 1))
+        # Tabelas achatadas: nó global = árvore * n_internos + nó local
+        self.feature = feature.ravel()
+        self.limiar = limiar.ravel()
+        self.folha = folha
+        # Amostras de treino por folha (opcional; usada nas explicações locais)
+        self.cobertura = cobertura
+        self.valor_inicial = float(valor_inicial)
+        self.taxa_aprendizado = float(taxa_aprendizado)
+        self.classes_ = np.array([0, 1])
+        self._base = np.arange(self.n_arvores) * n_internos
+
+    def indices_folhas(self, X):
+        """Índice da folha alcançada em cada árvore: array (n_alunos, n_arvores)"""
+        # As árvores do sklearn comparam em float32
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        n, n_features = X.shape
+        folhas = np.empty((n, self.n_arvores), dtype=np.int64)
+        # Blocos de linhas mantêm os arrays intermediários no cache do processador
+        for i in range(0, n, TAMANHO_BLOCO):
+            bloco = X[i:i + TAMANHO_BLOCO]
+            valores = bloco.ravel()
+            linhas = (np.arange(len(bloco)) * n_features)[:, None]
+            no = np.zeros((len(bloco), self.n_arvores), dtype=np.int64)
+            for _ in range(self.profundidade):
+                global_ = self._base + no
+                x = np.take(valores, linhas + np.take(self.feature, global_))
+                no = 2 * no + 1 + (x > np.take(self.limiar, global_))
+            folhas[i:i + TAMANHO_BLOCO] = no - (2 ** self.profundidade - 1)
+        return folhas
+
+    def decision_function(self, X):
+        folhas = self.indices_folhas(X)
+        contribuicoes = self.taxa_aprendizado * self.folha[np.arange(self.n_arvores), folhas]
+        # Soma sequencial a partir do valor inicial, na mesma ordem do sklearn
+        bruto = np.concatenate([np.full((len(folhas), 1), self.valor_inicial), contribuicoes], axis=1)
+        return np.cumsum(bruto, axis=1)[:, -1]
+
+    def predict_proba(self, X):
+        p = 1.0 / (1.0 + np.exp(-self.decision_function(X)))
+        return np.column_stack([1 - p, p])
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(int)
+
+
+def _carregar_ativo():
+    from pacote_modelo import RegistroModelos
+
+    pacote = RegistroModelos().atual()
+    if pacote is None:
+        raise FileNotFoundError("nenhum pacote de modelo publicado (execute pacote_modelo.py criar)")
+    return pacote.modelo, pacote.escalonador
+
+
+def _matriz_referencia(n, semente=42):
+    """Alunos sintéticos cobrindo os intervalos dos controles do app"""
+    rng = np.random.default_rng(semente)
+    X = rng.uniform(0, 10, size=(n, 11))
+    X[:, 5] = rng.integers(6, 26, n)           # IDADE
+    X[:, 6] = rng.integers(2015, 2026, n)      # ANO INGRESSO
+    X[:, 9] = rng.integers(0, 4, n)            # GÊNERO_ENC
+    X[:, 10] = rng.integers(0, 13, n)          # INSTITUIÇÃO DE ENSINO_ENC
+    return X
+
+
+def _matriz_base(le_dict, info):
+    """Features dos alunos da base PEDE (None se a planilha não for encontrada)"""
+    import dados
+    from esquema import aplicar_esquema
+    from pontuacao import preparar_matriz
+    from risco import TabelaCodificacao
+
+    base = dados.carregar_base()
+    if base is None:
+        return None
+    X, _, _ = preparar_matriz(aplicar_esquema(base), TabelaCodificacao(le_dict), info)
+    return X
+
+
+def verificar_paridade(n=10_000):
+    """
+    Compara as probabilidades do pacote ativo com o modelo pickle nos alunos
+    da base mais `n` alunos sintéticos. Retorna a maior diferença.
+    """
+    from pontuacao import carregar_artefatos
+
+    modelo_sk, scaler_sk, le_dict, info = carregar_artefatos()
+    modelo, escalonador = _carregar_ativo()
+    X = _matriz_referencia(n)
+    base = _matriz_base(le_dict, info)
+    if base is not None:
+        X = np.vstack([base, X])
+    p_sk = modelo_sk.predict_proba(scaler_sk.transform(X))
+    p = modelo.predict_proba(escalonador.transform(X))
+    return float(np.abs(p_sk - p).max())
+
+
+def benchmark(tamanhos=(1, 100, 10_000), repeticoes=50):
+    """
+    Latência média (ms) por chamada de transform + predict_proba, compacto vs
+    sklearn. Sem scikit-learn ou sem os pickles, mede só o compacto.
+    """
+    modelo, escalonador = _carregar_ativo()
+    candidatos = {'compacto': (modelo, escalonador)}
+    try:
+        from pontuacao import carregar_artefatos
+        modelo_sk, scaler_sk, _, _ = carregar_artefatos()
+        candidatos['sklearn'] = (modelo_sk, scaler_sk)
+    except (ImportError, FileNotFoundError):
+        pass
+
+    resultados = {}
+    for nome, (m, s) in candidatos.items():
+        for tamanho in tamanhos:
+            X = _matriz_referencia(tamanho)
+            reps = max(3, repeticoes * 100 // max(tamanho, 100))
+            m.predict_proba(s.transform(X))
+            inicio = time.perf_counter()
+            for _ in range(reps):
+                m.predict_proba(s.transform(X))
+            resultados[(nome, tamanho)] = (time.perf_counter() - inicio) / reps * 1000
+    return resultados
+
+
+def main(argv):
+    comando = argv[1] if len(argv) > 1 else None
+    if comando == 'verificar':
+        diferenca = verificar_paridade()
+        ok = diferenca <= TOLERANCIA_PARIDADE
+        print(f"{'✅' if ok else '❌'} Maior diferença de probabilidade: {diferenca:.2e}")
+        return 0 if ok else 1
+    elif comando == 'benchmark':
+        resultados = benchmark()
+        for (nome, tamanho), ms in resultados.items():
+            print(f"  {nome:10s} lote={tamanho:6d}  {ms:9.3f} ms/chamada  {tamanho / ms * 1000:12,.0f} linhas/s")
+        if not any(nome == 'sklearn' for nome, _ in resultados):
+            print("⚠️ Referência sklearn não medida (scikit-learn ou pickles do modelo ausentes)")
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,187 @@
+"""
+Datathon FIAP - Passos Mágicos
+Modo multiprocesso: N workers Streamlit com base e modelo compartilhados
+
+Sem este modo, cada processo atrás do balanceador lê o cache da planilha,
+aplica o esquema e guarda a sua cópia da base (e, sem pacote, faz o unpickle
+do modelo). Aqui o launcher:
+    1. publica a base tipada uma vez (`compartilhado.py`, memory-map)
+    2. confere que há um pacote de modelo ativo (arrays .npy memory-mapped)
+    3. inicia N processos `streamlit run app.py` em portas consecutivas com
+       PASSOS_BASE_COMPARTILHADA apontando para a publicação
+
+O balanceador deve usar afinidade de sessão (o Streamlit mantém a sessão no
+websocket de um worker). Arquivos novos em data/novos continuam sendo
+incorporados por cada worker; `publicar` de novo leva-os para a base
+compartilhada dos workers iniciados depois.
+
+Uso:
+    python multiprocesso.py publicar
+    python multiprocesso.py iniciar --workers 4 --porta 8501    # portas 8501..8504
+    python multiprocesso.py medir --workers 4                   # memória por worker: independente x compartilhado
+
+Autor: Leandro Leme Crespo
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import signal
+import subprocess
+import sys
+import time
+import warnings
+
+import compartilhado
+from ingestao import BaseIncremental
+from pacote_modelo import RegistroModelos
+
+APP = pathlib.Path(__file__).parent / 'app.py'
+PAGINAS = sorted(f"paginas/{p.name}" for p in (APP.parent / 'paginas').glob('*.py'))
+
+
+def publicar(diretorio=None, planilha=None):
+    """Monta a base tipada (planilha + ingeridos) e publica. Retorna (diretório, manifesto)"""
+    diretorio = pathlib.Path(diretorio) if diretorio else compartilhado.diretorio_padrao(planilha)
+    if diretorio is None:
+        raise FileNotFoundError("planilha PEDE não encontrada")
+    base = BaseIncremental.carregar(planilha)
+    manifesto = compartilhado.publicar_base(base.estado.df, diretorio, base.incorporados)
+    return diretorio, manifesto
+
+
+def _ambiente(diretorio):
+    return {**os.environ, compartilhado.VARIAVEL: str(pathlib.Path(diretorio).resolve())}
+
+
+def iniciar(workers, porta, diretorio=None, endereco='0.0.0.0'):
+    diretorio, manifesto = publicar(diretorio)
+    print(f"✅ Base publicada em {diretorio}: {manifesto['linhas']:,} linhas, {manifesto['bytes'] / 1e6:.1f} MB")
+    if RegistroModelos().atual() is None:
+        print("⚠️ Sem pacote de modelo ativo: cada worker fará o unpickle do modelo "
+              "(crie um com `python pacote_modelo.py criar`)")
+
+    processos = []
+    for i in range(workers):
+        comando = [sys.executable, '-m', 'streamlit', 'run', str(APP),
+                   '--server.port', str(porta + i), '--server.address', endereco,
+                   '--server.headless', 'true']
+        processos.append(subprocess.Popen(comando, env=_ambiente(diretorio)))
+        print(f"🚀 worker {i + 1}: http://{endereco}:{porta + i} (pid {processos[-1].pid})")
+
+    def encerrar(*_):
+        for processo in processos:
+            processo.terminate()
+    signal.signal(signal.SIGTERM, encerrar)
+    try:
+        for processo in processos:
+            processo.wait()
+    except KeyboardInterrupt:
+        encerrar()
+        for processo in processos:
+            processo.wait()
+    return 0
+
+
+# ==================== MEDIÇÃO ====================
+
+def _worker_medicao():
+    """Processo filho: abre todas as páginas via AppTest, avisa e espera o pai pedir a medição"""
+    warnings.filterwarnings('ignore')
+    from streamlit.testing.v1 import AppTest
+    inicio = time.perf_counter()
+    at = AppTest.from_file(str(APP), default_timeout=120)
+    at.run()
+    partida_ms = (time.perf_counter() - inicio) * 1000
+    for pagina in PAGINAS:
+        at.switch_page(pagina).run()
+    falhas = [str(e.value) for e in at.exception]
+    print('pronto', flush=True)
+    sys.stdin.readline()
+    print(json.dumps({**compartilhado.memoria_processo(), 'partida_ms': partida_ms, 'falhas': falhas}),
+          flush=True)
+    sys.stdin.readline()
+    return 0
+
+
+def _medir_modo(workers, ambiente):
+    filhos = [subprocess.Popen([sys.executable, __file__, '_worker-medicao'], env=ambiente,
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+                               stderr=subprocess.DEVNULL, cwd=APP.parent)
+              for _ in range(workers)]
+    try:
+        # Mede só com todos os workers carregados: o PSS divide as páginas compartilhadas
+        for filho in filhos:
+            if filho.stdout.readline().strip() != 'pronto':
+                raise RuntimeError("um worker de medição falhou na partida")
+        medidas = []
+        for filho in filhos:
+            filho.stdin.write('medir\n')
+            filho.stdin.flush()
+            medidas.append(json.loads(filho.stdout.readline()))
+    finally:
+        for filho in filhos:
+            try:
+                filho.stdin.close()
+            except OSError:
+                pass
+            filho.wait()
+    return medidas
+
+
+def medir(workers):
+    """Memória e partida por worker, com cada worker carregando a sua base x base publicada"""
+    diretorio, _ = publicar()
+    ambiente_independente = {k: v for k, v in os.environ.items() if k != compartilhado.VARIAVEL}
+    resultado = {}
+    for modo, ambiente in (('independente', ambiente_independente),
+                           ('compartilhado', _ambiente(diretorio))):
+        medidas = _medir_modo(workers, ambiente)
+        falhas = [f for m in medidas for f in m['falhas']]
+        if falhas:
+            raise RuntimeError(f"falhas no modo {modo}: {falhas}")
+        resultado[modo] = {
+            chave: sum(m[chave] for m in medidas) / len(medidas)
+            for chave in ('rss_mb', 'pss_mb', 'compartilhada_mb', 'partida_ms') if medidas[0][chave] is not None
+        }
+        resultado[modo]['workers'] = workers
+    return resultado
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == '_worker-medicao':
+        return _worker_medicao()
+
+    parser = argparse.ArgumentParser(description='Workers Streamlit com base e modelo compartilhados')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    p_publicar = sub.add_parser('publicar', help='publica a base tipada para os workers')
+    p_publicar.add_argument('--dir', help='diretório da publicação (padrão: data/cache/compartilhado)')
+    p_iniciar = sub.add_parser('iniciar', help='publica e inicia N workers')
+    p_iniciar.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    p_iniciar.add_argument('--porta', type=int, default=8501, help='porta do primeiro worker')
+    p_iniciar.add_argument('--endereco', default='0.0.0.0')
+    p_iniciar.add_argument('--dir', help='diretório da publicação')
+    p_medir = sub.add_parser('medir', help='memória por worker: independente x compartilhado')
+    p_medir.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args(argv)
+
+    if args.comando == 'publicar':
+        diretorio, manifesto = publicar(args.dir)
+        print(f"✅ {manifesto['linhas']:,} linhas ({manifesto['bytes'] / 1e6:.1f} MB) publicadas em {diretorio}")
+        return 0
+    if args.comando == 'iniciar':
+        return iniciar(args.workers, args.porta, args.dir, args.endereco)
+
+    resultado = medir(args.workers)
+    print(f"{'modo':15s} {'RSS (MB)':>10s} {'PSS (MB)':>10s} {'compart. (MB)':>14s} {'partida (ms)':>13s}")
+    for modo, m in resultado.items():
+        print(f"{modo:15s} {m.get('rss_mb', 0):10.1f} {m.get('pss_mb', 0):10.1f} "
+              f"{m.get('compartilhada_mb', 0):14.1f} {m.get('partida_ms', 0):13.0f}")
+    print(f"(média por worker, {args.workers} workers simultâneos)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
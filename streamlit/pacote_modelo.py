@@ -0,0 +1,288 @@
+"""
+Datathon FIAP - Passos Mágicos
+Pacote versionado do modelo
+
+Substitui os quatro pickles soltos por um diretório versionado:
+
+    modelos/
+    ├── ATUAL                  # nome da versão ativa (trocado de forma atômica)
+    └── <versao>/
+        ├── manifesto.json     # features, versão do sklearn, métricas, categorias e checksums
+        └── *.npy              # arrays numéricos (abertos via memory-map)
+
+Nenhum pickle é carregado: o modelo é servido pelo avaliador de
+`modelo_compacto`. O `RegistroModelos` verifica o arquivo ATUAL a cada acesso
+e troca o pacote em memória quando uma nova versão é publicada, sem reiniciar
+o app. Como os arrays são memory-mapped, processos diferentes compartilham as
+mesmas páginas do sistema operacional.
+
+Uso pela linha de comando:
+    python pacote_modelo.py criar [versao]   # empacota os .pkl atuais e ativa a versão
+    python pacote_modelo.py ativar <versao>  # troca a versão ativa
+    python pacote_modelo.py listar
+
+Autor: Leandro Leme Crespo
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import sys
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from modelo_compacto import CodificadorCompacto, EscalonadorCompacto, ModeloCompacto, exportar_modelo
+
+DIR_MODELOS = pathlib.Path(__file__).parent / 'modelos'
+ARQUIVO_ATUAL = 'ATUAL'
+NOME_MANIFESTO = 'manifesto.json'
+VERSAO_FORMATO = 1
+
+# Arrays numéricos gravados como .npy; os demais itens vão para o manifesto
+ARRAYS_NUMERICOS = ['feature', 'limiar', 'folha', 'media', 'escala']
+# Arrays opcionais: pacotes antigos podem não tê-los
+ARRAYS_OPCIONAIS = ['cobertura']
+METRICAS = ['accuracy', 'auc_roc', 'f1_score', 'cv_accuracy_mean', 'cv_accuracy_std',
+            'cv_auc_mean', 'cv_auc_std', 'cv_f1_mean', 'optimal_threshold',
+            'n_registros_treino', 'n_registros_teste', 'n_registros_total']
+
+
+class ErroPacote(Exception):
+    """Pacote de modelo inválido ou inconsistente"""
+
+
+@dataclass(frozen=True)
+class Pacote:
+    versao: str
+    modelo: ModeloCompacto
+    escalonador: EscalonadorCompacto
+    codificadores: dict
+    info: dict
+    manifesto: dict
+
+
+def _sha256(caminho):
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _python(valor):
+    """Converte escalares NumPy para tipos nativos (JSON)"""
+    return valor.item() if isinstance(valor, np.generic) else valor
+
+
+def _versao_sklearn():
+    try:
+        import sklearn
+    except ImportError:
+        return None
+    return sklearn.__version__
+
+
+def ler_features(caminho):
+    """Lê a ordem das features do features.txt"""
+    with open(caminho, encoding='utf-8') as f:
+        return [c.strip() for c in f.read().strip().split(',')]
+
+
+def criar_pacote(modelo, scaler, le_dict, info, dir_modelos=DIR_MODELOS, versao=None,
+                 features=None, ativar=True):
+    """
+    Grava um novo pacote versionado a partir dos objetos treinados.
+
+    `features` é a ordem do features.txt; levanta ErroPacote se ela, os
+    metadados, o scaler e o modelo não forem consistentes entre si.
+    """
+    features = list(features or info['features'])
+    if features != list(info['features']):
+        raise ErroPacote(f"features.txt ({features}) difere de modelo_info ({info['features']})")
+    for nome, n in [('modelo', modelo.n_features_in_), ('scaler', scaler.n_features_in_)]:
+        if n != len(features):
+            raise ErroPacote(f"{nome} espera {n} features, mas há {len(features)} no features.txt")
+
+    dir_modelos = pathlib.Path(dir_modelos)
+    versao = versao or datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%d-%H%M%S')
+    destino = dir_modelos / versao
+    if destino.exists():
+        raise ErroPacote(f"a versão {versao} já existe")
+
+    arrays = exportar_modelo(modelo, scaler)
+    tmp = dir_modelos / f'.tmp-{versao}'
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    checksums = {}
+    for nome in ARRAYS_NUMERICOS + ARRAYS_OPCIONAIS:
+        np.save(tmp / f'{nome}.npy', np.ascontiguousarray(arrays[nome]), allow_pickle=False)
+        checksums[f'{nome}.npy'] = _sha256(tmp / f'{nome}.npy')
+
+    manifesto = {
+        'formato': VERSAO_FORMATO,
+        'versao': versao,
+        'criado_em': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'sklearn_version': _versao_sklearn(),
+        'modelo_nome': info['modelo_nome'],
+        'features': features,
+        'features_numericas': list(info['features_numericas']),
+        'features_categoricas': list(info['features_categoricas']),
+        'categorias': {col: [str(c) for c in le_dict[col].classes_] for col in info['features_categoricas']},
+        'valor_inicial': float(arrays['valor_inicial']),
+        'taxa_aprendizado': float(arrays['taxa_aprendizado']),
+        'metricas': {k: _python(info[k]) for k in METRICAS if k in info},
+        'feature_importance': {k: float(v) for k, v in info.get('feature_importance', {}).items()},
+        'classes': {str(k): v for k, v in info.get('classes', {}).items()},
+        'niveis_risco': info.get('niveis_risco', {}),
+        'calibracao': info.get('calibracao'),
+        'deriva': info.get('deriva'),
+        'checksums': checksums,
+    }
+    with open(tmp / NOME_MANIFESTO, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+
+    os.replace(tmp, destino)
+    if ativar:
+        ativar_versao(versao, dir_modelos)
+    return destino
+
+
+def ativar_versao(versao, dir_modelos=DIR_MODELOS):
+    """Publica `versao` como ativa trocando o arquivo ATUAL de forma atômica"""
+    dir_modelos = pathlib.Path(dir_modelos)
+    if not (dir_modelos / versao / NOME_MANIFESTO).exists():
+        raise ErroPacote(f"versão inexistente: {versao}")
+    tmp = dir_modelos / f'.{ARQUIVO_ATUAL}.tmp'
+    tmp.write_text(versao + '\n', encoding='utf-8')
+    os.replace(tmp, dir_modelos / ARQUIVO_ATUAL)
+
+
+def carregar_pacote(diretorio, verificar_checksums=True):
+    """Abre um pacote: valida manifesto e checksums e mapeia os arrays em memória"""
+    diretorio = pathlib.Path(diretorio)
+    with open(diretorio / NOME_MANIFESTO, encoding='utf-8') as f:
+        manifesto = json.load(f)
+    if manifesto.get('formato') != VERSAO_FORMATO:
+        raise ErroPacote(f"formato de pacote não suportado: {manifesto.get('formato')}")
+
+    arrays = {}
+    opcionais = [nome for nome in ARRAYS_OPCIONAIS if f'{nome}.npy' in manifesto['checksums']]
+    for nome in ARRAYS_NUMERICOS + opcionais:
+        caminho = diretorio / f'{nome}.npy'
+        if verificar_checksums and _sha256(caminho) != manifesto['checksums'][f'{nome}.npy']:
+            raise ErroPacote(f"checksum inválido: {caminho}")
+        arrays[nome] = np.load(caminho, mmap_mode='r', allow_pickle=False)
+
+    n_features = len(manifesto['features'])
+    if arrays['media'].shape != (n_features,) or arrays['escala'].shape != (n_features,):
+        raise ErroPacote("scaler incompatível com a lista de features")
+
+    modelo = ModeloCompacto(arrays['feature'], arrays['limiar'], arrays['folha'],
+                            manifesto['valor_inicial'], manifesto['taxa_aprendizado'],
+                            cobertura=arrays.get('cobertura'))
+    escalonador = EscalonadorCompacto(arrays['media'], arrays['escala'])
+    codificadores = {col: CodificadorCompacto(np.array(classes))
+                     for col, classes in manifesto['categorias'].items()}
+    info = {
+        **manifesto['metricas'],
+        'versao': manifesto['versao'],
+        'modelo_nome': manifesto['modelo_nome'],
+        'features': manifesto['features'],
+        'features_numericas': manifesto['features_numericas'],
+        'features_categoricas': manifesto['features_categoricas'],
+        'feature_importance': manifesto['feature_importance'],
+        'classes': {int(k): v for k, v in manifesto['classes'].items()},
+        'niveis_risco': manifesto['niveis_risco'],
+        'calibracao': manifesto.get('calibracao'),
+        'deriva': manifesto.get('deriva'),
+    }
+    return Pacote(manifesto['versao'], modelo, escalonador, codificadores, info, manifesto)
+
+
+class RegistroModelos:
+    """
+    Mantém o pacote ativo em memória e o recarrega quando ATUAL muda.
+
+    `atual()` custa apenas um `stat` do arquivo ATUAL quando nada mudou.
+    A troca é atômica: leitores em andamento continuam com o pacote anterior.
+    """
+
+    def __init__(self, dir_modelos=DIR_MODELOS):
+        self.dir_modelos = pathlib.Path(dir_modelos)
+        self._pacote = None
+        self._assinatura = None
+        self._lock = threading.Lock()
+
+    def _assinatura_atual(self):
+        try:
+            st = os.stat(self.dir_modelos / ARQUIVO_ATUAL)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def atual(self):
+        """Retorna o Pacote ativo (ou None se não houver pacote publicado)"""
+        assinatura = self._assinatura_atual()
+        if assinatura != self._assinatura:
+            with self._lock:
+                if assinatura != self._assinatura:
+                    self._recarregar(assinatura)
+        return self._pacote
+
+    def _recarregar(self, assinatura):
+        if assinatura is None:
+            self._pacote, self._assinatura = None, None
+            return
+        versao = (self.dir_modelos / ARQUIVO_ATUAL).read_text(encoding='utf-8').strip()
+        if self._pacote is None or self._pacote.versao != versao:
+            self._pacote = carregar_pacote(self.dir_modelos / versao)
+        self._assinatura = assinatura
+
+
+def manifesto_atual(dir_modelos=DIR_MODELOS):
+    """Manifesto da versão ativa sem abrir os arrays (None se não houver pacote)"""
+    dir_modelos = pathlib.Path(dir_modelos)
+    try:
+        versao = (dir_modelos / ARQUIVO_ATUAL).read_text(encoding='utf-8').strip()
+        with open(dir_modelos / versao / NOME_MANIFESTO, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def listar_versoes(dir_modelos=DIR_MODELOS):
+    dir_modelos = pathlib.Path(dir_modelos)
+    if not dir_modelos.exists():
+        return []
+    return sorted(p.name for p in dir_modelos.iterdir() if (p / NOME_MANIFESTO).exists())
+
+
+def main(argv):
+    comando = argv[1] if len(argv) > 1 else None
+    if comando == 'criar':
+        from pontuacao import carregar_artefatos
+        base = pathlib.Path(__file__).parent
+        destino = criar_pacote(*carregar_artefatos(base), versao=argv[2] if len(argv) > 2 else None,
+                               features=ler_features(base / 'features.txt'))
+        print(f"✅ Pacote criado e ativado: {destino}")
+    elif comando == 'ativar' and len(argv) > 2:
+        ativar_versao(argv[2])
+        print(f"✅ Versão ativa: {argv[2]}")
+    elif comando == 'listar':
+        atual = (DIR_MODELOS / ARQUIVO_ATUAL).read_text().strip() if (DIR_MODELOS / ARQUIVO_ATUAL).exists() else None
+        for versao in listar_versoes():
+            print(f"{'*' if versao == atual else ' '} {versao}")
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
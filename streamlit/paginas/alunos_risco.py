@@ -0,0 +1,97 @@
+"""
+Datathon FIAP - Passos Mágicos
+Página: Alunos em Risco (lista filtrável e paginada, servida pelo SQLite)
+
+Autor: Leandro Leme Crespo
+"""
+
+import math
+
+import streamlit as st
+
+from lista_risco import TAMANHO_PAGINA, Filtros
+from recursos import carregar_modelo, chave_base, contagem_lista, estado_base, lista_risco
+from risco import NIVEIS
+
+ORDENS = {
+    'Maior probabilidade': ('probabilidade', True),
+    'Menor probabilidade': ('probabilidade', False),
+    'RA': ('ra', False),
+}
+
+estado = estado_base()
+modelo, _, _, modelo_info = carregar_modelo()
+
+st.markdown('<p class="main-header">🚨 Alunos em Risco</p>', unsafe_allow_html=True)
+
+if estado is None or modelo is None:
+    st.warning("⚠️ Base ou modelo não carregados.")
+else:
+    versao_modelo = modelo_info.get('versao', 'legado')
+    chave = chave_base(estado.versao, estado.df)
+    lista = lista_risco(chave, versao_modelo, estado.df)
+    anos, instituicoes = lista.opcoes()
+
+    col1, col2, col3 = st.columns([1, 2, 2])
+    with col1:
+        ano = st.selectbox("Ano PEDE:", ['Todos'] + anos[::-1], index=1 if anos else 0)
+    with col2:
+        niveis = st.multiselect("Nível de risco:", NIVEIS, default=['Risco Moderado', 'Risco Alto'])
+    with col3:
+        escolhidas = st.multiselect("Instituição de ensino:", instituicoes, placeholder="Todas")
+    col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
+    with col1:
+        minima = st.slider("Probabilidade mínima:", 0, 100, 0, step=5, format='%d%%')
+    with col2:
+        ra = st.text_input("RA começa com:", placeholder="ex.: RA-12").strip()
+    with col3:
+        ordem, decrescente = ORDENS[st.selectbox("Ordenar por:", list(ORDENS))]
+    with col4:
+        tamanho = st.selectbox("Por página:", [25, TAMANHO_PAGINA, 100], index=1)
+
+    filtros = Filtros(ano=None if ano == 'Todos' else int(ano), instituicoes=tuple(escolhidas),
+                      niveis=tuple(niveis), probabilidade_minima=minima / 100, ra=ra)
+    contagem = contagem_lista(chave, versao_modelo, filtros, lista)
+    total = sum(contagem.values())
+
+    cols = st.columns(len(NIVEIS) + 1)
+    cols[0].metric("Alunos no filtro", f"{total:,}")
+    for col, (nivel, n) in zip(cols[1:], contagem.items()):
+        col.metric(nivel, f"{n:,}")
+
+    # Cursores das páginas já visitadas; qualquer mudança de filtro ou ordem volta à primeira
+    consulta = (chave, versao_modelo, filtros, ordem, decrescente, tamanho)
+    if st.session_state.get('lista_consulta') != consulta:
+        st.session_state['lista_consulta'] = consulta
+        st.session_state['lista_cursores'] = [None]
+    cursores = st.session_state['lista_cursores']
+    pagina = lista.pagina(filtros, ordem, decrescente, tamanho, apos=cursores[-1])
+
+    st.dataframe(
+        pagina.linhas, use_container_width=True, hide_index=True,
+        column_config={
+            'PROBABILIDADE_RISCO': st.column_config.ProgressColumn(
+                "Probabilidade", format='percent', min_value=0.0, max_value=1.0),
+            'FATORES_PRINCIPAIS': st.column_config.TextColumn("Fatores principais", width='large'),
+            'ANO_PEDE': st.column_config.NumberColumn("Ano", format='%d'),
+        },
+    )
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("◀ Anterior", disabled=len(cursores) == 1, use_container_width=True):
+            cursores.pop()
+            st.rerun()
+    with col2:
+        paginas = max(math.ceil(total / tamanho), 1)
+        st.markdown(f"<p style='text-align: center'>Página {len(cursores)} de {paginas}</p>",
+                    unsafe_allow_html=True)
+    with col3:
+        if st.button("Próxima ▶", disabled=pagina.proxima is None, use_container_width=True):
+            cursores.append(pagina.proxima)
+            st.rerun()
+
+    metadados = lista.metadados()
+    st.caption(f"{int(metadados['linhas']):,} de {int(metadados['linhas_base']):,} registros da base pontuados "
+               f"pelo modelo {metadados['versao_modelo']} (registros sem todas as features ficam de fora). "
+               "A probabilidade é a calibrada; fatores principais = maiores contribuições para o risco.")
@@ -0,0 +1,67 @@
+"""
+Datathon FIAP - Passos Mágicos
+Página: Análise Exploratória
+
+Autor: Leandro Leme Crespo
+"""
+
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from recursos import correlacao, estado_base, histograma
+
+# Base e agregados da mesma versão (inclui os anos ingeridos de data/novos)
+estado = estado_base()
+colunas, agregados = (estado.colunas, estado.agregados) if estado else (None, None)
+
+st.markdown('<p class="main-header">📈 Análise Exploratória</p>', unsafe_allow_html=True)
+
+if colunas is not None:
+    st.sidebar.subheader("Filtros")
+    anos_disponiveis = sorted(agregados.anos)
+    ano_selecionado = st.sidebar.multiselect("Ano", anos_disponiveis, default=anos_disponiveis)
+
+    # Estatísticas dos anos selecionados, somadas a partir dos agregados por ano
+    # (as linhas da base não são filtradas nem enviadas ao navegador)
+    anos_chave = tuple(sorted(ano_selecionado))
+    agregado = agregados.combinar(anos_chave)
+
+    st.subheader("🔗 Correlação entre Indicadores")
+    indicadores = ['IDA', 'IEG', 'IAA', 'IPS', 'IPV', 'IPP']
+    ind_disponiveis = [i for i in indicadores if i in colunas]
+
+    corr = correlacao(estado.versao, anos_chave, agregados)
+    if corr is not None:
+        corr = corr.loc[ind_disponiveis, ind_disponiveis]
+        fig = px.imshow(corr, text_auto='.2f', aspect='auto',
+                       color_continuous_scale='RdBu_r')
+        st.plotly_chart(fig, use_container_width=True)
+
+    st.subheader("📊 Distribuição dos Indicadores")
+    indicador_sel = st.selectbox("Selecione o indicador:", ind_disponiveis)
+
+    if indicador_sel in colunas:
+        # 30 bins de 0 a 10 calculados no servidor: o Plotly recebe só bordas e contagens
+        bordas, contagens = histograma(estado.versao, anos_chave, indicador_sel, agregados)
+        fig = go.Figure(go.Bar(
+            x=(bordas[:-1] + bordas[1:]) / 2, y=contagens, width=bordas[1] - bordas[0],
+            marker_color='#3B82F6',
+        ))
+        fig.update_layout(bargap=0, xaxis_title=indicador_sel, yaxis_title='count')
+        st.plotly_chart(fig, use_container_width=True)
+
+    st.subheader("📊 Indicadores por Classe de Risco")
+    if 'DEFASAGEM' in colunas:
+        media_risco = agregado.medias_por_classe()[ind_disponiveis]
+
+        fig = go.Figure()
+        for classe in media_risco.index:
+            fig.add_trace(go.Bar(
+                name=classe,
+                x=ind_disponiveis,
+                y=media_risco.loc[classe].values,
+                marker_color='#22C55E' if classe == 'Sem Risco' else '#EF4444'
+            ))
+        fig.update_layout(barmode='group')
+        st.plotly_chart(fig, use_container_width=True)
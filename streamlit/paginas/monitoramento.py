@@ -0,0 +1,106 @@
+"""
+Datathon FIAP - Passos Mágicos
+Página: Monitoramento de Deriva (alunos pontuados vs. distribuição de treino)
+
+Autor: Leandro Leme Crespo
+"""
+
+import datetime
+
+import plotly.graph_objects as go
+import streamlit as st
+
+import pontuacao
+from deriva import LIMIARES_PSI, MonitorDeriva, monitor_para
+from instrumentacao import METRICAS
+from recursos import carregar_dados, carregar_modelo
+from risco import TabelaCodificacao
+
+CORES_SITUACAO = {'Estável': '#28a745', 'Moderada': '#ffc107', 'Significativa': '#dc3545',
+                  'Amostra pequena': '#adb5bd'}
+
+modelo, scaler, le_dict, modelo_info = carregar_modelo()
+
+st.markdown('<p class="main-header">📡 Monitoramento de Deriva</p>', unsafe_allow_html=True)
+st.caption("Compara os alunos pontuados com a distribuição de treino do modelo ativo: PSI por feature, "
+           "KS nas features numéricas e categorias que o modelo nunca viu.")
+
+if modelo is None:
+    st.warning("⚠️ Modelo não carregado.")
+elif not modelo_info.get('deriva'):
+    st.warning("⚠️ O modelo ativo não tem a referência de deriva. Gere-a com `python treino.py --so-deriva`.")
+else:
+    origem = st.radio("Alunos comparados:", ["Lotes pontuados", "Base PEDE (um ano)"], horizontal=True)
+    if origem == "Lotes pontuados":
+        monitor = monitor_para(modelo_info)
+        resumo = monitor.resumo()
+        col1, col2, col3 = st.columns([1, 1, 2])
+        with col1:
+            st.metric("Alunos pontuados", f"{resumo['linhas']:,}")
+        with col2:
+            st.metric("Lotes", f"{resumo['lotes']:,}")
+        with col3:
+            desde = datetime.datetime.fromtimestamp(resumo['desde']).strftime('%d/%m/%Y %H:%M')
+            st.metric("Desde", desde)
+        st.caption(f"Modelo {resumo['versao']}. Contagens deste processo: predições em lote, tarefas em "
+                   "segundo plano e serviço HTTP (quando roda no mesmo processo).")
+        if st.button("🔄 Reiniciar contagens"):
+            monitor.reiniciar()
+            st.rerun()
+    else:
+        df = carregar_dados()
+        monitor = None
+        if df is not None:
+            ano = st.selectbox("Ano PEDE:", sorted(df['ANO_PEDE'].unique()))
+            # Monitor próprio: o ano inteiro como um lote, sem passar pelo modelo
+            monitor = MonitorDeriva(modelo_info['deriva'], modelo_info.get('versao'))
+            with METRICAS.span('deriva_base'):
+                pontuacao.preparar_matriz(df[df['ANO_PEDE'] == ano], TabelaCodificacao(le_dict), modelo_info,
+                                          monitor=monitor)
+            st.caption(f"{monitor.resumo()['linhas']:,} alunos com todas as features em {ano}. O treino "
+                       "usou os anos 2022-2024, então a deriva aqui mostra o quanto cada ano difere do conjunto.")
+
+    if monitor is not None and monitor.resumo()['linhas'] > 0:
+        estatisticas = monitor.estatisticas()
+        novas = monitor.categorias_novas()
+
+        st.markdown("---")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Deriva significativa", f"{(estatisticas['Situação'] == 'Significativa').sum()} features")
+        with col2:
+            st.metric("Deriva moderada", f"{(estatisticas['Situação'] == 'Moderada').sum()} features")
+        with col3:
+            st.metric("Alunos com categoria nova", f"{novas['Alunos'].sum():,}")
+
+        fig = go.Figure(go.Bar(x=estatisticas['Feature'], y=estatisticas['PSI'],
+                               marker_color=estatisticas['Situação'].map(CORES_SITUACAO)))
+        for limiar in LIMIARES_PSI:
+            fig.add_hline(y=limiar, line_dash='dash', line_color='gray')
+        fig.update_layout(title='PSI por feature', yaxis_title='PSI', height=380)
+        st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(estatisticas.style.format({'PSI': '{:.3f}', 'KS': '{:.3f}', 'KS crítico': '{:.3f}'},
+                                               na_rep='—'),
+                     use_container_width=True, hide_index=True)
+        st.caption(f"PSI < {LIMIARES_PSI[0]}: estável · {LIMIARES_PSI[0]} - {LIMIARES_PSI[1]}: moderada · "
+                   f"> {LIMIARES_PSI[1]}: significativa. KS acima do crítico indica distribuição diferente "
+                   "da de treino (5% de significância).")
+
+        st.markdown("---")
+        st.subheader("📊 Distribuição por Feature")
+        feature = st.selectbox("Feature:", estatisticas['Feature'])
+        distribuicao = monitor.distribuicao(feature)
+        fig = go.Figure([
+            go.Bar(x=distribuicao['Faixa'], y=distribuicao['Treino'], name='Treino', marker_color='#667eea'),
+            go.Bar(x=distribuicao['Faixa'], y=distribuicao['Atual'], name='Pontuados', marker_color='#ff7f0e'),
+        ])
+        fig.update_layout(barmode='group', yaxis_tickformat='.0%', yaxis_title='Alunos', height=380)
+        st.plotly_chart(fig, use_container_width=True)
+
+        if len(novas):
+            st.subheader("🆕 Categorias Novas")
+            st.dataframe(novas, use_container_width=True, hide_index=True)
+            st.caption("Esses alunos foram pontuados com a categoria substituta ('Desconhecido' ou a mais "
+                       "frequente no treino) e marcados na coluna CATEGORIAS_NOVAS do resultado.")
+    elif monitor is not None:
+        st.info("Nenhum aluno pontuado ainda neste processo. Pontue um lote na página Predição de Risco.")
@@ -0,0 +1,436 @@
+"""
+Datathon FIAP - Passos Mágicos
+Página: Predição de Risco (individual e em lote)
+
+Autor: Leandro Leme Crespo
+"""
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+from plotly.subplots import make_subplots
+
+import estilo
+from calibracao import calibrar, faixas_niveis
+from cache_predicao import ResultadoPredicao, chave_predicao, quantizar
+from deriva import substitutos
+from instrumentacao import METRICAS
+from recursos import cache_predicoes, carregar_dados, carregar_modelo, explicador_modelo, fila_tarefas, xlsx_tarefa
+from risco import EMOJIS, NIVEIS, TabelaCodificacao, classificar_nivel_risco, limiares_modelo
+from sensibilidade import analisar
+from tarefas import ATIVOS
+
+estilo.aplicar(estilo.CSS_RISCO)
+
+LIMITE_XLSX = 50_000
+# Gráficos de sensibilidade por linha (as linhas crescem com o número de features)
+COLUNAS_SENSIBILIDADE = 3
+
+CORES_NIVEIS = ["#22C55E", "#FBBF24", "#F97316", "#EF4444"]
+ACOES_NIVEIS = ['Acompanhamento normal', 'Monitoramento preventivo', 'Intervenção pedagógica', 'Intervenção urgente']
+
+def figura_gauge(prob_risco, limiares):
+    """Gauge da probabilidade com as faixas dos 4 níveis (limiares do modelo)"""
+    cortes = [0.0] + [float(v) * 100 for v in limiares] + [100.0]
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=prob_risco * 100,
+        number={'suffix': '%', 'font': {'size': 40}},
+        title={'text': "Probabilidade de Risco", 'font': {'size': 18}},
+        gauge={
+            'axis': {'range': [0, 100], 'tickwidth': 1},
+            'bar': {'color': "rgba(0,0,0,0)", 'thickness': 0},
+            'bgcolor': "rgba(0,0,0,0)",
+            'borderwidth': 0,
+            'bordercolor': "rgba(0,0,0,0)",
+            'steps': [{'range': [de, ate], 'color': cor}
+                      for de, ate, cor in zip(cortes, cortes[1:], CORES_NIVEIS)],
+            'threshold': {
+                'line': {'color': "black", 'width': 4},
+                'thickness': 0.8,
+                'value': prob_risco * 100
+            }
+        }
+    ))
+    fig.update_layout(
+        height=350,
+        margin=dict(l=20, r=20, t=50, b=20),
+        paper_bgcolor='rgba(0,0,0,0)',
+    )
+    return fig
+
+# Nomes legíveis das features
+NOMES_FEATURES = {
+    'IDA': 'Desempenho Acadêmico (IDA)',
+    'IEG': 'Engajamento (IEG)',
+    'IAA': 'Autoavaliação (IAA)',
+    'IPS': 'Psicossocial (IPS)',
+    'IPV': 'Ponto de Virada (IPV)',
+    'IDADE': 'Idade',
+    'ANO INGRESSO': 'Ano de Ingresso',
+    'MAT': 'Nota Matemática',
+    'POR': 'Nota Português',
+    'GÊNERO_ENC': 'Gênero',
+    'INSTITUIÇÃO DE ENSINO_ENC': 'Instituição de Ensino',
+}
+
+def figura_importancia(feature_importance):
+    """Barras horizontais com a importância global das features do modelo"""
+    df_imp = pd.DataFrame({
+        'Feature': [NOMES_FEATURES.get(k, k) for k in feature_importance.keys()],
+        'Importância': [v * 100 for v in feature_importance.values()]
+    }).sort_values('Importância', ascending=True)
+
+    fig = px.bar(df_imp, x='Importância', y='Feature', orientation='h',
+                color='Importância', color_continuous_scale='Blues',
+                labels={'Importância': 'Importância (%)'})
+    fig.update_layout(showlegend=False, height=400)
+    return fig
+
+def figura_contribuicoes(contribuicoes):
+    """Contribuição de cada feature para o risco deste aluno (positivo = aumenta o risco)"""
+    df_contrib = pd.DataFrame({
+        'Feature': [NOMES_FEATURES.get(k, k) for k in contribuicoes.keys()],
+        'Contribuição': list(contribuicoes.values()),
+    })
+    df_contrib = df_contrib.reindex(df_contrib['Contribuição'].abs().sort_values().index)
+
+    fig = go.Figure(go.Bar(
+        x=df_contrib['Contribuição'], y=df_contrib['Feature'], orientation='h',
+        marker_color=['#EF4444' if c > 0 else '#22C55E' for c in df_contrib['Contribuição']],
+    ))
+    fig.update_layout(showlegend=False, height=400,
+                      xaxis_title='Contribuição para o risco (log-odds)')
+    return fig
+
+def figura_sensibilidade(analise, atuais):
+    """Curva de dependência de cada feature numérica (demais fixas), com o valor atual e o limiar de risco moderado"""
+    nomes = list(atuais)
+    colunas = min(len(nomes), COLUNAS_SENSIBILIDADE)
+    linhas = -(-len(nomes) // colunas)
+    fig = make_subplots(rows=linhas, cols=colunas, subplot_titles=nomes, shared_yaxes=True,
+                        vertical_spacing=0.36 / linhas, horizontal_spacing=0.05)
+    for i, nome in enumerate(nomes):
+        linha, coluna = i // colunas + 1, i % colunas + 1
+        curva = analise.curvas[nome]
+        fig.add_trace(go.Scatter(x=curva['valor'], y=curva['probabilidade'] * 100, mode='lines',
+                                 line=dict(color='#3B82F6'), showlegend=False,
+                                 hovertemplate=f'{nome}=%{{x}}<br>risco=%{{y:.1f}}%<extra></extra>'),
+                      row=linha, col=coluna)
+        fig.add_vline(x=atuais[nome], line_dash='dot', line_color='black', row=linha, col=coluna)
+        fig.add_hline(y=limiar_alvo * 100, line_dash='dash', line_color='#F97316', row=linha, col=coluna)
+    fig.update_yaxes(range=[0, 100], ticksuffix='%')
+    fig.update_layout(height=215 * linhas, margin=dict(l=20, r=20, t=40, b=20))
+    return fig
+
+def calcular_predicao(features):
+    """Probabilidade, nível, contribuições e figuras serializadas de um aluno (entrada do cache)"""
+    with METRICAS.span('modelo'):
+        features_scaled = scaler.transform(features)
+        prob_risco = float(calibrar(modelo.predict_proba(features_scaled)[0, 1], modelo_info))
+    nivel, _, _ = classificar_nivel_risco(prob_risco, limiares)
+    contribuicoes = {}
+    explicador = explicador_modelo(modelo_info.get('versao', 'legado'), modelo)
+    if explicador is not None:
+        with METRICAS.span('explicacao'):
+            contribuicoes = dict(zip(modelo_info['features'], explicador.contribuicoes(features_scaled)[0].tolist()))
+    with METRICAS.span('figuras'):
+        figuras = {'gauge': figura_gauge(prob_risco, limiares).to_json()}
+        if contribuicoes:
+            figuras['contribuicoes'] = figura_contribuicoes(contribuicoes).to_json()
+        feature_importance = modelo_info.get('feature_importance', {})
+        if feature_importance:
+            figuras['importancia'] = figura_importancia(feature_importance).to_json()
+    return ResultadoPredicao(prob_risco, nivel, figuras, contribuicoes)
+
+# Carregar modelo (a base só é lida se o lote vier dela)
+modelo, scaler, le_dict, modelo_info = carregar_modelo()
+tabela_codificacao = TabelaCodificacao(le_dict) if le_dict is not None else None
+limiares = limiares_modelo(modelo_info)
+# Início do nível "Risco Moderado" do modelo ativo
+limiar_alvo = float(limiares[1])
+
+st.markdown('<p class="main-header">🔮 Predição de Risco de Defasagem</p>', unsafe_allow_html=True)
+
+if modelo is not None and modelo_info is not None:
+    st.success(f"✅ Modelo carregado: **{modelo_info['modelo_nome']}** | "
+               f"Acurácia: **{modelo_info['accuracy']*100:.1f}%** | "
+               f"AUC-ROC: **{modelo_info['auc_roc']*100:.1f}%** | "
+               f"CV: **{modelo_info.get('cv_accuracy_mean', 0)*100:.1f}% (+/- {modelo_info.get('cv_accuracy_std', 0)*100:.1f}%)**"
+               + (f" | Versão: **{modelo_info['versao']}**" if 'versao' in modelo_info else ""))
+
+    st.markdown("---")
+    st.subheader("📝 Insira os dados do aluno:")
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.markdown("**Indicadores PEDE**")
+        ida = st.slider("IDA (Desempenho Acadêmico)", 0.0, 10.0, 7.0, 0.1)
+        ieg = st.slider("IEG (Engajamento)", 0.0, 10.0, 7.0, 0.1)
+        iaa = st.slider("IAA (Autoavaliação)", 0.0, 10.0, 7.0, 0.1)
+        ips = st.slider("IPS (Psicossocial)", 0.0, 10.0, 7.0, 0.1)
+        ipv = st.slider("IPV (Ponto de Virada)", 0.0, 10.0, 7.0, 0.1)
+
+    with col2:
+        st.markdown("**Notas por Matéria**")
+        mat = st.slider("Matemática", 0.0, 10.0, 7.0, 0.1)
+        por = st.slider("Português", 0.0, 10.0, 7.0, 0.1)
+
+    with col3:
+        st.markdown("**Dados Contextuais**")
+        idade = st.number_input("Idade", min_value=6, max_value=25, value=12)
+        ano_ingresso = st.number_input("Ano de Ingresso", min_value=2015, max_value=2025, value=2022)
+        genero_display = st.selectbox("Gênero", ["Feminino", "Masculino"])
+        # Mapeamento: dados usam "Feminino"/"Menina" e "Masculino"/"Menino" dependendo do ano
+        genero = genero_display  # O encoder conhece ambos os termos
+
+        instituicao_opcoes = {
+            "Pública": "Pública",
+            "Privada": "Privada",
+            "Privada - Programa de Apadrinhamento": "Privada - Programa de Apadrinhamento",
+            "Privada com Bolsa 100%": "Privada *Parcerias com Bolsa 100%",
+            "Privada - Empresa Parceira": "Privada - Pagamento por *Empresa Parceira",
+            "Escola JP II": "Escola JP II",
+            "Rede Decisão": "Rede Decisão",
+            "Bolsista Universitário (Formado)": "Bolsista Universitário *Formado (a)",
+            "Concluiu o 3º EM": "Concluiu o 3º EM",
+            "Desconhecido": "Desconhecido",
+            "Nenhuma das opções acima": "Nenhuma das opções acima"
+        }
+        instituicao_display = st.selectbox("Instituição de Ensino", list(instituicao_opcoes.keys()))
+        instituicao = instituicao_opcoes[instituicao_display]
+
+    st.markdown("---")
+
+    # Níveis de risco explicação
+    with st.expander("ℹ️ Como funciona a classificação por níveis de risco?"):
+        linhas = [f"| {faixa} | {emoji} **{nivel}** | {acao} |"
+                  for faixa, emoji, nivel, acao in zip(faixas_niveis(limiares), EMOJIS, NIVEIS, ACOES_NIVEIS)]
+        st.markdown("O modelo gera uma **probabilidade** de risco (calibrada) que é convertida em 4 níveis, "
+                    "com os limiares gravados no modelo ativo:\n\n"
+                    "| Probabilidade | Nível | Ação Sugerida |\n|---------------|-------|---------------|\n"
+                    + "\n".join(linhas))
+
+    modo_sensibilidade = st.toggle("🎛️ Modo sensibilidade: mostrar como o risco varia com cada dado do aluno")
+
+    if st.button("🔮 Realizar Predição", type="primary", use_container_width=True):
+        try:
+            # Preparar dados
+            genero_enc = tabela_codificacao.codigo('GÊNERO', genero)
+            instituicao_enc = tabela_codificacao.codigo('INSTITUIÇÃO DE ENSINO', instituicao)
+            if genero_enc < 0 or instituicao_enc < 0:
+                # Opção que o modelo ativo não viu no treino: usa a categoria substituta
+                codigos = substitutos(modelo_info, tabela_codificacao)
+                genero_enc = genero_enc if genero_enc >= 0 else codigos.get('GÊNERO', -1)
+                instituicao_enc = instituicao_enc if instituicao_enc >= 0 else codigos.get('INSTITUIÇÃO DE ENSINO', -1)
+                if genero_enc < 0 or instituicao_enc < 0:
+                    raise ValueError("categoria desconhecida pelo modelo")
+                st.warning("⚠️ Categoria não vista no treino do modelo ativo: pontuada com a categoria substituta.")
+
+            # Criar array de features na ordem correta (11 features, sem ING)
+            features = quantizar([[ida, ieg, iaa, ips, ipv, idade, ano_ingresso, mat, por, genero_enc, instituicao_enc]])
+
+            # Predição (reaproveitada do cache quando a mesma entrada já foi calculada)
+            cache = cache_predicoes()
+            chave = chave_predicao(modelo_info.get('versao', 'legado'), features)
+            with METRICAS.span('predicao'):
+                resultado, _ = cache.obter_ou_calcular(chave, lambda: calcular_predicao(features))
+            prob_risco = resultado.probabilidade
+
+            # Classificar nível de risco
+            nivel, emoji, css_class = classificar_nivel_risco(prob_risco, limiares)
+
+            st.markdown("---")
+            st.subheader("📊 Resultado da Predição")
+
+            col1, col2 = st.columns(2)
+
+            with col1:
+                descricoes = {
+                    'Sem Risco': 'O aluno apresenta indicadores adequados para sua fase escolar. Manter acompanhamento regular.',
+                    'Atenção': 'O aluno apresenta alguns sinais que merecem atenção. Recomenda-se monitoramento preventivo.',
+                    'Risco Moderado': 'O aluno apresenta indicadores que sugerem risco moderado de defasagem. Intervenção pedagógica recomendada.',
+                    'Risco Alto': 'O aluno apresenta indicadores críticos de risco de defasagem. Intervenção urgente necessária.'
+                }
+
+                st.markdown(f"""
+                <div class="{css_class}">
+                    <h2>{emoji} {nivel.upper()}</h2>
+                    <p>{descricoes[nivel]}</p>
+                    <p style="font-size: 24px; font-weight: bold; margin-top: 10px;">Probabilidade de Risco: {prob_risco*100:.1f}%</p>
+                </div>
+                """, unsafe_allow_html=True)
+
+            with col2:
+                st.plotly_chart(pio.from_json(resultado.figuras['gauge']), use_container_width=True)
+
+            # Feature Importance
+            st.subheader("📈 Fatores que Influenciaram a Predição")
+
+            if 'contribuicoes' in resultado.figuras:
+                st.caption("Quanto cada dado deste aluno aumentou (vermelho) ou reduziu (verde) "
+                           "o risco previsto, em relação ao aluno médio da base de treino.")
+                st.plotly_chart(pio.from_json(resultado.figuras['contribuicoes']), use_container_width=True)
+            else:
+                st.info("O modelo ativo não tem a cobertura das folhas, então as contribuições por aluno "
+                        "não estão disponíveis (recrie o pacote com `python treino.py`).")
+
+            if 'importancia' in resultado.figuras:
+                with st.expander("Importância global das features no modelo"):
+                    st.plotly_chart(pio.from_json(resultado.figuras['importancia']), use_container_width=True)
+
+            # Sensibilidade: todas as variações de uma feature por vez, pontuadas em uma chamada
+            if modo_sensibilidade:
+                st.subheader("🎛️ Sensibilidade (what-if)")
+                analise = analisar(features, modelo, scaler, modelo_info, tabela_codificacao, limiar=limiar_alvo)
+                atuais = {f: v for f, v in zip(modelo_info['features'], features.ravel().tolist())
+                          if f in modelo_info['features_numericas']}
+                st.caption(f"Risco previsto variando uma feature de cada vez, com as demais fixas "
+                           f"({analise.linhas_pontuadas:,} cenários pontuados em uma única chamada ao modelo). "
+                           f"Linha pontilhada: valor atual; tracejada: {limiar_alvo:.0%}.")
+                st.plotly_chart(figura_sensibilidade(analise, atuais), use_container_width=True)
+
+                if prob_risco >= limiar_alvo:
+                    st.markdown(f"**O que deixaria o aluno abaixo de {limiar_alvo:.0%}** (menor mudança em uma única feature):")
+                    if analise.abaixo_do_limiar.empty:
+                        st.info("Nenhuma mudança isolada em uma feature numérica leva o risco abaixo do limiar.")
+                    else:
+                        st.dataframe(analise.abaixo_do_limiar.style.format(
+                            {'Atual': '{:g}', 'Novo valor': '{:g}', 'Variação': '{:+g}', 'Probabilidade': '{:.1%}'}),
+                            use_container_width=True, hide_index=True)
+
+                with st.expander("Risco por categoria (Gênero e Instituição de Ensino)"):
+                    for coluna in modelo_info['features_categoricas']:
+                        curva = analise.curvas[coluna].set_index('valor')['probabilidade']
+                        st.dataframe(curva.rename('Probabilidade').rename_axis(coluna).to_frame()
+                                     .style.format('{:.1%}'), use_container_width=True)
+
+            # Recomendações por nível
+            st.subheader("💡 Recomendações")
+            if nivel == 'Risco Alto':
+                st.error("""
+                **Ações Urgentes:**
+                - 🚨 Intervenção pedagógica imediata
+                - 👥 Avaliação psicossocial completa
+                - 📊 Monitoramento semanal dos indicadores
+                - 🎯 Plano de recuperação personalizado
+                - 👨‍👩‍👧 Contato com a família
+                """)
+            elif nivel == 'Risco Moderado':
+                st.warning("""
+                **Ações Recomendadas:**
+                - 📚 Acompanhamento pedagógico individualizado
+                - 👥 Avaliação psicossocial
+                - 📊 Monitoramento quinzenal dos indicadores
+                - 🎯 Plano de intervenção personalizado
+                """)
+            elif nivel == 'Atenção':
+                st.info("""
+                **Ações Preventivas:**
+                - 📈 Monitoramento mensal dos indicadores
+                - 🎯 Estabelecer metas de desenvolvimento
+                - 📚 Reforço em áreas com menor desempenho
+                """)
+            else:
+                st.success("""
+                **Manutenção:**
+                - ✅ Manter acompanhamento regular
+                - 📈 Continuar estimulando o engajamento
+                - 🎯 Estabelecer metas de evolução
+                """)
+
+            est = cache.estatisticas()
+            st.caption(f"⚡ Cache de predições: {est['taxa_acerto']*100:.0f}% de acertos "
+                       f"({est['acertos']}/{est['consultas']} consultas, {est['itens']} entradas)")
+
+        except Exception as e:
+            st.error(f"Erro na predição: {e}")
+            st.info("Verifique se os valores de Gênero e Instituição são compatíveis com os dados de treino.")
+
+    # Predição em lote
+    st.markdown("---")
+    st.subheader("📦 Predição em Lote")
+    st.caption("Pontue uma coorte inteira de uma vez a partir de um arquivo ou de um ano da base PEDE.")
+
+    origem = st.radio("Origem dos dados:", ["Arquivo (CSV/XLSX)", "Base PEDE"], horizontal=True)
+    entrada_lote, nome_lote = None, None
+    if origem == "Arquivo (CSV/XLSX)":
+        arquivo = st.file_uploader("Arquivo com as colunas IDA, IEG, IAA, IPS, IPV, IDADE, ANO INGRESSO, "
+                                   "MAT, POR, GÊNERO e INSTITUIÇÃO DE ENSINO", type=['csv', 'xlsx'])
+        if arquivo is not None:
+            entrada_lote, nome_lote = arquivo, arquivo.name
+    else:
+        df = carregar_dados()
+        if df is not None:
+            ano_lote = st.selectbox("Ano PEDE:", sorted(df['ANO_PEDE'].unique()))
+            entrada_lote, nome_lote = df[df['ANO_PEDE'] == ano_lote], f"PEDE{ano_lote}.csv"
+    explicar_lote = st.checkbox("Incluir a contribuição de cada feature (CONTRIB_*) e os 3 fatores principais",
+                                value=True)
+
+    # O lote roda em segundo plano; o id da tarefa fica na URL para sobreviver a um recarregamento
+    fila = fila_tarefas()
+    if entrada_lote is not None and st.button("📦 Pontuar Lote", use_container_width=True):
+        try:
+            st.query_params['tarefa'] = fila.submeter(
+                entrada_lote, 'explicacao' if explicar_lote else 'pontuacao', nome=nome_lote)
+        except Exception as e:
+            st.error(f"Erro ao enviar o lote: {e}")
+
+    @st.fragment(run_every=1)
+    def acompanhar_tarefa(id_tarefa):
+        tarefa = fila.obter(id_tarefa)
+        if tarefa['estado'] not in ATIVOS:
+            st.rerun()
+        texto = (f"⏳ {tarefa['nome']}: {tarefa['processadas']:,} de {tarefa['total']:,} registros"
+                 if tarefa['total'] else f"⏳ {tarefa['nome']}: na fila")
+        st.progress(tarefa['progresso'], text=texto)
+        if st.button("✖️ Cancelar", key='cancelar_tarefa'):
+            fila.cancelar(id_tarefa)
+            st.rerun()
+
+    id_tarefa = st.query_params.get('tarefa')
+    tarefa = fila.obter(id_tarefa) if id_tarefa else None
+    if id_tarefa and tarefa is None:
+        st.warning("Tarefa não encontrada.")
+    elif tarefa is not None and tarefa['estado'] in ATIVOS:
+        acompanhar_tarefa(id_tarefa)
+    elif tarefa is not None and tarefa['estado'] == 'concluida':
+        st.success(f"✅ {tarefa['nome']}: {tarefa['pontuadas']:,} de {tarefa['processadas']:,} registros "
+                   f"pontuados (modelo {tarefa['versao_modelo']})")
+        if tarefa['pontuadas'] < tarefa['processadas']:
+            st.info("Registros sem todas as features numéricas não foram pontuados.")
+        st.caption("Categorias que o modelo não conhece são pontuadas com a categoria substituta e "
+                   "marcadas em CATEGORIAS_NOVAS (ver a página Monitoramento de Deriva).")
+        st.dataframe(pd.Series(tarefa['niveis'], name='count').rename_axis('NIVEL_RISCO')
+                     .sort_values(ascending=False), use_container_width=True)
+        if tarefa['tipo'] == 'explicacao':
+            st.caption("O arquivo inclui a contribuição de cada feature (CONTRIB_*) e os 3 fatores "
+                       "principais de cada aluno (FATORES_PRINCIPAIS).")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            with open(tarefa['saida'], 'rb') as f:
+                st.download_button("⬇️ Baixar CSV", f, file_name='predicao_risco_lote.csv', mime='text/csv',
+                                   use_container_width=True)
+        with col2:
+            # XLSX é montado em memória: só para lotes menores
+            if tarefa['processadas'] <= LIMITE_XLSX:
+                st.download_button("⬇️ Baixar XLSX", xlsx_tarefa(tarefa['id'], tarefa['saida']),
+                                   file_name='predicao_risco_lote.xlsx',
+                                   mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                                   use_container_width=True)
+    elif tarefa is not None:
+        st.error(f"Tarefa {tarefa['estado']}: {tarefa['erro']}" if tarefa['erro']
+                 else f"Tarefa {tarefa['estado']}.")
+
+else:
+    st.warning("⚠️ Modelo não carregado. Execute o notebook de treinamento primeiro.")
+    st.info("""
+    Para usar a predição de risco:
+    1. Execute o notebook `03_Modelo_Preditivo.ipynb` no Google Colab
+    2. Os arquivos do modelo serão salvos automaticamente
+    3. Recarregue esta página
+    """)
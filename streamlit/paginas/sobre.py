@@ -0,0 +1,95 @@
+"""
+Datathon FIAP - Passos Mágicos
+Página: Sobre o Projeto
+
+Autor: Leandro Leme Crespo
+"""
+
+import streamlit as st
+
+from pacote_modelo import manifesto_atual
+
+st.markdown('<p class="main-header">📋 Sobre o Projeto</p>', unsafe_allow_html=True)
+
+st.markdown("""
+## 🎯 Objetivo
+
+Este projeto foi desenvolvido para o **Datathon FIAP** em parceria com a **Passos Mágicos**, 
+com o objetivo de analisar indicadores educacionais e criar um modelo preditivo para 
+identificar alunos em risco de defasagem escolar.
+
+## 📊 Indicadores Analisados
+
+| Indicador | Descrição |
+|-----------|-----------|
+| **IDA** | Índice de Desempenho Acadêmico |
+| **IEG** | Índice de Engajamento |
+| **IAA** | Índice de Autoavaliação |
+| **IPS** | Índice Psicossocial |
+| **IPV** | Índice de Ponto de Virada |
+| **IPP** | Índice Psicopedagógico |
+| **IAN** | Índice de Adequação de Nível |
+| **INDE** | Índice de Desenvolvimento Educacional |
+
+## 🤖 Modelo de Machine Learning
+
+Foram testados **4 algoritmos** de Machine Learning:
+- Logistic Regression
+- SVM (RBF)
+- Random Forest
+- **Gradient Boosting** ← Selecionado
+
+### Resultados do Modelo Final (Gradient Boosting)
+
+| Métrica | Teste (80/20) | CV (Stratified 5-fold) |
+|---------|---------------|------------------------|
+| Acurácia | 78.7% | 78.5% (+/- 1.1%) |
+| AUC-ROC | 86.2% | 85.1% (+/- 1.9%) |
+| F1-Score | 82.7% | 82.5% (+/- 0.9%) |
+
+### Níveis de Risco
+""")
+
+# Taxas observadas geradas no treino junto com a calibração do modelo ativo
+calibracao = (manifesto_atual() or {}).get('calibracao')
+if calibracao:
+    linhas = "\n".join(
+        f"| {t['faixa']} | {t['nivel']} | {t['taxa_real'] * 100:.1f}% | {t['alunos']:,} |"
+        for t in calibracao['taxas'] if t['alunos']
+    )
+    st.markdown(f"""
+| Probabilidade (calibrada) | Nível | % Real com Risco | Alunos |
+|---------------------------|-------|------------------|--------|
+{linhas}
+
+Probabilidade calibrada por regressão isotônica nas predições fora do fold; taxas observadas em
+validação cruzada ({calibracao['amostras']:,} alunos).
+""")
+else:
+    st.markdown("""
+| Probabilidade | Nível | % Real com Risco |
+|---------------|-------|------------------|
+| < 30% | Sem Risco | 10.0% |
+| 30% - 60% | Atenção | 44.6% |
+| 60% - 85% | Risco Moderado | 74.8% |
+| > 85% | Risco Alto | 90.5% |
+""")
+
+st.markdown("""
+### Decisões Técnicas
+
+- **Remoção do Inglês (ING):** Apenas 33% de preenchimento em 2022, ausente nos demais anos.
+  Mantê-lo reduziria o dataset de 2.467 para ~660 registros.
+- **Split estratificado por ano:** Garante representatividade temporal nos conjuntos de treino/teste.
+- **Stratified K-Fold:** Validação robusta com variação de apenas 1.1% entre folds.
+
+## 👨‍💻 Autor
+
+**Leandro Leme Crespo**
+
+## 🔗 Links
+
+- [GitHub do Projeto](https://github.com/LeandroCrespo/datathon-passos-magicos)
+- [Passos Mágicos](https://www.passosmagicos.org.br/)
+- [FIAP](https://www.fiap.com.br/)
+""")
@@ -0,0 +1,61 @@
+"""
+Datathon FIAP - Passos Mágicos
+Página: Trajetória dos Alunos entre os anos PEDE
+
+Autor: Leandro Leme Crespo
+"""
+
+import plotly.graph_objects as go
+import streamlit as st
+
+from agregados import INDICADORES
+from recursos import estado_base, indice_trajetoria
+from trajetoria import TRANSICOES
+
+estado = estado_base()
+indice = indice_trajetoria(estado.versao, estado.df) if estado else None
+
+st.markdown('<p class="main-header">🧭 Trajetória dos Alunos</p>', unsafe_allow_html=True)
+
+if indice is not None:
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Alunos (RA)", f"{indice.alunos:,}")
+    with col2:
+        st.metric("Com mais de um ano", f"{len(set(indice.par_aluno.tolist())):,}")
+    with col3:
+        st.metric("Pares de anos consecutivos", f"{len(indice.par_aluno):,}")
+
+    st.markdown("---")
+    st.subheader("👤 Evolução de um Aluno")
+    ra = st.selectbox("RA do aluno:", indice.ras, index=None, placeholder="Digite ou escolha um RA")
+    if ra is not None:
+        trajetoria = indice.trajetoria(ra)
+        fig = go.Figure()
+        for indicador in INDICADORES:
+            fig.add_trace(go.Scatter(x=trajetoria.index.astype(str), y=trajetoria[indicador],
+                                     mode='lines+markers', name=indicador, connectgaps=True))
+        fig.update_layout(xaxis_title='Ano PEDE', yaxis_title='Valor', yaxis_range=[0, 10.5])
+        st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(trajetoria.style.format(precision=2, na_rep='—'), use_container_width=True)
+        st.caption("Δ = variação em relação ao ano anterior em que o aluno aparece na base.")
+
+    st.markdown("---")
+    st.subheader("🔀 Transições de Risco")
+    pares = indice.pares_de_anos()
+    if pares:
+        de, para = st.selectbox("Anos:", pares, index=len(pares) - 1, format_func=lambda p: f"{p[0]} → {p[1]}")
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            st.dataframe(indice.matriz_transicao(de, para), use_container_width=True)
+            st.caption("Linhas: classe no ano de origem; colunas: classe no ano seguinte do aluno.")
+        with col2:
+            transicao = st.radio("Coorte:", list(TRANSICOES), horizontal=True)
+            coorte = indice.coorte(de, para, transicao)
+            st.markdown(f"**{len(coorte):,}** alunos · variação média: " + " · ".join(
+                f"{c[2:]} {coorte[c].mean():+.2f}" for c in coorte.columns[1:] if coorte[c].notna().any()))
+            st.dataframe(coorte.style.format(precision=2, na_rep='—'), use_container_width=True, hide_index=True)
+            st.download_button("⬇️ Baixar coorte (CSV)", coorte.to_csv(index=False).encode('utf-8'),
+                               file_name=f"coorte_{de}_{para}.csv", mime='text/csv')
+    else:
+        st.info("Nenhum aluno aparece em mais de um ano PEDE.")
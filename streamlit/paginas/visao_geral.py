@@ -0,0 +1,70 @@
+"""
+Datathon FIAP - Passos Mágicos
+Página: Visão Geral
+
+Autor: Leandro Leme Crespo
+"""
+
+import plotly.express as px
+import streamlit as st
+
+from recursos import base_pede, estado_base
+
+# Base e agregados da mesma versão (inclui os anos ingeridos de data/novos)
+estado = estado_base()
+colunas, agregados = (estado.colunas, estado.agregados) if estado else (None, None)
+
+st.markdown('<p class="main-header">🎓 Datathon FIAP - Passos Mágicos</p>', unsafe_allow_html=True)
+st.markdown('<p class="sub-header">Análise de Indicadores Educacionais e Predição de Risco de Defasagem</p>', unsafe_allow_html=True)
+
+for rejeitado in (base_pede().rejeitados if colunas is not None else []):
+    st.warning(f"⚠️ Arquivo **{rejeitado['origem']}** não foi incorporado à base: {rejeitado['erro']}")
+
+if colunas is not None:
+    total = agregados.combinar()
+    sem_risco, com_risco = total.risco
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric("Total de Registros", f"{total.linhas:,}")
+    with col2:
+        anos = len(agregados.anos)
+        st.metric("Anos Analisados", f"{anos}")
+    with col3:
+        if 'DEFASAGEM' in colunas:
+            st.metric("Sem Risco", f"{sem_risco:,}")
+    with col4:
+        if 'DEFASAGEM' in colunas:
+            st.metric("Com Risco", f"{com_risco:,}")
+
+    st.markdown("---")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader("📊 Distribuição por Ano")
+        if 'ANO_PEDE' in colunas:
+            contagem = agregados.contagem_por_ano()
+            fig = px.bar(x=contagem.index, y=contagem.values, 
+                        labels={'x': 'Ano', 'y': 'Quantidade'},
+                        color=contagem.values, color_continuous_scale='Blues')
+            fig.update_layout(showlegend=False)
+            st.plotly_chart(fig, use_container_width=True)
+
+    with col2:
+        st.subheader("📊 Distribuição de Risco")
+        if 'DEFASAGEM' in colunas:
+            fig = px.pie(values=[sem_risco, com_risco], 
+                        names=['Sem Risco', 'Com Risco'],
+                        color_discrete_sequence=['#22C55E', '#EF4444'])
+            st.plotly_chart(fig, use_container_width=True)
+
+    st.subheader("📈 Indicadores Médios")
+    indicadores = ['IDA', 'IEG', 'IAA', 'IPS', 'IPV', 'IPP']
+    medias = total.medias()[indicadores].fillna(0).tolist()
+
+    fig = px.bar(x=indicadores, y=medias,
+                labels={'x': 'Indicador', 'y': 'Média'},
+                color=medias, color_continuous_scale='Viridis')
+    fig.update_layout(showlegend=False)
+    st.plotly_chart(fig, use_container_width=True)
@@ -0,0 +1,91 @@
+"""
+Datathon FIAP - Passos Mágicos
+Gancho opcional de profiling (cProfile / tracemalloc)
+
+Desligado por padrão: sem a variável de ambiente o custo é uma consulta ao
+ambiente na importação. Para ligar em produção:
+
+    PASSOS_PERFIL=cprofile              # um .prof por execução do script
+    PASSOS_PERFIL=tracemalloc           # pico de memória e maiores alocações
+    PASSOS_PERFIL=cprofile,tracemalloc
+    PASSOS_PERFIL_DIR=/tmp/perfis       # padrão: ./perfis
+
+Os arquivos .prof podem ser abertos com `python -m pstats` ou snakeviz.
+Apenas uma sessão é perfilada por vez; execuções concorrentes são ignoradas.
+
+Autor: Leandro Leme Crespo
+"""
+
+import cProfile
+import datetime
+import os
+import pathlib
+import re
+import threading
+import tracemalloc
+
+VARIAVEL = 'PASSOS_PERFIL'
+VARIAVEL_DIR = 'PASSOS_PERFIL_DIR'
+N_ALOCACOES = 25
+_CARACTERES_INVALIDOS = re.compile(r'[^\w-]+')
+
+
+class Perfilador:
+    """Perfila uma execução do script por vez e grava os resultados em disco"""
+
+    def __init__(self, modos, diretorio='perfis'):
+        self.modos = set(modos)
+        self.diretorio = pathlib.Path(diretorio)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def iniciar(self):
+        # Outra sessão já está sendo perfilada: esta execução segue sem profiling
+        if not self._lock.acquire(blocking=False):
+            self._local.ativo = False
+            return
+        self._local.ativo = True
+        self._local.perfil = None
+        if 'tracemalloc' in self.modos:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        if 'cprofile' in self.modos:
+            self._local.perfil = cProfile.Profile()
+            self._local.perfil.enable()
+
+    def finalizar(self, rotulo='app'):
+        """Para o profiling e grava `<data>-<rotulo>.prof` e/ou `.memoria.txt`"""
+        if not getattr(self._local, 'ativo', False):
+            return None
+        self._local.ativo = False
+        try:
+            self.diretorio.mkdir(parents=True, exist_ok=True)
+            carimbo = datetime.datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+            nome = _CARACTERES_INVALIDOS.sub('_', rotulo).strip('_')
+            base = self.diretorio / f"{carimbo}-{nome}"
+            if self._local.perfil is not None:
+                self._local.perfil.disable()
+                self._local.perfil.dump_stats(f'{base}.prof')
+            if 'tracemalloc' in self.modos:
+                atual, pico = tracemalloc.get_traced_memory()
+                maiores = tracemalloc.take_snapshot().statistics('lineno')[:N_ALOCACOES]
+                with open(f'{base}.memoria.txt', 'w', encoding='utf-8') as f:
+                    f.write(f"atual: {atual / 1e6:.2f} MB\npico: {pico / 1e6:.2f} MB\n\n")
+                    f.writelines(f"{estatistica}\n" for estatistica in maiores)
+            return base
+        finally:
+            self._lock.release()
+
+
+def perfilador_do_ambiente():
+    """Perfilador configurado por PASSOS_PERFIL, ou None se o profiling estiver desligado"""
+    modos = [m.strip().lower() for m in os.environ.get(VARIAVEL, '').split(',') if m.strip()]
+    modos = [m for m in modos if m in ('cprofile', 'tracemalloc')]
+    if not modos:
+        return None
+    return Perfilador(modos, os.environ.get(VARIAVEL_DIR, 'perfis'))
+
+
+# Instância única por processo (o script do Streamlit é reexecutado a cada interação)
+PERFILADOR = perfilador_do_ambiente()
@@ -0,0 +1,200 @@
+"""
+Datathon FIAP - Passos Mágicos
+Pontuação de risco em lote
+
+API sem Streamlit para pontuar coortes inteiras: codifica as colunas
+categóricas de uma vez, normaliza a matriz completa e executa
+`predict_proba` em blocos. A probabilidade sai calibrada pela tabela do
+modelo (ver `calibracao.py`). Opcionalmente inclui as contribuições de cada
+feature para o risco de cada aluno (ver `explicacao.py`). Categorias que o
+modelo não conhece são pontuadas com a categoria substituta e marcadas em
+CATEGORIAS_NOVAS; cada lote alimenta o monitor de deriva (ver `deriva.py`).
+
+Uso pela linha de comando:
+    python pontuacao.py alunos.xlsx resultado.csv [--explicar]
+
+Autor: Leandro Leme Crespo
+"""
+
+import io
+import os
+import pathlib
+import pickle
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import deriva
+from calibracao import calibrar
+from dados import harmonizar_colunas
+from explicacao import explicador_para, principais_fatores
+from instrumentacao import METRICAS
+from pacote_modelo import RegistroModelos
+from risco import TabelaCodificacao, limiares_modelo, niveis_risco
+
+TAMANHO_BLOCO = 50_000
+
+
+def carregar_artefatos(base_path=None):
+    """Carrega os pickles legados (modelo, scaler, encoders e metadados). Retorna (modelo, scaler, le_dict, info)"""
+    base_path = pathlib.Path(base_path) if base_path else pathlib.Path(__file__).parent
+    artefatos = []
+    for nome in ['modelo_risco_defasagem.pkl', 'scaler.pkl', 'label_encoders.pkl', 'modelo_info.pkl']:
+        with open(base_path / nome, 'rb') as f:
+            artefatos.append(pickle.load(f))
+    return tuple(artefatos)
+
+
+def carregar_modelo(registro=None):
+    """Carrega o pacote de modelo ativo ou, se não houver, os pickles legados"""
+    pacote = (registro or RegistroModelos()).atual()
+    if pacote is None:
+        return carregar_artefatos()
+    return pacote.modelo, pacote.escalonador, pacote.codificadores, pacote.info
+
+
+def ler_arquivo(arquivo, nome=None):
+    """Lê um arquivo CSV ou XLSX (caminho ou arquivo enviado). Abas de um XLSX são concatenadas"""
+    nome = nome or getattr(arquivo, 'name', str(arquivo))
+    if str(nome).lower().endswith('.csv'):
+        return pd.read_csv(arquivo)
+    abas = pd.read_excel(arquivo, sheet_name=None)
+    return pd.concat(abas.values(), ignore_index=True)
+
+
+def preparar_matriz(df, tabela, info, monitor=None):
+    """
+    Monta a matriz de features na ordem do modelo, codificando as colunas
+    categóricas com a `TabelaCodificacao` dos encoders.
+
+    Retorna (X, validas, novas): X contém apenas as linhas com todas as
+    features numéricas preenchidas; `validas` é a máscara booleana dessas
+    linhas no DataFrame original. Categorias desconhecidas pelos encoders
+    recebem o código substituto (ver `deriva.substitutos`) e `novas` traz,
+    por linha, as colunas e valores substituídos (None se nenhum). Com um
+    `monitor`, as linhas válidas entram nas contagens de deriva.
+    """
+    df = harmonizar_colunas(df)
+    faltantes = [c for c in info['features_numericas'] + info['features_categoricas']
+                 if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"Colunas ausentes no arquivo: {', '.join(faltantes)}")
+
+    numericas = df[info['features_numericas']].apply(pd.to_numeric, errors='coerce').to_numpy(float)
+    validas = ~np.isnan(numericas).any(axis=1)
+
+    substitutos = deriva.substitutos(info, tabela)
+    codificadas, categorias = [], {}
+    novas = np.full(len(df), None, dtype=object)
+    for col in info['features_categoricas']:
+        valores = df[col].astype(object).fillna('Desconhecido').astype(str).to_numpy()
+        codigos = tabela.codificar(col, valores)
+        desconhecidas = codigos < 0
+        if desconhecidas.any():
+            rotulos = col + ': ' + valores[desconhecidas].astype(object)
+            novas[desconhecidas] = [r if a is None else f'{a}; {r}' for a, r in zip(novas[desconhecidas], rotulos)]
+            if col in substitutos:
+                codigos = np.where(desconhecidas, substitutos[col], codigos)
+        validas &= codigos >= 0
+        codificadas.append(codigos)
+        categorias[col] = valores
+
+    X = np.column_stack([numericas] + codificadas)
+    if monitor is not None:
+        monitor.observar(numericas[validas], {col: v[validas] for col, v in categorias.items()})
+    return X[validas], validas, novas
+
+
+def nome_coluna(feature):
+    """Nome da coluna de origem de uma feature (sem o sufixo _ENC)"""
+    return feature[:-len('_ENC')] if feature.endswith('_ENC') else feature
+
+
+def pontuar_lote(df, modelo, scaler, le_dict, info, tamanho_bloco=TAMANHO_BLOCO, tabela=None,
+                 explicador=None, monitorar=True):
+    """
+    Calcula a probabilidade e o nível de risco para todas as linhas de `df`.
+
+    Retorna (resultado, estatisticas): uma cópia de `df` com as colunas
+    PROBABILIDADE_RISCO e NIVEL_RISCO (vazias para linhas que não puderam ser
+    pontuadas) e CATEGORIAS_NOVAS, e um dicionário com linhas, segundos e
+    linhas por segundo.
+    Com um `explicador`, inclui CONTRIB_<feature> (log-odds) e FATORES_PRINCIPAIS.
+    `monitorar=False` não soma o lote no monitor de deriva (ex.: a própria base de treino).
+    """
+    inicio = time.perf_counter()
+    tabela = tabela or TabelaCodificacao(le_dict)
+    monitor = deriva.monitor_para(info) if monitorar else None
+    X, validas, novas = preparar_matriz(df, tabela, info, monitor=monitor)
+
+    probs = np.empty(len(X))
+    contrib = np.empty((len(X), len(info['features'])))
+    if len(X) > 0:
+        X_scaled = scaler.transform(X)
+        for i in range(0, len(X_scaled), tamanho_bloco):
+            probs[i:i + tamanho_bloco] = modelo.predict_proba(X_scaled[i:i + tamanho_bloco])[:, 1]
+            if explicador is not None:
+                contrib[i:i + tamanho_bloco] = explicador.contribuicoes(X_scaled[i:i + tamanho_bloco])
+
+    resultado = df.copy()
+    prob_completa = np.full(len(df), np.nan)
+    prob_completa[validas] = calibrar(probs, info)
+    resultado['PROBABILIDADE_RISCO'] = prob_completa
+    resultado['NIVEL_RISCO'] = niveis_risco(prob_completa, limiares_modelo(info))
+    resultado['CATEGORIAS_NOVAS'] = novas
+    if explicador is not None:
+        nomes = [nome_coluna(f) for f in info['features']]
+        contrib_completa = np.full((len(df), len(nomes)), np.nan)
+        contrib_completa[validas] = contrib
+        for j, nome in enumerate(nomes):
+            resultado[f'CONTRIB_{nome}'] = contrib_completa[:, j]
+        fatores = np.full(len(df), None, dtype=object)
+        fatores[validas] = principais_fatores(contrib, nomes)
+        resultado['FATORES_PRINCIPAIS'] = fatores
+
+    segundos = time.perf_counter() - inicio
+    METRICAS.observar('passos_span_segundos', segundos, span='pontuar_lote')
+    METRICAS.incrementar('passos_linhas_processadas_total', len(df), origem='lote')
+    estatisticas = {
+        'linhas': len(df),
+        'linhas_pontuadas': int(validas.sum()),
+        'categorias_novas': int(pd.notna(novas).sum()),
+        'segundos': segundos,
+        'linhas_por_segundo': len(df) / segundos if segundos > 0 else float('inf'),
+    }
+    return resultado, estatisticas
+
+
+def exportar(resultado, formato='csv'):
+    """Serializa o resultado em bytes (CSV ou XLSX) para download"""
+    if formato == 'xlsx':
+        buffer = io.BytesIO()
+        resultado.to_excel(buffer, index=False)
+        return buffer.getvalue()
+    return resultado.to_csv(index=False).encode('utf-8')
+
+
+def main(argv):
+    explicar = '--explicar' in argv
+    argv = [a for a in argv if a != '--explicar']
+    if len(argv) != 3:
+        print(__doc__)
+        return 1
+    entrada, saida = argv[1], argv[2]
+    modelo, scaler, le_dict, info = carregar_modelo()
+    explicador = explicador_para(modelo) if explicar else None
+    resultado, estatisticas = pontuar_lote(ler_arquivo(entrada), modelo, scaler, le_dict, info,
+                                           explicador=explicador)
+    formato = 'xlsx' if saida.lower().endswith('.xlsx') else 'csv'
+    with open(saida, 'wb') as f:
+        f.write(exportar(resultado, formato))
+    print(f"{estatisticas['linhas_pontuadas']}/{estatisticas['linhas']} linhas pontuadas em "
+          f"{estatisticas['segundos']:.2f}s ({estatisticas['linhas_por_segundo']:,.0f} linhas/s) "
+          f"-> {os.path.abspath(saida)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
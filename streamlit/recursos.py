@@ -0,0 +1,149 @@
+"""
+Datathon FIAP - Passos Mágicos
+Recursos compartilhados pelas páginas do app (base, agregados, modelo e caches)
+
+Tudo é carregado no primeiro uso: cada página chama só o que precisa, e os
+resultados ficam em st.cache_resource, compartilhados entre sessões. A base é
+a mesma para todas as sessões e depende do Copy-on-Write do pandas, ligado em
+`app.py`.
+
+Autor: Leandro Leme Crespo
+"""
+
+import functools
+
+import pandas as pd
+import streamlit as st
+
+import compartilhado
+import pontuacao
+from cache_predicao import CachePredicao
+from explicacao import explicador_para
+from ingestao import BaseIncremental
+from instrumentacao import METRICAS, cache_instrumentado
+from lista_risco import ListaRisco, assinatura_base
+from pacote_modelo import RegistroModelos
+from tarefas import FilaTarefas
+from trajetoria import IndiceTrajetoria
+
+
+# Base tipada + agregados por ano PEDE (uma cópia por processo, somente leitura)
+@cache_instrumentado('base_pede', st.cache_resource)
+def base_pede():
+    """Carrega os dados do cache colunar (reconstruído a partir do Excel quando necessário)"""
+    try:
+        # Modo multiprocesso: anexa a base publicada (memory-map) em vez de carregá-la
+        base = BaseIncremental.carregar(publicada=compartilhado.anexar_do_ambiente())
+        if base is None:
+            st.error("Arquivo de dados não encontrado!")
+        return base
+    except Exception as e:
+        st.error(f"Erro ao carregar dados: {e}")
+        return None
+
+
+def estado_base():
+    """Foto atual (versão, base, agregados), já com os arquivos novos de `data/novos`"""
+    base = base_pede()
+    if base is None:
+        return None
+    with METRICAS.span('ingestao'):
+        return base.atualizar()
+
+
+def carregar_dados():
+    estado = estado_base()
+    return estado.df if estado else None
+
+
+# Estatísticas da EDA por (versão da base, anos, indicador): ao navegador vão só
+# bordas e contagens, nunca as linhas da base
+@cache_instrumentado('histograma', st.cache_data)
+def histograma(versao, anos, indicador, _agregados):
+    return _agregados.combinar(anos).histograma(indicador)
+
+
+@cache_instrumentado('correlacao', st.cache_data)
+def correlacao(versao, anos, _agregados):
+    agregado = _agregados.combinar(anos)
+    return agregado.correlacao() if agregado.linhas_completas > 0 else None
+
+
+# Registro do pacote de modelo ativo (compartilhado entre sessões, recarregado quando muda)
+@cache_instrumentado('registro_modelos', st.cache_resource)
+def registro_modelos():
+    return RegistroModelos()
+
+
+# Função para carregar modelo
+def carregar_modelo():
+    """Carrega o pacote de modelo ativo (ou os pickles legados, se não houver pacote)"""
+    try:
+        with METRICAS.span('carregar_modelo'):
+            return pontuacao.carregar_modelo(registro_modelos())
+    except FileNotFoundError:
+        return None, None, None, None
+    except Exception as e:
+        st.error(f"Erro ao carregar modelo: {e}")
+        return None, None, None, None
+
+
+# Cache de predições (compartilhado entre sessões)
+@cache_instrumentado('cache_predicoes', st.cache_resource)
+def cache_predicoes():
+    cache = CachePredicao()
+    METRICAS.registrar_coletor('cache_predicao', lambda: [
+        (f'passos_cache_predicao_{nome}', valor, {})
+        for nome, valor in cache.estatisticas().items()
+    ])
+    return cache
+
+
+# Explicador do modelo ativo (um por versão do pacote)
+@cache_instrumentado('explicador_modelo', st.cache_resource)
+def explicador_modelo(versao, _modelo):
+    return explicador_para(_modelo)
+
+
+# Fila de tarefas em segundo plano (uma por processo; o registro em SQLite é compartilhado)
+@cache_instrumentado('fila_tarefas', st.cache_resource)
+def fila_tarefas():
+    fila = FilaTarefas.padrao(carregar_modelo=functools.partial(pontuacao.carregar_modelo, registro_modelos()))
+    METRICAS.registrar_coletor('tarefas', lambda: [
+        ('passos_tarefas', n, {'estado': estado}) for estado, n in fila.contagem_por_estado().items()
+    ])
+    return fila
+
+
+@st.cache_data(max_entries=4, show_spinner="Gerando XLSX...")
+def xlsx_tarefa(id_tarefa, caminho):
+    return pontuacao.exportar(pd.read_csv(caminho), 'xlsx')
+
+
+# Índice longitudinal por RA (um por versão da base, compartilhado entre sessões)
+@cache_instrumentado('indice_trajetoria', st.cache_resource(max_entries=2))
+def indice_trajetoria(versao, _df):
+    return IndiceTrajetoria.da_base(_df)
+
+
+# Assinatura do conteúdo da base (uma por versão em memória): chave da lista em SQLite
+@cache_instrumentado('assinatura_base', st.cache_resource(max_entries=2))
+def chave_base(versao, _df):
+    return assinatura_base(_df)
+
+
+# Lista de alunos em risco em SQLite, reconstruída quando a base ou o modelo mudam
+@cache_instrumentado('lista_risco', st.cache_resource(max_entries=2))
+def lista_risco(chave, versao_modelo, _df):
+    modelo, scaler, le_dict, info = carregar_modelo()
+    lista = ListaRisco.padrao()
+    with METRICAS.span('lista_risco'):
+        lista.atualizar(_df, modelo, scaler, le_dict, info, explicador_modelo(versao_modelo, modelo),
+                        assinatura=chave)
+    return lista
+
+
+# Contagem por nível de um filtro da lista (a página só busca as linhas que mostra)
+@cache_instrumentado('contagem_lista', st.cache_data(max_entries=64))
+def contagem_lista(chave, versao_modelo, filtros, _lista):
+    return _lista.contar_por_nivel(filtros)
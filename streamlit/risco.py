@@ -0,0 +1,79 @@
+"""
+Datathon FIAP - Passos Mágicos
+Classificação de risco vetorizada
+
+Níveis de risco por probabilidade, classe de risco por defasagem e
+codificação das variáveis categóricas, todos operando sobre arrays inteiros.
+As funções escalares são apenas atalhos para as versões vetorizadas.
+
+Autor: Leandro Leme Crespo
+"""
+
+import numpy as np
+import pandas as pd
+
+# Limites superiores (exclusivos) de cada nível: < 30%, 30% - 60%, 60% - 85%, > 85%.
+# O treino grava os limiares com o modelo (ver `limiares_modelo`); estes valem para pickles antigos
+LIMIARES = np.array([0.30, 0.60, 0.85])
+NIVEIS = ['Sem Risco', 'Atenção', 'Risco Moderado', 'Risco Alto']
+EMOJIS = ['✅', '⚡', '⚠️', '🚨']
+CLASSES_CSS = ['risk-low', 'risk-attention', 'risk-moderate', 'risk-high']
+
+
+def limiares_modelo(info):
+    """Limiares dos níveis gravados com o modelo (tabela de calibração); sem eles, `LIMIARES`"""
+    tabela = (info or {}).get('calibracao') or {}
+    return np.asarray(tabela.get('limiares', LIMIARES), dtype=float)
+
+
+def codigos_nivel(probs, limiares=LIMIARES):
+    """Índice do nível de risco (0 a 3) para cada probabilidade; -1 para valores ausentes"""
+    probs = np.asarray(probs, dtype=float)
+    codigos = np.searchsorted(np.asarray(limiares, dtype=float), probs, side='right')
+    return np.where(np.isnan(probs), -1, codigos)
+
+
+def niveis_risco(probs, limiares=LIMIARES):
+    """Níveis de risco como Categorical ordenado (NaN para probabilidades ausentes)"""
+    return pd.Categorical.from_codes(codigos_nivel(probs, limiares), categories=NIVEIS, ordered=True)
+
+
+def classificar_nivel_risco(prob, limiares=LIMIARES):
+    """Classifica o nível de risco baseado na probabilidade"""
+    i = int(codigos_nivel([prob], limiares)[0])
+    return NIVEIS[i], EMOJIS[i], CLASSES_CSS[i]
+
+
+def alvo_risco(defasagem):
+    """Variável alvo: 1 = Com Risco (defasagem < 0), 0 = Sem Risco, NaN se ausente"""
+    d = pd.to_numeric(pd.Series(defasagem), errors='coerce').to_numpy(float)
+    return np.select([np.isnan(d), d < 0], [np.nan, 1.0], default=0.0)
+
+
+def classe_risco(defasagem):
+    """Classe de risco ('Sem Risco' / 'Com Risco') por defasagem, preservando o índice"""
+    serie = defasagem if isinstance(defasagem, pd.Series) else pd.Series(defasagem)
+    alvo = alvo_risco(serie)
+    codigos = np.where(np.isnan(alvo), -1, alvo).astype(int)
+    return pd.Series(pd.Categorical.from_codes(codigos, categories=['Sem Risco', 'Com Risco']),
+                     index=serie.index)
+
+
+class TabelaCodificacao:
+    """
+    Tabela pré-computada com os códigos dos LabelEncoders.
+
+    `codificar` usa um índice hash para um array inteiro de valores e
+    devolve -1 para categorias desconhecidas, em vez de levantar exceção.
+    """
+
+    def __init__(self, le_dict):
+        self.indices = {col: pd.Index(le.classes_) for col, le in le_dict.items()}
+        self.mapas = {col: {v: i for i, v in enumerate(idx)} for col, idx in self.indices.items()}
+
+    def codificar(self, col, valores):
+        valores = pd.Series(valores).astype(object).fillna('Desconhecido').astype(str)
+        return self.indices[col].get_indexer(valores)
+
+    def codigo(self, col, valor):
+        return self.mapas[col].get(valor, -1)
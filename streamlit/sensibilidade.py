@@ -0,0 +1,100 @@
+"""
+Datathon FIAP - Passos Mágicos
+Análise de sensibilidade de uma predição (what-if)
+
+Em vez de mexer em um slider por vez e pontuar de novo, monta uma grade com o
+aluno informado variando uma feature de cada vez — todos os valores dos
+sliders (passo 0.1 nos indicadores e notas, 1 em idade e ano de ingresso) e
+todas as categorias conhecidas pelos encoders — e pontua a grade inteira em
+uma única chamada de `predict_proba`. Daí saem:
+    - a curva de dependência de cada feature para este aluno (as demais fixas)
+    - a menor mudança em cada feature numérica que leva o risco abaixo de 60%
+
+Autor: Leandro Leme Crespo
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from calibracao import calibrar
+from instrumentacao import METRICAS
+from risco import LIMIARES
+
+# (mínimo, máximo, passo) dos sliders da página de predição
+FAIXAS = {'IDADE': (6, 25, 1), 'ANO INGRESSO': (2015, 2025, 1)}
+FAIXA_PADRAO = (0.0, 10.0, 0.1)
+# Início do nível "Risco Moderado"
+LIMIAR_ALVO = float(LIMIARES[1])
+
+
+@dataclass(frozen=True)
+class Sensibilidade:
+    probabilidade: float
+    curvas: dict            # feature -> DataFrame (valor, probabilidade)
+    abaixo_do_limiar: pd.DataFrame
+    linhas_pontuadas: int
+
+
+def valores_feature(feature):
+    minimo, maximo, passo = FAIXAS.get(feature, FAIXA_PADRAO)
+    return np.round(np.arange(minimo, maximo + passo / 2, passo), 6)
+
+
+def montar_grade(x, info, tabela):
+    """
+    Matriz de features com o aluno `x` (11 valores, categóricas codificadas)
+    variando uma feature por linha. Retorna (grade, blocos) com blocos =
+    [(feature, valores exibidos, fatia da grade)].
+    """
+    x = np.asarray(x, dtype=float).ravel()
+    partes, blocos, inicio = [], [], 0
+    for j, feature in enumerate(info['features']):
+        if feature in info['features_numericas']:
+            codigos = valores = valores_feature(feature)
+        else:
+            coluna = feature[:-len('_ENC')]
+            valores = np.asarray(tabela.indices[coluna])
+            codigos = np.arange(len(valores), dtype=float)
+        bloco = np.repeat(x[None, :], len(codigos), axis=0)
+        bloco[:, j] = codigos
+        partes.append(bloco)
+        blocos.append((feature, valores, slice(inicio, inicio + len(codigos))))
+        inicio += len(codigos)
+    return np.vstack(partes), blocos
+
+
+def menor_mudanca(valores, probs, atual, limiar=LIMIAR_ALVO):
+    """Valor mais próximo do atual com probabilidade abaixo do limiar (None se nenhum)"""
+    abaixo = np.flatnonzero(probs < limiar)
+    if len(abaixo) == 0:
+        return None
+    i = abaixo[np.argmin(np.abs(valores[abaixo] - atual))]
+    return float(valores[i]), float(probs[i])
+
+
+def analisar(x, modelo, scaler, info, tabela, limiar=LIMIAR_ALVO):
+    """Curvas e respostas "o que deixaria o aluno abaixo do limiar", com uma chamada ao modelo"""
+    x = np.asarray(x, dtype=float).ravel()
+    grade, blocos = montar_grade(x, info, tabela)
+    with METRICAS.span('sensibilidade'):
+        probs = calibrar(modelo.predict_proba(scaler.transform(np.vstack([x[None, :], grade])))[:, 1], info)
+    atual, probs = float(probs[0]), probs[1:]
+
+    curvas, respostas = {}, []
+    for j, (feature, valores, fatia) in enumerate(blocos):
+        nome = feature[:-len('_ENC')] if feature.endswith('_ENC') else feature
+        curvas[nome] = pd.DataFrame({'valor': valores, 'probabilidade': probs[fatia]})
+        if feature in info['features_numericas'] and atual >= limiar:
+            mudanca = menor_mudanca(valores, probs[fatia], x[j], limiar)
+            if mudanca is not None:
+                respostas.append({'Feature': nome, 'Atual': x[j], 'Novo valor': mudanca[0],
+                                  'Variação': mudanca[0] - x[j], 'Probabilidade': mudanca[1]})
+
+    abaixo = pd.DataFrame(respostas, columns=['Feature', 'Atual', 'Novo valor', 'Variação', 'Probabilidade'])
+    # Menores mudanças primeiro, relativas à faixa de cada feature (idade e notas têm escalas diferentes)
+    amplitude = abaixo['Feature'].map(lambda f: np.ptp(valores_feature(f)))
+    abaixo = abaixo.iloc[np.argsort((abaixo['Variação'].abs() / amplitude).to_numpy(), kind='stable')]
+    abaixo = abaixo.reset_index(drop=True)
+    return Sensibilidade(atual, curvas, abaixo, len(grade) + 1)
@@ -0,0 +1,250 @@
+"""
+Datathon FIAP - Passos Mágicos
+Serviço HTTP de predição de risco (ASGI)
+
+Aplicação ASGI mínima, sem framework, que mantém o modelo carregado em
+memória e responde sem passar pelo Streamlit. Categorias que o modelo não
+conhece são pontuadas com a categoria substituta e listadas no resultado do
+aluno em "categorias_novas"; cada requisição alimenta o monitor de deriva.
+
+Rotas:
+    GET  /saude           status e versão do modelo
+    POST /predicao        um aluno (objeto JSON com as 11 features)
+    POST /predicao/lote   {"alunos": [...]} com vários alunos
+    GET  /metricas        latência p50/p99 por rota
+    GET  /metrics         métricas no formato texto do Prometheus
+
+Execução:
+    cd streamlit
+    uvicorn servico:app --host 0.0.0.0 --port 8000
+
+Autor: Leandro Leme Crespo
+"""
+
+import asyncio
+import collections
+import json
+import threading
+import time
+
+import numpy as np
+
+import deriva
+from calibracao import calibrar
+from instrumentacao import METRICAS
+from pacote_modelo import RegistroModelos
+from pontuacao import carregar_artefatos
+from risco import TabelaCodificacao, codigos_nivel, limiares_modelo, NIVEIS
+
+JANELA_LATENCIA = 10_000
+
+
+class ErroRequisicao(Exception):
+    """Erro de validação da requisição (HTTP 4xx)"""
+
+    def __init__(self, mensagem, status=422):
+        super().__init__(mensagem)
+        self.status = status
+
+
+class Latencias:
+    """Janela deslizante das últimas latências (ms) por rota"""
+
+    def __init__(self, tamanho=JANELA_LATENCIA):
+        self.tamanho = tamanho
+        self.janelas = collections.defaultdict(lambda: collections.deque(maxlen=self.tamanho))
+        self.totais = collections.Counter()
+        self.lock = threading.Lock()
+
+    def registrar(self, rota, ms):
+        with self.lock:
+            self.janelas[rota].append(ms)
+            self.totais[rota] += 1
+
+    def resumo(self):
+        with self.lock:
+            janelas = {rota: np.fromiter(j, dtype=float) for rota, j in self.janelas.items()}
+            totais = dict(self.totais)
+        resumo = {}
+        for rota, ms in janelas.items():
+            p50, p99 = np.percentile(ms, [50, 99]) if len(ms) else (0.0, 0.0)
+            resumo[rota] = {'requisicoes': totais[rota], 'p50_ms': round(float(p50), 3),
+                            'p99_ms': round(float(p99), 3)}
+        return resumo
+
+
+class Preditor:
+    """Modelo, scaler e tabela de codificação mantidos em memória"""
+
+    def __init__(self, modelo, scaler, le_dict, info):
+        self.modelo, self.scaler, self.info = modelo, scaler, info
+        self.versao = info.get('versao')
+        self.tabela = TabelaCodificacao(le_dict)
+        self.substitutos = deriva.substitutos(info, self.tabela)
+        self.monitor = deriva.monitor_para(info)
+
+    def matriz(self, alunos):
+        """Retorna (X, novas): `novas[i]` lista as categorias do aluno i trocadas pela substituta"""
+        numericas = self.info['features_numericas']
+        categoricas = self.info['features_categoricas']
+        X = np.empty((len(alunos), len(numericas) + len(categoricas)))
+        novas = [[] for _ in alunos]
+        valores = {col: [] for col in categoricas}
+        for i, aluno in enumerate(alunos):
+            if not isinstance(aluno, dict):
+                raise ErroRequisicao(f"aluno {i}: esperado um objeto JSON")
+            try:
+                X[i, :len(numericas)] = [float(aluno[c]) for c in numericas]
+            except KeyError as e:
+                raise ErroRequisicao(f"aluno {i}: campo obrigatório ausente: {e.args[0]}")
+            except (TypeError, ValueError):
+                raise ErroRequisicao(f"aluno {i}: features numéricas devem ser números")
+            for j, col in enumerate(categoricas, start=len(numericas)):
+                valor = aluno.get(col)
+                valor = 'Desconhecido' if valor is None else str(valor)
+                codigo = self.tabela.codigo(col, valor)
+                if codigo < 0:
+                    if col not in self.substitutos:
+                        raise ErroRequisicao(f"aluno {i}: valor desconhecido para {col}: {valor!r}")
+                    codigo = self.substitutos[col]
+                    novas[i].append(f"{col}: {valor}")
+                valores[col].append(valor)
+                X[i, j] = codigo
+        if np.isnan(X).any():
+            raise ErroRequisicao("features numéricas não podem ser nulas")
+        if self.monitor is not None:
+            self.monitor.observar(X[:, :len(numericas)], valores)
+        return X, novas
+
+    def prever(self, alunos):
+        if not alunos:
+            return []
+        X, novas = self.matriz(alunos)
+        with METRICAS.span('modelo', origem='servico'):
+            probs = calibrar(self.modelo.predict_proba(self.scaler.transform(X))[:, 1], self.info)
+        METRICAS.incrementar('passos_linhas_processadas_total', len(alunos), origem='servico')
+        resultados = [{'probabilidade': float(p), 'nivel': NIVEIS[c]}
+                      for p, c in zip(probs, codigos_nivel(probs, limiares_modelo(self.info)))]
+        for resultado, categorias in zip(resultados, novas):
+            if categorias:
+                resultado['categorias_novas'] = categorias
+        return resultados
+
+
+async def _ler_corpo(receive):
+    corpo = b''
+    while True:
+        mensagem = await receive()
+        corpo += mensagem.get('body', b'')
+        if not mensagem.get('more_body'):
+            return corpo
+
+
+class Texto(str):
+    """Resposta em texto puro (não JSON)"""
+
+
+async def _responder(send, status, dados):
+    if isinstance(dados, Texto):
+        corpo, tipo = dados.encode('utf-8'), b'text/plain; version=0.0.4; charset=utf-8'
+    else:
+        corpo, tipo = json.dumps(dados, ensure_ascii=False).encode('utf-8'), b'application/json; charset=utf-8'
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', tipo),
+                            (b'content-length', str(len(corpo)).encode())]})
+    await send({'type': 'http.response.body', 'body': corpo})
+
+
+class ServicoPredicao:
+    """Aplicação ASGI do serviço de predição"""
+
+    def __init__(self, dir_modelos=None):
+        self.registro = RegistroModelos(dir_modelos) if dir_modelos else RegistroModelos()
+        self.preditor = None
+        self.latencias = Latencias()
+
+    def carregar(self):
+        """Preditor do pacote ativo; troca automaticamente quando uma nova versão é publicada"""
+        pacote = self.registro.atual()
+        if pacote is None:
+            if self.preditor is None:
+                # Sem pacote publicado: usa os pickles legados
+                modelo, scaler, le_dict, info = carregar_artefatos()
+                self.preditor = Preditor(modelo, scaler, le_dict, info)
+        elif self.preditor is None or self.preditor.versao != pacote.versao:
+            self.preditor = Preditor(pacote.modelo, pacote.escalonador, pacote.codificadores, pacote.info)
+        return self.preditor
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            mensagem = await receive()
+            if mensagem['type'] == 'lifespan.startup':
+                try:
+                    # Carrega o modelo antes da primeira requisição (modelo "quente")
+                    await asyncio.to_thread(self.carregar)
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif mensagem['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        inicio = time.perf_counter()
+        rota = (scope['method'], scope['path'].rstrip('/') or '/')
+        try:
+            status, dados = await self._rotear(rota, receive)
+        except ErroRequisicao as e:
+            status, dados = e.status, {'erro': str(e)}
+        except Exception as e:
+            status, dados = 500, {'erro': f"erro interno: {e}"}
+        await _responder(send, status, dados)
+        # Rotas inexistentes são agregadas para não criar uma janela por URL
+        chave = f"{rota[0]} {rota[1]}" if status != 404 else 'outras'
+        segundos = time.perf_counter() - inicio
+        self.latencias.registrar(chave, segundos * 1000)
+        METRICAS.observar('passos_http_segundos', segundos, rota=chave, status=status)
+
+    async def _rotear(self, rota, receive):
+        if rota == ('GET', '/saude'):
+            # A troca de versão (checksums, memory-map) roda fora do event loop
+            info = (await asyncio.to_thread(self.carregar)).info
+            return 200, {'status': 'ok', 'modelo': info['modelo_nome'], 'versao': info.get('versao'),
+                         'features': info['features']}
+        if rota == ('GET', '/metricas'):
+            return 200, self.latencias.resumo()
+        if rota == ('GET', '/metrics'):
+            return 200, Texto(METRICAS.texto_prometheus())
+        if rota == ('POST', '/predicao'):
+            aluno = await self._json(receive)
+            preditor = await asyncio.to_thread(self.carregar)
+            return 200, preditor.prever([aluno])[0]
+        if rota == ('POST', '/predicao/lote'):
+            corpo = await self._json(receive)
+            alunos = corpo.get('alunos') if isinstance(corpo, dict) else None
+            if not isinstance(alunos, list):
+                raise ErroRequisicao('esperado {"alunos": [...]}')
+            inicio = time.perf_counter()
+            # Lotes grandes rodam fora do event loop para não bloquear outras requisições
+            preditor = await asyncio.to_thread(self.carregar)
+            resultados = await asyncio.to_thread(preditor.prever, alunos)
+            segundos = time.perf_counter() - inicio
+            return 200, {'resultados': resultados, 'linhas': len(alunos),
+                         'linhas_por_segundo': len(alunos) / segundos if segundos > 0 else None}
+        raise ErroRequisicao('rota não encontrada', status=404)
+
+    async def _json(self, receive):
+        try:
+            return json.loads(await _ler_corpo(receive))
+        except ValueError:
+            raise ErroRequisicao('corpo da requisição não é um JSON válido', status=400)
+
+
+app = ServicoPredicao()
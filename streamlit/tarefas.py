@@ -0,0 +1,386 @@
+"""
+Datathon FIAP - Passos Mágicos
+Tarefas de pontuação em segundo plano (fila com registro em SQLite)
+
+Lotes grandes não rodam mais dentro do script do Streamlit: a página grava a
+entrada em disco, registra a tarefa e volta na hora. Uma planilha XLSX é
+convertida para CSV uma única vez, na submissão, e a execução (inclusive a
+retomada) sempre lê o CSV em blocos. Um pool de threads lê a entrada em blocos, pontua cada bloco com `pontuar_lote` (com ou sem as
+contribuições das features) e acrescenta o resultado ao CSV de saída; nada é
+acumulado em memória além de um bloco.
+
+O progresso de cada tarefa (linhas processadas, bytes já gravados, contagem por
+nível de risco) é registrado no SQLite a cada bloco. Assim a página acompanha a
+tarefa depois de recarregar (o id fica na URL) e, se o processo cair, a tarefa
+é retomada do último bloco gravado quando a fila é aberta de novo.
+
+Uso pela linha de comando:
+    python tarefas.py                 # lista as tarefas recentes
+    python tarefas.py cancelar <id>
+
+Autor: Leandro Leme Crespo
+"""
+
+import collections
+import concurrent.futures
+import contextlib
+import datetime
+import json
+import os
+import pathlib
+import shutil
+import sqlite3
+import sys
+import threading
+import uuid
+
+import pandas as pd
+
+import dados
+import pontuacao
+from explicacao import explicador_para
+from instrumentacao import METRICAS
+from pontuacao import ler_arquivo, pontuar_lote
+from risco import TabelaCodificacao
+
+TAMANHO_BLOCO = 5_000
+MAX_WORKERS = 2
+RETENCAO_DIAS = 7
+NOME_BANCO = 'tarefas.sqlite'
+TIPOS = ('pontuacao', 'explicacao')
+ESTADOS = ('pendente', 'executando', 'concluida', 'falhou', 'cancelada')
+ATIVOS = ('pendente', 'executando')
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS tarefas (
+    id TEXT PRIMARY KEY,
+    tipo TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    nome TEXT,
+    entrada TEXT NOT NULL,
+    saida TEXT NOT NULL,
+    versao_modelo TEXT,
+    pid INTEGER,
+    dono TEXT,
+    total INTEGER,
+    processadas INTEGER NOT NULL DEFAULT 0,
+    pontuadas INTEGER NOT NULL DEFAULT 0,
+    bytes_saida INTEGER NOT NULL DEFAULT 0,
+    niveis TEXT NOT NULL DEFAULT '{}',
+    erro TEXT,
+    criada_em TEXT NOT NULL,
+    atualizada_em TEXT NOT NULL
+)
+"""
+
+
+class TarefaCancelada(Exception):
+    pass
+
+
+def _agora():
+    return datetime.datetime.now().isoformat(timespec='seconds')
+
+
+# Fichas das filas abertas neste processo (ver `FilaTarefas.dono`)
+_DONOS = set()
+
+
+def _dono_vivo(pid, dono):
+    """
+    Se a fila que assumiu a tarefa ainda existe. No mesmo PID vale a ficha: o
+    app reiniciado num contêiner costuma receber o PID do processo anterior.
+    """
+    if not pid:
+        return False
+    if pid == os.getpid():
+        return dono in _DONOS
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def _converter_csv(origem, pasta):
+    """Grava uma planilha XLSX como entrada.csv da tarefa (lida uma vez só) e retorna o caminho"""
+    entrada = pasta / 'entrada.csv'
+    ler_arquivo(origem, nome='entrada.xlsx').to_csv(entrada, index=False)
+    return entrada
+
+
+def _blocos(entrada, tamanho):
+    """Itera o CSV de entrada em DataFrames de até `tamanho` linhas, sem carregá-lo inteiro"""
+    yield from pd.read_csv(entrada, chunksize=tamanho)
+
+
+def _contar_linhas(entrada):
+    return sum(len(b) for b in pd.read_csv(entrada, usecols=[0], chunksize=100_000))
+
+
+class FilaTarefas:
+    """
+    Registro das tarefas em SQLite + pool de threads que as executa.
+
+    `carregar_modelo()` devolve (modelo, scaler, le_dict, info) do modelo ativo
+    no momento em que cada tarefa começa (padrão: `pontuacao.carregar_modelo`).
+    """
+
+    def __init__(self, diretorio, carregar_modelo=None, max_workers=MAX_WORKERS,
+                 tamanho_bloco=TAMANHO_BLOCO, retomar=True):
+        self.diretorio = pathlib.Path(diretorio)
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        self.banco = self.diretorio / NOME_BANCO
+        self.carregar_modelo = carregar_modelo or pontuacao.carregar_modelo
+        self.tamanho_bloco = tamanho_bloco
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers, thread_name_prefix='tarefa')
+        self._futuros = {}
+        self._lock = threading.Lock()
+        # Ficha desta fila, gravada com o pid em cada tarefa que ela assume
+        self.dono = uuid.uuid4().hex
+        _DONOS.add(self.dono)
+        with self._conexao() as con:
+            con.execute(ESQUEMA)
+            # Bancos criados antes da coluna dono
+            if 'dono' not in {r['name'] for r in con.execute('PRAGMA table_info(tarefas)')}:
+                con.execute('ALTER TABLE tarefas ADD COLUMN dono TEXT')
+        self.limpar_antigas()
+        if retomar:
+            self.retomar_interrompidas()
+
+    @classmethod
+    def padrao(cls, planilha=None, **kwargs):
+        """Fila em data/cache/tarefas (ao lado do cache colunar da base)"""
+        planilha = pathlib.Path(planilha) if planilha else dados.localizar_planilha()
+        raiz = planilha.parent if planilha else pathlib.Path(__file__).parent
+        return cls(raiz / 'cache' / 'tarefas', **kwargs)
+
+    @contextlib.contextmanager
+    def _conexao(self):
+        # Uma conexão por operação: as threads do pool e as sessões não compartilham cursor
+        con = sqlite3.connect(self.banco, timeout=30)
+        con.row_factory = sqlite3.Row
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def _atualizar(self, id_tarefa, **campos):
+        """
+        Atualiza uma tarefa ainda ativa; um cancelamento gravado nesse meio-tempo
+        prevalece. Retorna False se a tarefa não estava mais ativa.
+        """
+        campos['atualizada_em'] = _agora()
+        atribuicoes = ', '.join(f'{c} = ?' for c in campos)
+        with self._conexao() as con:
+            return con.execute(f"UPDATE tarefas SET {atribuicoes} "
+                               f"WHERE id = ? AND estado IN ('pendente', 'executando')",
+                               (*campos.values(), id_tarefa)).rowcount > 0
+
+    # ---------- consulta ----------
+
+    def obter(self, id_tarefa):
+        """Tarefa como dicionário (com `niveis` decodificado), ou None"""
+        with self._conexao() as con:
+            linha = con.execute('SELECT * FROM tarefas WHERE id = ?', (id_tarefa,)).fetchone()
+        if linha is None:
+            return None
+        tarefa = dict(linha)
+        tarefa['niveis'] = json.loads(tarefa['niveis'])
+        tarefa['progresso'] = tarefa['processadas'] / tarefa['total'] if tarefa['total'] else 0.0
+        return tarefa
+
+    def listar(self, limite=20):
+        with self._conexao() as con:
+            ids = [r['id'] for r in con.execute(
+                'SELECT id FROM tarefas ORDER BY criada_em DESC LIMIT ?', (limite,))]
+        return [self.obter(i) for i in ids]
+
+    def contagem_por_estado(self):
+        with self._conexao() as con:
+            contagem = dict(con.execute('SELECT estado, COUNT(*) FROM tarefas GROUP BY estado').fetchall())
+        return {estado: contagem.get(estado, 0) for estado in ESTADOS}
+
+    # ---------- submissão ----------
+
+    def submeter(self, origem, tipo='pontuacao', nome=None):
+        """
+        Grava a entrada (arquivo enviado, caminho ou DataFrame) no diretório da
+        tarefa como CSV, registra e agenda. Retorna o id.
+        """
+        if tipo not in TIPOS:
+            raise ValueError(f"tipo de tarefa inválido: {tipo}")
+        id_tarefa = uuid.uuid4().hex[:12]
+        pasta = self.diretorio / id_tarefa
+        pasta.mkdir()
+        if isinstance(origem, pd.DataFrame):
+            entrada = pasta / 'entrada.csv'
+            origem.to_csv(entrada, index=False)
+            nome = nome or 'base.csv'
+        else:
+            nome = nome or getattr(origem, 'name', str(origem))
+            if hasattr(origem, 'read'):
+                origem.seek(0)
+            if pathlib.Path(nome).suffix.lower() in ('', '.csv'):
+                entrada = pasta / 'entrada.csv'
+                if hasattr(origem, 'read'):
+                    with open(entrada, 'wb') as f:
+                        shutil.copyfileobj(origem, f)
+                else:
+                    shutil.copyfile(origem, entrada)
+            else:
+                entrada = _converter_csv(origem, pasta)
+
+        agora = _agora()
+        with self._conexao() as con:
+            con.execute(
+                'INSERT INTO tarefas (id, tipo, estado, nome, entrada, saida, criada_em, atualizada_em) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (id_tarefa, tipo, 'pendente', nome, str(entrada), str(pasta / 'resultado.csv'), agora, agora))
+        self._agendar(id_tarefa)
+        return id_tarefa
+
+    def cancelar(self, id_tarefa):
+        """Marca para cancelar; a execução para no próximo bloco"""
+        with self._conexao() as con:
+            con.execute("UPDATE tarefas SET estado = 'cancelada', atualizada_em = ? "
+                        "WHERE id = ? AND estado IN ('pendente', 'executando')", (_agora(), id_tarefa))
+
+    def limpar_antigas(self, dias=RETENCAO_DIAS):
+        """Apaga registro e arquivos das tarefas encerradas há mais de `dias` dias"""
+        limite = (datetime.datetime.now() - datetime.timedelta(days=dias)).isoformat(timespec='seconds')
+        with self._conexao() as con:
+            ids = [r['id'] for r in con.execute(
+                "SELECT id FROM tarefas WHERE estado NOT IN ('pendente', 'executando') AND atualizada_em < ?",
+                (limite,))]
+            con.executemany('DELETE FROM tarefas WHERE id = ?', [(i,) for i in ids])
+        for id_tarefa in ids:
+            shutil.rmtree(self.diretorio / id_tarefa, ignore_errors=True)
+        return ids
+
+    def retomar_interrompidas(self):
+        """Reagenda tarefas ativas cuja fila dona não existe mais (reinício do app)"""
+        with self._conexao() as con:
+            linhas = con.execute(
+                "SELECT id, pid, dono FROM tarefas WHERE estado IN ('pendente', 'executando')").fetchall()
+        retomadas = []
+        for r in linhas:
+            if _dono_vivo(r['pid'], r['dono']):
+                continue
+            # Vários workers podem abrir a fila ao mesmo tempo: só um assume cada tarefa
+            with self._conexao() as con:
+                assumiu = con.execute('UPDATE tarefas SET pid = ?, dono = ? WHERE id = ? AND pid IS ? AND dono IS ?',
+                                      (os.getpid(), self.dono, r['id'], r['pid'], r['dono'])).rowcount
+            if assumiu:
+                self._agendar(r['id'])
+                retomadas.append(r['id'])
+        return retomadas
+
+    def _agendar(self, id_tarefa):
+        with self._lock:
+            futuro = self._futuros.get(id_tarefa)
+            if futuro is not None and not futuro.done():
+                return
+            self._atualizar(id_tarefa, pid=os.getpid(), dono=self.dono)
+            self._futuros[id_tarefa] = self._executor.submit(self._executar, id_tarefa)
+
+    # ---------- execução ----------
+
+    def _executar(self, id_tarefa):
+        tarefa = self.obter(id_tarefa)
+        if tarefa is None or tarefa['estado'] not in ATIVOS:
+            return
+        try:
+            with METRICAS.span('tarefa', tipo=tarefa['tipo']):
+                self._processar(tarefa)
+        except TarefaCancelada:
+            pass
+        except Exception as e:
+            self._atualizar(id_tarefa, estado='falhou', erro=f"{type(e).__name__}: {e}")
+
+    def _processar(self, tarefa):
+        id_tarefa = tarefa['id']
+        entrada, saida = pathlib.Path(tarefa['entrada']), pathlib.Path(tarefa['saida'])
+        if entrada.suffix.lower() != '.csv':
+            # Tarefas submetidas antes da conversão na submissão ainda guardam o XLSX
+            entrada = _converter_csv(entrada, entrada.parent)
+            if not self._atualizar(id_tarefa, entrada=str(entrada)):
+                raise TarefaCancelada(id_tarefa)
+        modelo, scaler, le_dict, info = self.carregar_modelo()
+        if modelo is None:
+            raise RuntimeError("modelo não carregado")
+        versao = info.get('versao', 'legado')
+        explicador = explicador_para(modelo) if tarefa['tipo'] == 'explicacao' else None
+        tabela = TabelaCodificacao(le_dict)
+
+        # Retomada só com o mesmo modelo; senão recomeça do zero
+        if tarefa['versao_modelo'] not in (None, versao):
+            tarefa.update(processadas=0, pontuadas=0, bytes_saida=0, niveis={})
+        processadas, pontuadas = tarefa['processadas'], tarefa['pontuadas']
+        niveis = collections.Counter(tarefa['niveis'])
+        total = tarefa['total'] if tarefa['total'] is not None else _contar_linhas(entrada)
+        if not self._atualizar(id_tarefa, estado='executando', versao_modelo=versao, total=total,
+                               processadas=processadas, pontuadas=pontuadas, bytes_saida=tarefa['bytes_saida'],
+                               niveis=json.dumps(niveis)):
+            raise TarefaCancelada(id_tarefa)
+
+        # Descarta o que foi gravado depois do último bloco registrado
+        with open(saida, 'ab') as f:
+            f.truncate(tarefa['bytes_saida'])
+
+        linha = 0  # linhas da entrada já percorridas
+        for bloco in _blocos(entrada, self.tamanho_bloco):
+            inicio, linha = linha, linha + len(bloco)
+            if linha <= processadas:
+                continue
+            if self.obter(id_tarefa)['estado'] == 'cancelada':
+                raise TarefaCancelada(id_tarefa)
+            bloco = bloco.iloc[max(processadas - inicio, 0):]
+            resultado, estatisticas = pontuar_lote(bloco, modelo, scaler, le_dict, info, tabela=tabela,
+                                                   explicador=explicador)
+            with open(saida, 'ab') as f:
+                resultado.to_csv(f, index=False, header=processadas == 0)
+                bytes_saida = f.tell()
+            processadas = linha
+            pontuadas += estatisticas['linhas_pontuadas']
+            niveis.update(resultado['NIVEL_RISCO'].dropna().value_counts().to_dict())
+            self._atualizar(id_tarefa, processadas=processadas, pontuadas=pontuadas,
+                            bytes_saida=bytes_saida, niveis=json.dumps(niveis))
+
+        with self._conexao() as con:
+            con.execute("UPDATE tarefas SET estado = 'concluida', total = ?, atualizada_em = ? "
+                        "WHERE id = ? AND estado = 'executando'", (processadas, _agora(), id_tarefa))
+
+    def aguardar(self, id_tarefa, timeout=None):
+        """Bloqueia até a tarefa terminar nesta instância (uso em scripts)"""
+        futuro = self._futuros.get(id_tarefa)
+        if futuro is not None:
+            futuro.result(timeout)
+        return self.obter(id_tarefa)
+
+    def encerrar(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        _DONOS.discard(self.dono)
+
+
+def main(argv):
+    fila = FilaTarefas.padrao(retomar=False)
+    if len(argv) == 3 and argv[1] == 'cancelar':
+        fila.cancelar(argv[2])
+        print(f"tarefa {argv[2]} marcada para cancelar")
+        return 0
+    if len(argv) != 1:
+        print(__doc__)
+        return 1
+    for t in fila.listar():
+        print(f"{t['id']}  {t['criada_em']}  {t['tipo']:10s} {t['estado']:10s} "
+              f"{t['processadas']:>8,}/{t['total'] or 0:<8,} {t['nome']}")
+    fila.encerrar()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
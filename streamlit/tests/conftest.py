@@ -0,0 +1,12 @@
+"""
+Datathon FIAP - Passos Mágicos
+Configuração dos testes: os módulos do app são importados como no Streamlit
+(a partir da pasta streamlit/)
+
+Autor: Leandro Leme Crespo
+"""
+
+import pathlib
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
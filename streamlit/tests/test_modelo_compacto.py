@@ -0,0 +1,66 @@
+"""
+Datathon FIAP - Passos Mágicos
+Paridade do avaliador compacto (NumPy) com o modelo pickle do scikit-learn
+
+As probabilidades são comparadas nos alunos da base PEDE (todas as linhas com
+as features completas), passando pelo exportador, pela gravação do pacote
+versionado e pelo carregamento com memory-map, como faz o app.
+
+Autor: Leandro Leme Crespo
+"""
+
+import pathlib
+
+import numpy as np
+import pytest
+
+pytest.importorskip('sklearn')
+
+import dados
+import pontuacao
+from esquema import aplicar_esquema
+from modelo_compacto import TOLERANCIA_PARIDADE, ModeloCompacto, exportar_modelo
+from pacote_modelo import carregar_pacote, criar_pacote, ler_features
+from risco import TabelaCodificacao
+
+
+@pytest.fixture(scope='module')
+def artefatos():
+    try:
+        return pontuacao.carregar_artefatos()
+    except FileNotFoundError:
+        pytest.skip('pickles do modelo não encontrados')
+
+
+@pytest.fixture(scope='module')
+def matriz(artefatos):
+    """Features dos alunos da base na ordem do modelo (ainda sem normalizar)"""
+    base = dados.carregar_base()
+    if base is None:
+        pytest.skip('planilha PEDE não encontrada')
+    _, _, le_dict, info = artefatos
+    X, _, _ = pontuacao.preparar_matriz(aplicar_esquema(base), TabelaCodificacao(le_dict), info)
+    assert len(X) > 1000
+    return X
+
+
+def test_arrays_exportados(artefatos, matriz):
+    modelo_sk, scaler_sk, _, _ = artefatos
+    arrays = exportar_modelo(modelo_sk)
+    modelo = ModeloCompacto(arrays['feature'], arrays['limiar'], arrays['folha'],
+                            arrays['valor_inicial'], arrays['taxa_aprendizado'])
+    X = scaler_sk.transform(matriz)
+    np.testing.assert_allclose(modelo.predict_proba(X), modelo_sk.predict_proba(X),
+                               rtol=0, atol=TOLERANCIA_PARIDADE)
+    np.testing.assert_array_equal(modelo.predict(X), modelo_sk.predict(X))
+
+
+def test_pacote_gravado(artefatos, matriz, tmp_path):
+    modelo_sk, scaler_sk, le_dict, info = artefatos
+    features = ler_features(pathlib.Path(__file__).resolve().parent.parent / 'features.txt')
+    destino = criar_pacote(modelo_sk, scaler_sk, le_dict, info, dir_modelos=tmp_path, versao='teste',
+                           features=features)
+    pacote = carregar_pacote(destino)
+    np.testing.assert_allclose(pacote.modelo.predict_proba(pacote.escalonador.transform(matriz)),
+                               modelo_sk.predict_proba(scaler_sk.transform(matriz)),
+                               rtol=0, atol=TOLERANCIA_PARIDADE)
@@ -0,0 +1,143 @@
+"""
+Datathon FIAP - Passos Mágicos
+Índice longitudinal dos alunos entre os anos PEDE
+
+A base empilha as abas anuais; o mesmo aluno (RA) aparece em até uma linha
+por ano (se houver repetidas, vale a última). O índice ordena as linhas por (RA, ano) uma única vez e guarda, em
+arrays contíguos (formato CSR):
+    - para cada aluno, o intervalo das suas linhas, já em ordem de ano
+    - os indicadores PEDE e a DEFASAGEM de cada linha
+    - para cada par de anos consecutivos do mesmo aluno, as variações dos
+      indicadores e a classe de risco de origem e de destino
+    - para cada par de anos (de, para), os alunos de cada transição de risco
+
+Consultar a trajetória de um aluno é O(1) (dicionário RA -> posição) mais o
+número de anos dele; uma coorte de transição é O(k), sem varrer a base nem
+fazer self-join.
+
+Autor: Leandro Leme Crespo
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from agregados import INDICADORES
+from risco import alvo_risco
+
+COLUNAS = INDICADORES + ['DEFASAGEM']
+# Transição -> (classe de origem, classe de destino); 1 = Com Risco (defasagem < 0)
+TRANSICOES = {
+    'Entrou em risco': (0, 1),
+    'Saiu do risco': (1, 0),
+    'Permaneceu em risco': (1, 1),
+    'Permaneceu sem risco': (0, 0),
+}
+
+
+@dataclass(frozen=True)
+class IndiceTrajetoria:
+    ras: np.ndarray          # (m,) RA de cada aluno, ordenados
+    inicio: np.ndarray       # (m + 1,) linhas do aluno i em [inicio[i], inicio[i + 1])
+    anos: np.ndarray         # (n,) ano PEDE de cada linha
+    linhas: np.ndarray       # (n,) posição da linha no DataFrame da base
+    valores: np.ndarray      # (n, k) COLUNAS de cada linha
+    par_aluno: np.ndarray    # (p,) aluno de cada par de anos consecutivos
+    par_de: np.ndarray       # (p,) ano de origem
+    par_para: np.ndarray     # (p,) ano de destino (o seguinte em que o aluno aparece)
+    deltas: np.ndarray       # (p, k) valor no destino - valor na origem
+    risco_de: np.ndarray     # (p,) alvo de risco na origem (NaN sem defasagem)
+    risco_para: np.ndarray   # (p,)
+    posicao: dict = field(repr=False)    # RA -> i
+    coortes: dict = field(repr=False)    # (de, para) -> {transição: índices em `par_*`}
+
+    @classmethod
+    def da_base(cls, df):
+        ras_linha = df['RA'].astype(str).to_numpy()
+        anos_linha = pd.to_numeric(df['ANO_PEDE'].astype(str), errors='coerce').to_numpy()
+        validas = np.flatnonzero(df['RA'].notna().to_numpy() & ~np.isnan(anos_linha))
+        # Ordena por (RA, ano): np.lexsort usa a última chave como principal
+        ordem = validas[np.lexsort((anos_linha[validas], ras_linha[validas]))]
+        # Uma linha por (RA, ano): com repetidas, fica a última da base (a mais recente).
+        # O lexsort é estável, então a última de cada grupo é a de maior posição.
+        ultima = np.r_[(ras_linha[ordem][1:] != ras_linha[ordem][:-1])
+                       | (anos_linha[ordem][1:] != anos_linha[ordem][:-1]), True]
+        ordem = ordem[ultima]
+
+        ras_ordenados = ras_linha[ordem]
+        novo_aluno = np.r_[True, ras_ordenados[1:] != ras_ordenados[:-1]]
+        inicio = np.r_[np.flatnonzero(novo_aluno), len(ordem)]
+        ras = ras_ordenados[novo_aluno]
+        aluno_linha = np.cumsum(novo_aluno) - 1
+
+        anos = anos_linha[ordem].astype(int)
+        valores = np.column_stack([
+            pd.to_numeric(df[c], errors='coerce').to_numpy(float)[ordem] if c in df.columns
+            else np.full(len(ordem), np.nan)
+            for c in COLUNAS
+        ])
+
+        # Pares de linhas consecutivas do mesmo aluno em anos diferentes
+        consecutivas = np.flatnonzero((aluno_linha[1:] == aluno_linha[:-1]) & (anos[1:] > anos[:-1]))
+        origem, destino = consecutivas, consecutivas + 1
+        risco = alvo_risco(valores[:, COLUNAS.index('DEFASAGEM')])
+
+        indice = cls(
+            ras=ras, inicio=inicio, anos=anos, linhas=ordem, valores=valores,
+            par_aluno=aluno_linha[origem], par_de=anos[origem], par_para=anos[destino],
+            deltas=valores[destino] - valores[origem],
+            risco_de=risco[origem], risco_para=risco[destino],
+            posicao={ra: i for i, ra in enumerate(ras.tolist())},
+            coortes={},
+        )
+        indice.coortes.update(indice._calcular_coortes())
+        return indice
+
+    def _calcular_coortes(self):
+        coortes = {}
+        chaves = np.unique(np.column_stack([self.par_de, self.par_para]), axis=0) if len(self.par_de) else []
+        for de, para in chaves:
+            do_par = (self.par_de == de) & (self.par_para == para)
+            coortes[(int(de), int(para))] = {
+                nome: np.flatnonzero(do_par & (self.risco_de == origem) & (self.risco_para == destino))
+                for nome, (origem, destino) in TRANSICOES.items()
+            }
+        return coortes
+
+    @property
+    def alunos(self):
+        return len(self.ras)
+
+    def pares_de_anos(self):
+        """Pares (de, para) de anos consecutivos com alunos em comum"""
+        return sorted(self.coortes)
+
+    def trajetoria(self, ra):
+        """Valores por ano de um aluno e variação em relação ao ano anterior dele; None se o RA não existe"""
+        i = self.posicao.get(str(ra))
+        if i is None:
+            return None
+        inicio, fim = self.inicio[i], self.inicio[i + 1]
+        valores = pd.DataFrame(self.valores[inicio:fim], columns=COLUNAS,
+                               index=pd.Index(self.anos[inicio:fim], name='ANO_PEDE'))
+        valores['RISCO'] = np.where(alvo_risco(valores['DEFASAGEM']) == 1, 'Com Risco',
+                                    np.where(valores['DEFASAGEM'].isna(), None, 'Sem Risco'))
+        deltas = valores[COLUNAS].diff().add_prefix('Δ ')
+        return pd.concat([valores, deltas], axis=1)
+
+    def matriz_transicao(self, de, para):
+        """Alunos por (classe de origem, classe de destino) entre dois anos consecutivos"""
+        coorte = self.coortes.get((int(de), int(para)), {})
+        matriz = pd.DataFrame(0, index=['Sem Risco', 'Com Risco'], columns=['Sem Risco', 'Com Risco'])
+        matriz.index.name, matriz.columns.name = str(de), str(para)
+        for nome, (origem, destino) in TRANSICOES.items():
+            matriz.iloc[origem, destino] = len(coorte.get(nome, ()))
+        return matriz
+
+    def coorte(self, de, para, transicao):
+        """RA e variações dos alunos de uma transição de risco entre dois anos (O(k))"""
+        pares = self.coortes.get((int(de), int(para)), {}).get(transicao, np.array([], dtype=int))
+        resultado = pd.DataFrame(self.deltas[pares], columns=[f'Δ {c}' for c in COLUNAS])
+        resultado.insert(0, 'RA', self.ras[self.par_aluno[pares]])
+        return resultado
@@ -0,0 +1,283 @@
+"""
+Datathon FIAP - Passos Mágicos
+Pipeline de treinamento do modelo de risco de defasagem
+
+Reproduz o notebook 03_Modelo_Preditivo.ipynb sem interação: padronização das
+colunas por ano, features, split 80/20 estratificado por ano + classe,
+comparação dos 4 algoritmos e Stratified K-Fold. Os candidatos e os folds
+rodam em paralelo (joblib, um processo por tarefa). As predições fora do fold
+ajustam a calibração da probabilidade (ver `calibracao.py`). Ao final o modelo
+escolhido é retreinado na base completa e os artefatos consumidos pelo app são
+gravados (pickles, features.txt e um novo pacote versionado em <saida>/modelos/), com
+a referência da distribuição de treino para o monitor de deriva (`deriva.py`).
+
+Uso:
+    python treino.py                      # usa todos os núcleos
+    python treino.py --n-jobs 4 --saida /tmp/artefatos   # pacote em /tmp/artefatos/modelos, não no app
+    python treino.py --so-calibrar        # só (re)calibra o modelo atual, sem retreiná-lo
+    python treino.py --so-deriva          # só (re)calcula a referência de deriva do modelo atual
+
+Autor: Leandro Leme Crespo
+"""
+
+import argparse
+import os
+import pathlib
+import pickle
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.svm import SVC
+
+import calibracao
+import dados
+import deriva
+from pacote_modelo import criar_pacote
+from risco import NIVEIS, alvo_risco
+
+FEATURES_NUMERICAS = ['IDA', 'IEG', 'IAA', 'IPS', 'IPV', 'IDADE', 'ANO INGRESSO', 'MAT', 'POR']
+FEATURES_CATEGORICAS = ['GÊNERO', 'INSTITUIÇÃO DE ENSINO']
+MODELO_FINAL = 'Gradient Boosting'
+SEMENTE = 42
+N_FOLDS = 5
+
+
+def criar_modelos():
+    """Candidatos comparados no notebook (mesmos hiperparâmetros)"""
+    return {
+        'Logistic Regression': LogisticRegression(max_iter=1000, random_state=SEMENTE),
+        'SVM (RBF)': SVC(kernel='rbf', probability=True, random_state=SEMENTE),
+        'Random Forest': RandomForestClassifier(n_estimators=200, random_state=SEMENTE),
+        'Gradient Boosting': GradientBoostingClassifier(
+            n_estimators=200, max_depth=4, learning_rate=0.1,
+            min_samples_split=10, min_samples_leaf=5, subsample=0.8, random_state=SEMENTE
+        ),
+    }
+
+
+def preparar_dados(df):
+    """
+    Padroniza colunas, converte tipos, codifica categóricas e cria o alvo.
+
+    Retorna (df_model, features_final, le_dict) com apenas as linhas completas.
+    """
+    df = dados.harmonizar_colunas(df)
+    for col in FEATURES_NUMERICAS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    le_dict = {}
+    for col in FEATURES_CATEGORICAS:
+        df[col] = df[col].fillna('Desconhecido').astype(str)
+        le = LabelEncoder()
+        df[col + '_ENC'] = le.fit_transform(df[col])
+        le_dict[col] = le
+
+    df['CLASSE_RISCO'] = alvo_risco(df['DEFASAGEM'])
+    features_final = FEATURES_NUMERICAS + [col + '_ENC' for col in FEATURES_CATEGORICAS]
+
+    df_model = df.dropna(subset=['CLASSE_RISCO'] + features_final).copy()
+    df_model['CLASSE_RISCO'] = df_model['CLASSE_RISCO'].astype(int)
+    return df_model, features_final, le_dict
+
+
+def _metricas(modelo, X_te, y_te):
+    y_pred = modelo.predict(X_te)
+    y_proba = modelo.predict_proba(X_te)[:, 1]
+    return {
+        'accuracy': accuracy_score(y_te, y_pred),
+        'auc_roc': roc_auc_score(y_te, y_proba),
+        'f1_score': f1_score(y_te, y_pred),
+    }
+
+
+def avaliar_candidato(nome, X_tr, y_tr, X_te, y_te):
+    """Treina um candidato no split 80/20 (dados já normalizados)"""
+    modelo = criar_modelos()[nome]
+    modelo.fit(X_tr, y_tr)
+    return nome, modelo, _metricas(modelo, X_te, y_te)
+
+
+def avaliar_fold(nome, X, y, train_idx, test_idx):
+    """Treina e avalia um fold do Stratified K-Fold com scaler próprio. Retorna (métricas, probabilidades do fold)"""
+    sc = StandardScaler()
+    X_tr = sc.fit_transform(X[train_idx])
+    X_te = sc.transform(X[test_idx])
+    modelo = criar_modelos()[nome]
+    modelo.fit(X_tr, y[train_idx])
+    return _metricas(modelo, X_te, y[test_idx]), modelo.predict_proba(X_te)[:, 1]
+
+
+def predicoes_fora_do_fold(divisoes, resultados_folds, n):
+    """Junta as probabilidades de cada fold na ordem das linhas (cada linha é prevista uma vez)"""
+    oof = np.empty(n)
+    for (_, test_idx), (_, probs) in zip(divisoes, resultados_folds):
+        oof[test_idx] = probs
+    return oof
+
+
+def calibrar_modelo(df, modelo_final=MODELO_FINAL, n_jobs=-1):
+    """Tabela de calibração do algoritmo `modelo_final` a partir do K-Fold, sem o resto do pipeline"""
+    df_model, features_final, _ = preparar_dados(df)
+    X = df_model[features_final].values
+    y = df_model['CLASSE_RISCO'].values
+    divisoes = list(StratifiedKFold(n_splits=N_FOLDS, shuffle=True, random_state=SEMENTE).split(X, y))
+    folds = Parallel(n_jobs=n_jobs)(delayed(avaliar_fold)(modelo_final, X, y, tr, te) for tr, te in divisoes)
+    return calibracao.ajustar(predicoes_fora_do_fold(divisoes, folds, len(y)), y)
+
+
+def treinar(df, modelo_final=MODELO_FINAL, n_jobs=-1, verbose=True):
+    """
+    Executa o pipeline completo.
+
+    Retorna (modelo, scaler, le_dict, info, ranking) com o modelo final
+    retreinado na base completa e os metadados no formato do modelo_info.pkl.
+    """
+    log = print if verbose else (lambda *a, **k: None)
+    df_model, features_final, le_dict = preparar_dados(df)
+    X = df_model[features_final].values
+    y = df_model['CLASSE_RISCO'].values
+    log(f'📊 Registros válidos: {len(df_model)} | Features ({len(features_final)}): {features_final}')
+
+    # Split estratificado por ano + classe
+    strat = df_model['ANO_PEDE'].astype(str) + '_' + df_model['CLASSE_RISCO'].astype(str)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=SEMENTE, stratify=strat.values
+    )
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+
+    # Candidatos e folds do CV são tarefas independentes: um único pool para todas
+    divisoes = list(StratifiedKFold(n_splits=N_FOLDS, shuffle=True, random_state=SEMENTE).split(X, y))
+    tarefas = [delayed(avaliar_candidato)(nome, X_train_scaled, y_train, X_test_scaled, y_test)
+               for nome in criar_modelos()]
+    tarefas += [delayed(avaliar_fold)(modelo_final, X, y, tr, te) for tr, te in divisoes]
+
+    inicio = time.perf_counter()
+    resultados = Parallel(n_jobs=n_jobs)(tarefas)
+    log(f'⏱️ {len(tarefas)} tarefas (candidatos + folds) em {time.perf_counter() - inicio:.1f}s')
+
+    candidatos = resultados[:len(criar_modelos())]
+    folds = [m for m, _ in resultados[len(criar_modelos()):]]
+    ranking = pd.DataFrame([{'Modelo': nome, **m} for nome, _, m in candidatos]) \
+        .sort_values('accuracy', ascending=False).reset_index(drop=True)
+    for _, r in ranking.iterrows():
+        log(f"  {r['Modelo']:25s} | Acc={r['accuracy']*100:.1f}% | AUC={r['auc_roc']*100:.1f}% | F1={r['f1_score']*100:.1f}%")
+
+    escolhido = next(m for nome, m, _ in candidatos if nome == modelo_final)
+    metricas = next(m for nome, _, m in candidatos if nome == modelo_final)
+    cv = {k: [f[k] for f in folds] for k in ['accuracy', 'auc_roc', 'f1_score']}
+    log(f"📊 CV {N_FOLDS} folds: Acc={np.mean(cv['accuracy'])*100:.1f}% (+/- {np.std(cv['accuracy'])*100:.1f}%)")
+
+    # Calibração ajustada nas predições fora do fold (o modelo final não vê dados novos para isso)
+    tabela_calibracao = calibracao.ajustar(
+        predicoes_fora_do_fold(divisoes, resultados[len(criar_modelos()):], len(y)), y)
+    for t in tabela_calibracao['taxas']:
+        if t['alunos']:
+            log(f"  {t['nivel']:15s} ({t['faixa']:>9s}) | {t['alunos']:4d} alunos | real com risco: {t['taxa_real']*100:.1f}%")
+
+    fi = dict(zip(features_final, escolhido.feature_importances_)) \
+        if hasattr(escolhido, 'feature_importances_') else {}
+    fi_sorted = dict(sorted(fi.items(), key=lambda x: x[1], reverse=True))
+
+    # Retreinar no dataset completo para deploy
+    scaler_final = StandardScaler()
+    X_final = scaler_final.fit_transform(X)
+    modelo = criar_modelos()[modelo_final]
+    modelo.fit(X_final, y)
+
+    info = {
+        'features': features_final,
+        'features_numericas': FEATURES_NUMERICAS,
+        'features_categoricas': FEATURES_CATEGORICAS,
+        'classes': {0: 'Sem Risco', 1: 'Com Risco'},
+        'niveis_risco': dict(zip(NIVEIS, calibracao.faixas_niveis(tabela_calibracao['limiares']))),
+        **metricas,
+        'modelo_nome': modelo_final,
+        'feature_importance': fi_sorted,
+        'n_registros_treino': len(X_train),
+        'n_registros_teste': len(X_test),
+        'n_registros_total': len(X),
+        'cv_accuracy_mean': np.mean(cv['accuracy']),
+        'cv_accuracy_std': np.std(cv['accuracy']),
+        'cv_auc_mean': np.mean(cv['auc_roc']),
+        'cv_auc_std': np.std(cv['auc_roc']),
+        'cv_f1_mean': np.mean(cv['f1_score']),
+        'calibracao': tabela_calibracao,
+        'deriva': deriva.criar_referencia(df_model, FEATURES_NUMERICAS, FEATURES_CATEGORICAS),
+    }
+    return modelo, scaler_final, le_dict, info, ranking
+
+
+def salvar_artefatos(modelo, scaler, le_dict, info, saida, so_info=False):
+    """Grava os artefatos no mesmo formato do notebook (`so_info`: apenas o modelo_info.pkl)"""
+    saida = pathlib.Path(saida)
+    saida.mkdir(parents=True, exist_ok=True)
+    artefatos = [('modelo_risco_defasagem.pkl', modelo), ('scaler.pkl', scaler),
+                 ('label_encoders.pkl', le_dict), ('modelo_info.pkl', info)]
+    for nome, obj in artefatos[-1:] if so_info else artefatos:
+        with open(saida / nome, 'wb') as f:
+            pickle.dump(obj, f)
+    if so_info:
+        return
+    with open(saida / 'features.txt', 'w') as f:
+        f.write(','.join(info['features']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Treina o modelo de risco de defasagem')
+    parser.add_argument('--dados', help='planilha PEDE (padrão: data/BASE_DE_DADOS_PEDE_2024_DATATHON.xlsx)')
+    parser.add_argument('--saida', default=str(pathlib.Path(__file__).parent),
+                        help='pasta dos artefatos (padrão: pasta do app)')
+    parser.add_argument('--modelo', default=MODELO_FINAL, choices=list(criar_modelos()),
+                        help='algoritmo do modelo final')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='processos paralelos (-1 = todos os núcleos)')
+    parser.add_argument('--sem-pacote', action='store_true',
+                        help='não criar/ativar um pacote versionado (em <saida>/modelos)')
+    parser.add_argument('--so-calibrar', action='store_true',
+                        help='mantém o modelo salvo em --saida e só ajusta a tabela de calibração')
+    parser.add_argument('--so-deriva', action='store_true',
+                        help='mantém o modelo salvo em --saida e só recalcula a referência de deriva')
+    args = parser.parse_args(argv)
+
+    df = dados.carregar_base(args.dados)
+    if df is None:
+        print('❌ Planilha PEDE não encontrada')
+        return 1
+
+    so_info = args.so_calibrar or args.so_deriva
+    if so_info:
+        from pontuacao import carregar_artefatos
+        modelo, scaler, le_dict, info = carregar_artefatos(args.saida)
+        if args.so_calibrar:
+            tabela = calibrar_modelo(df, info['modelo_nome'], args.n_jobs)
+            info = {**info, 'calibracao': tabela,
+                    'niveis_risco': dict(zip(NIVEIS, calibracao.faixas_niveis(tabela['limiares'])))}
+        if args.so_deriva:
+            df_model, _, _ = preparar_dados(df)
+            info = {**info, 'deriva': deriva.criar_referencia(df_model, FEATURES_NUMERICAS, FEATURES_CATEGORICAS)}
+    else:
+        modelo, scaler, le_dict, info, _ = treinar(df, args.modelo, args.n_jobs)
+    salvar_artefatos(modelo, scaler, le_dict, info, args.saida, so_info=so_info)
+    print(f'✅ Artefatos salvos em {os.path.abspath(args.saida)}')
+    if not args.sem_pacote:
+        if args.modelo != 'Gradient Boosting':
+            print('⚠️ Pacote versionado suporta apenas Gradient Boosting; pacote não criado')
+        else:
+            # O registro fica junto dos artefatos: só a pasta do app publica para o app
+            destino = criar_pacote(modelo, scaler, le_dict, info, dir_modelos=pathlib.Path(args.saida) / 'modelos',
+                                   features=info['features'])
+            print(f'✅ Pacote criado e ativado: {destino}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())